@@ -0,0 +1,78 @@
+"""
+Benchmark of year-scale top-k rankings, exact totals against Space-Saving
+
+Ranks a year of synthetic daily top-1000 lists (a stable head of popular
+articles and a long tail of articles trending for a few days) with the exact
+and the approximate modes of api_sketch.rank_frames, and reports time, peak
+memory and the recall of the exact top-k for each sketch capacity.
+
+Usage, with the package installed (pip install -e .):
+    python benchmarks/bench_sketch.py [--days 365] [--top 100]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+import pandas as pd
+
+from wikipedia_api.pageviews.api_sketch import rank_frames
+
+
+def make_frames(days: int, rows: int = 1000, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    frames = []
+    for day in range(days):
+        articles = {}
+        while len(articles) < rows:
+            if rng.random() < 0.3:
+                index = int(rng.paretovariate(1.1)) % 5000
+                article, views = f"Popular_{index}", 10**7 // index
+            else:
+                article = f"Trending_{day // 3}_{rng.randrange(100000)}"
+                views = rng.randint(1000, 100000)
+            articles[article] = views
+        frames.append(
+            pd.DataFrame(
+                {
+                    "project": "en.wikipedia",
+                    "article": list(articles),
+                    "views_ceil": list(articles.values()),
+                }
+            )
+        )
+    return frames
+
+
+def measure(frames: list, top: int, capacity):
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = rank_frames(iter(frames), top, capacity=capacity)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return df, seconds, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--top", type=int, default=100)
+    args = parser.parse_args()
+
+    frames = make_frames(args.days)
+    exact, seconds, peak = measure(frames, args.top, None)
+    expected = set(exact["article"])
+    print(f"exact: {seconds:.2f}s, peak {peak / 2**20:.1f} MiB")
+
+    for capacity in (args.top * 2, args.top * 10, args.top * 50):
+        df, seconds, peak = measure(frames, args.top, capacity)
+        recall = len(expected & set(df["article"])) / len(expected)
+        print(
+            f"sketch capacity {capacity}: {seconds:.2f}s, peak {peak / 2**20:.1f} MiB,"
+            f" recall {recall:.2%}, max error {df['error'].max()}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark of article title normalization on a million title list
+
+Compares normalizing every title on each call with the memoized batch
+normalization of api_titles, on a list where titles repeat as they do in
+bulk jobs (the same titles requested for several date ranges or projects).
+
+Usage, with the package installed (pip install -e .):
+    python benchmarks/bench_titles.py [--titles 1000000] [--distinct 200000]
+"""
+import argparse
+import random
+import time
+from urllib.parse import quote
+
+from wikipedia_api.pageviews.api_titles import (
+    clear_title_cache,
+    normalize_titles,
+    title_cache_info,
+)
+
+WORDS = ["albert", "einstein", "AC/DC", "café", "list of", "2021", "Main", "page"]
+
+
+def make_titles(count: int, distinct: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    pool = [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))) + f" {i}"
+        for i in range(distinct)
+    ]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def naive_encode(title: str) -> str:
+    normalized = "_".join(title.replace("_", " ").split())
+    normalized = normalized[:1].upper() + normalized[1:]
+    return quote(normalized, safe="")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--titles", type=int, default=1000000)
+    parser.add_argument("--distinct", type=int, default=200000)
+    args = parser.parse_args()
+
+    titles = make_titles(args.titles, args.distinct)
+
+    start = time.perf_counter()
+    naive = [naive_encode(title) for title in titles]
+    naive_seconds = time.perf_counter() - start
+
+    clear_title_cache()
+    start = time.perf_counter()
+    batch = normalize_titles(titles)
+    cold_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    normalize_titles(titles)
+    warm_seconds = time.perf_counter() - start
+
+    assert set(naive) == set(batch.encoded)
+    print(f"titles: {len(titles)}, distinct encoded: {len(batch.encoded)}")
+    print(f"per call normalization: {naive_seconds:.3f}s")
+    print(f"batch, cold memo cache: {cold_seconds:.3f}s")
+    print(f"batch, warm memo cache: {warm_seconds:.3f}s")
+    print(f"memo cache: {title_cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
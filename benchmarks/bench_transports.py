@@ -0,0 +1,98 @@
+"""
+Throughput of the client transports without network
+
+Runs the same per article workload through FakeTransport in process, and
+through RequestsTransport and Urllib3Transport against a local stub server,
+and prints the requests per second of each transport.
+
+Usage, with the package installed (pip install -e .):
+    python benchmarks/bench_transports.py [--calls 2000] [--days 365] [--workers 8]
+"""
+import argparse
+from datetime import datetime, timedelta
+import time
+
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_transport import (
+    FakeTransport,
+    RequestsTransport,
+    Urllib3Transport,
+)
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    AgentType,
+    ArticleMatrixRequest,
+    Granularity,
+)
+from wikipedia_api.tests.stub_server import StubApiServer
+
+
+def make_payload(days: int) -> dict:
+    start = datetime(2021, 1, 1)
+    return {
+        "items": [
+            {
+                "project": "en.wikipedia",
+                "article": "Article",
+                "granularity": "daily",
+                "timestamp": (start + timedelta(days=d)).strftime("%Y%m%d00"),
+                "access": "all-access",
+                "agent": "user",
+                "views": d,
+            }
+            for d in range(days)
+        ]
+    }
+
+
+def run(transport, calls: int, days: int, workers: int, base_url=None) -> float:
+    client = WikipediaPageViewApiClient(
+        "en.wikipedia",
+        APIHeader("benchmark", "benchmark@example.com"),
+        transport=transport,
+        base_url=base_url,
+    )
+    end = datetime(2021, 1, 1) + timedelta(days=days - 1)
+    request = ArticleMatrixRequest(
+        AccessMethod.ALL,
+        AgentType.USER,
+        [f"Article_{i}" for i in range(calls)],
+        Granularity.DAILY,
+        "20210101",
+        end.strftime("%Y%m%d"),
+    )
+    start = time.perf_counter()
+    client.get_per_article_pageviews_matrix(request, max_workers=workers)
+    return calls / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    payload = make_payload(args.days)
+    with StubApiServer() as server:
+        end = datetime(2021, 1, 1) + timedelta(days=args.days - 1)
+        for i in range(args.calls):
+            path = (
+                "/api/rest_v1/metrics/pageviews/per-article/en.wikipedia/all-access/"
+                f"user/Article_{i}/daily/2021010100/{end.strftime('%Y%m%d00')}"
+            )
+            server.set_payload(path, payload)
+
+        transports = {
+            "fake": (FakeTransport(handler=lambda url: payload), None),
+            "requests": (RequestsTransport(), server.base_url),
+            "urllib3": (Urllib3Transport(maxsize=args.workers), server.base_url),
+        }
+        for name, (transport, base_url) in transports.items():
+            rate = run(transport, args.calls, args.days, args.workers, base_url)
+            print(f"{name:>10}: {rate:10.1f} requests/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,12 @@ AUTHOR_EMAIL = "ivylin@uw.edu"
 PLATFORMS = "Linux, Windows and MacOS"
 VERSION = 1.0
 REQUIRES = ["numpy", "pandas", "requests"]
+ENTRY_POINTS = {
+    "console_scripts": [
+        "wikipedia-api-export=wikipedia_api.cli:main",
+        "wikipedia-api-proxy=wikipedia_api.cli:proxy_main",
+    ],
+}
 
 opts = dict(
     name=NAME,
@@ -30,6 +36,7 @@ opts = dict(
     version=VERSION,
     packages=PACKAGES,
     install_requires=REQUIRES,
+    entry_points=ENTRY_POINTS,
     requires=REQUIRES,
 )
 
@@ -3,6 +3,8 @@ from wikipedia_api.pageviews.api_types import (
     AgentType,
     AggregatePageViewRequest,
     APIHeader,
+    ApiResponse,
+    ArticleMatrixRequest,
     Granularity,
     PerArticlePageViewRequest,
     TopViewedArticleRequest,
@@ -13,21 +15,119 @@ from wikipedia_api.pageviews.api_constants import (
     PageViewApiEndPoints,
     PageViewApiValidDateRange,
 )
+from wikipedia_api.pageviews.api_batch import BatchJob, BatchReport
+from wikipedia_api.pageviews.api_analytics import spike_scores, trend_summary
+from wikipedia_api.pageviews.api_breaker import (
+    BreakerState,
+    BreakerStatus,
+    CircuitBreakerRegistry,
+)
+from wikipedia_api.pageviews.api_cache import ResponseCache
 from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
-from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_deadline import request_deadline, request_timeout
+from wikipedia_api.pageviews.api_exceptions import (
+    ApiException,
+    CircuitOpenException,
+    DeadlineExceededException,
+    InputException,
+    NotFoundException,
+)
+from wikipedia_api.pageviews.api_index import IndexRows, TopViewIndex
+from wikipedia_api.pageviews.api_matrix import PageViewMatrix
+from wikipedia_api.pageviews.api_negative_cache import NegativeCache
+from wikipedia_api.pageviews.api_pipeline import TopHistory
+from wikipedia_api.pageviews.api_plan import BatchRunReport
+from wikipedia_api.pageviews.api_proxy import CachingProxyServer
+from wikipedia_api.pageviews.api_records import TopArticleRecord, TopArticleRecords
+from wikipedia_api.pageviews.api_replay import RecordingTransport, ReplayTransport
+from wikipedia_api.pageviews.api_scheduler import (
+    Priority,
+    PriorityStats,
+    RequestScheduler,
+    request_priority,
+)
+from wikipedia_api.pageviews.api_shard import (
+    ShardReport,
+    merge_outputs,
+    run_available_shards,
+    run_shard,
+    run_sharded,
+)
+from wikipedia_api.pageviews.api_sketch import HeavyHitter, SpaceSaving, rank_frames
+from wikipedia_api.pageviews.api_store import DailySeriesStore
+from wikipedia_api.pageviews.api_transport import (
+    FakeTransport,
+    RequestsTransport,
+    Transport,
+    Urllib3Transport,
+)
+from wikipedia_api.pageviews.api_warmup import (
+    CacheWarmupScheduler,
+    WarmupKind,
+    WarmupReport,
+    WarmupTarget,
+)
 
 __all__ = [
     "AccessMethod",
     "AgentType",
     "AggregatePageViewRequest",
+    "ApiException",
     "APIHeader",
+    "ApiResponse",
+    "ArticleMatrixRequest",
+    "BatchJob",
+    "BatchReport",
+    "BatchRunReport",
+    "BreakerState",
+    "BreakerStatus",
+    "CacheWarmupScheduler",
+    "CachingProxyServer",
+    "CircuitBreakerRegistry",
+    "CircuitOpenException",
+    "DailySeriesStore",
+    "DeadlineExceededException",
+    "FakeTransport",
     "Granularity",
+    "HeavyHitter",
+    "IndexRows",
     "InputException",
+    "NegativeCache",
+    "NotFoundException",
     "PerArticlePageViewRequest",
+    "RecordingTransport",
+    "ReplayTransport",
+    "RequestScheduler",
+    "RequestsTransport",
+    "ResponseCache",
+    "ShardReport",
+    "SpaceSaving",
+    "TopArticleRecord",
+    "TopArticleRecords",
+    "TopHistory",
+    "TopViewIndex",
     "TopViewedArticleRequest",
+    "Transport",
     "TopViewedCountryRequest",
     "TopViewedPerCountryRequest",
     "PageViewApiEndPoints",
     "PageViewApiValidDateRange",
+    "PageViewMatrix",
+    "Priority",
+    "PriorityStats",
+    "Urllib3Transport",
+    "WarmupKind",
+    "WarmupReport",
+    "WarmupTarget",
     "WikipediaPageViewApiClient",
+    "merge_outputs",
+    "rank_frames",
+    "request_deadline",
+    "request_priority",
+    "request_timeout",
+    "run_available_shards",
+    "run_shard",
+    "run_sharded",
+    "spike_scores",
+    "trend_summary",
 ]
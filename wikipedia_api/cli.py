@@ -0,0 +1,304 @@
+"""
+Command line bulk export of Wikipedia page view data
+
+Every command splits its date range in work units (one request per year,
+article, day or month), fetches the units concurrently and writes each
+result to the output as soon as it arrives, so memory is bounded by the
+number of units in flight.
+
+Usage:
+    wikipedia-api-export top --start 20210101 --end 20210131 -o top.csv
+    wikipedia-api-export per-article --articles-file titles.txt \\
+        --start 20210101 --end 20211231 --format jsonl -o views.jsonl
+
+A host running many export or worker processes can share one cache and one
+upstream request budget through a local caching proxy:
+    wikipedia-api-proxy --cache-dir /var/cache/pageviews --rate 50
+    wikipedia-api-export top --base-url http://127.0.0.1:8787 ...
+"""
+import argparse
+from datetime import datetime, timedelta
+import sys
+from typing import Callable, Iterator, List, Optional
+
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_concurrent import bounded_map
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_proxy import CachingProxyServer
+from wikipedia_api.pageviews.api_replay import RecordingTransport, ReplayTransport
+from wikipedia_api.pageviews.api_transport import RequestsTransport
+from wikipedia_api.pageviews.api_export import (
+    EXPORT_FORMATS,
+    ExportStats,
+    create_chunk_writer,
+    export_frames,
+)
+from wikipedia_api.pageviews.api_types import (
+    AccessMethod,
+    AgentType,
+    AggregatePageViewRequest,
+    APIHeader,
+    Granularity,
+    PerArticlePageViewRequest,
+    TopViewedArticleRequest,
+    TopViewedCountryRequest,
+    TopViewedPerCountryRequest,
+)
+from wikipedia_api.pageviews.api_utils import (
+    parse_start_end_time,
+    split_time_range_by_year,
+)
+
+
+def _enum_value(enum_type):
+    def parse(value: str):
+        try:
+            return enum_type[value.upper().replace("-", "_")]
+        except KeyError:
+            choices = ", ".join(e.name.lower().replace("_", "-") for e in enum_type)
+            raise argparse.ArgumentTypeError(f"{value} only accept {choices}")
+
+    return parse
+
+
+def _days(start_time: datetime, end_time: datetime) -> Iterator[datetime]:
+    day = datetime(start_time.year, start_time.month, start_time.day)
+    while day <= end_time:
+        yield day
+        day += timedelta(days=1)
+
+
+def _months(start_time: datetime, end_time: datetime) -> Iterator[datetime]:
+    month = datetime(start_time.year, start_time.month, 1)
+    while month <= end_time:
+        yield month
+        month = datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def build_units(args: argparse.Namespace) -> List[tuple]:
+    """
+    Translate the parsed command line to the list of requests to export
+    """
+    start_time, end_time = parse_start_end_time(
+        args.start, args.end, support_hour=True
+    )
+    if args.command == "aggregate":
+        return [
+            AggregatePageViewRequest(
+                args.access,
+                args.agent,
+                args.granularity,
+                start.strftime("%Y%m%d%H"),
+                end.strftime("%Y%m%d%H"),
+            )
+            for start, end in split_time_range_by_year(start_time, end_time)
+        ]
+    elif args.command == "per-article":
+        articles = list(args.articles or [])
+        if args.articles_file:
+            with open(args.articles_file, encoding="utf-8") as f:
+                articles.extend(line.strip() for line in f if line.strip())
+        if not articles:
+            raise InputException("per-article export requires at least one article")
+        return [
+            PerArticlePageViewRequest(
+                args.access, args.agent, article, args.granularity, args.start, args.end
+            )
+            for article in articles
+        ]
+    elif args.command == "top":
+        if args.monthly:
+            return [
+                TopViewedArticleRequest(args.access, m.year, m.month, "all-days")
+                for m in _months(start_time, end_time)
+            ]
+        return [
+            TopViewedArticleRequest(args.access, d.year, d.month, d.day)
+            for d in _days(start_time, end_time)
+        ]
+    elif args.command == "top-by-country":
+        return [
+            TopViewedCountryRequest(args.access, m.year, m.month)
+            for m in _months(start_time, end_time)
+        ]
+    elif args.command == "top-per-country":
+        countries = [c.strip() for c in args.countries.split(",") if c.strip()]
+        if args.monthly:
+            dates = [(m, "all-days") for m in _months(start_time, end_time)]
+        else:
+            dates = [(d, d.day) for d in _days(start_time, end_time)]
+        return [
+            TopViewedPerCountryRequest(country, args.access, date.year, date.month, day)
+            for country in countries
+            for date, day in dates
+        ]
+    raise InputException(f"Unknown command {args.command}")
+
+
+def fetch_unit(
+    client: WikipediaPageViewApiClient, log: Callable[[str], None]
+) -> Callable[[tuple], Optional[object]]:
+    """
+    Return a function fetching one unit, failures are logged and returned
+    as None so a single failing unit doesn't stop the export. Partial
+    results are logged and left to export_frames to count as failed
+    """
+
+    def fetch(request: tuple):
+        try:
+            df = client.execute(request)
+        except Exception as e:
+            log(f"failed {request}: {e!r}")
+            return None
+        if df.attrs.get("missing"):
+            log(f"partial {request}: missing {df.attrs['missing']}")
+        return df
+
+    return fetch
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="wikipedia-api-export",
+        description="Bulk export Wikipedia page view data as CSV, JSONL or Parquet",
+    )
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--project", default="en.wikipedia")
+    common.add_argument("--user-agent", required=True, help="User-Agent header")
+    common.add_argument("--call-from", required=True, help="From header")
+    common.add_argument("--start", required=True, help="YYYYMMDD or YYYYMMDDHH")
+    common.add_argument("--end", required=True, help="YYYYMMDD or YYYYMMDDHH")
+    common.add_argument(
+        "--access", type=_enum_value(AccessMethod), default=AccessMethod.ALL
+    )
+    common.add_argument("-o", "--output", default="-", help="output path, - for stdout")
+    common.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    common.add_argument("--workers", type=int, default=4, help="concurrent API calls")
+    common.add_argument(
+        "--max-pending",
+        type=int,
+        default=None,
+        help="maximum units fetched ahead of the writer, default to workers",
+    )
+    common.add_argument("--quiet", action="store_true", help="no progress output")
+    common.add_argument(
+        "--base-url", help="URL of a caching proxy replacing https://wikimedia.org"
+    )
+    traffic = common.add_mutually_exclusive_group()
+    traffic.add_argument("--record", help="record the API traffic to this archive")
+    traffic.add_argument("--replay", help="serve the API traffic from this archive")
+    common.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        help="scale of the recorded latencies on replay, 0 for full speed",
+    )
+
+    series = argparse.ArgumentParser(add_help=False)
+    series.add_argument("--agent", type=_enum_value(AgentType), default=AgentType.ALL)
+    series.add_argument(
+        "--granularity", type=_enum_value(Granularity), default=Granularity.DAILY
+    )
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser(
+        "aggregate", parents=[common, series], help="aggregated page views"
+    )
+    per_article = subparsers.add_parser(
+        "per-article", parents=[common, series], help="page views of a list of articles"
+    )
+    per_article.add_argument("--articles", nargs="*", help="article titles")
+    per_article.add_argument("--articles-file", help="file with one title per line")
+    top = subparsers.add_parser("top", parents=[common], help="top viewed articles")
+    top.add_argument("--monthly", action="store_true", help="one ranking per month")
+    subparsers.add_parser(
+        "top-by-country", parents=[common], help="page views by country per month"
+    )
+    top_per_country = subparsers.add_parser(
+        "top-per-country", parents=[common], help="top viewed articles per country"
+    )
+    top_per_country.add_argument(
+        "--countries", required=True, help="comma separated country codes"
+    )
+    top_per_country.add_argument(
+        "--monthly", action="store_true", help="one ranking per month"
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = create_parser().parse_args(argv)
+
+    def log(message: str) -> None:
+        if not args.quiet:
+            print(message, file=sys.stderr)
+
+    try:
+        units = build_units(args)
+        writer = create_chunk_writer(args.output, args.format)
+    except InputException as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    transport = None
+    if args.record:
+        transport = RecordingTransport(RequestsTransport(), args.record)
+    elif args.replay:
+        transport = ReplayTransport(args.replay, latency_scale=args.replay_latency)
+
+    client = WikipediaPageViewApiClient(
+        args.project,
+        APIHeader(args.user_agent, args.call_from),
+        transport=transport,
+        base_url=args.base_url,
+    )
+    stats = ExportStats(total_units=len(units))
+    frames = bounded_map(
+        fetch_unit(client, log),
+        units,
+        max_workers=args.workers,
+        max_pending=args.max_pending,
+    )
+    with writer:
+        export_frames(frames, writer, stats, progress=lambda s: log(str(s)))
+    if isinstance(transport, RecordingTransport):
+        transport.close()
+        log(f"recorded {transport.count} API calls to {args.record}")
+    log(f"done: {stats}")
+    return 1 if stats.failed_units else 0
+
+
+def create_proxy_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="wikipedia-api-proxy",
+        description="Local caching proxy of the page view API shared by the "
+        "processes of a host",
+    )
+    parser.add_argument("--cache-dir", required=True, help="on-disk cache directory")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument(
+        "--ttl", type=float, default=3600.0, help="seconds before revalidation"
+    )
+    parser.add_argument(
+        "--rate", type=float, default=50.0, help="maximum upstream requests per second"
+    )
+    return parser
+
+
+def proxy_main(argv: Optional[List[str]] = None) -> int:
+    args = create_proxy_parser().parse_args(argv)
+    proxy = CachingProxyServer(
+        args.cache_dir, host=args.host, port=args.port, ttl=args.ttl, rate=args.rate
+    )
+    print(f"serving {proxy.base_url}", file=sys.stderr)
+    try:
+        proxy.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"stopped: {proxy.stats()}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
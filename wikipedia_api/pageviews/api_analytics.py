@@ -0,0 +1,263 @@
+"""
+Vectorized trend and anomaly scores of article x time page view matrices
+
+Every statistic is computed over the 2-D array at once, one row per article
+and one column per day, using cumulative sums along the time axis instead of
+a loop over articles. Missing values (NaN, eg get_per_article_pageviews_matrix
+with fill_nan) are ignored by the windows. trend_summary works on blocks of
+rows, so the values can be a memory mapped array (np.load(mmap_mode="r")) or
+a sparse matrix larger than the available memory.
+
+Functions:
+    rolling_mean
+    rolling_std
+    spike_scores
+    week_over_week
+    iter_row_chunks
+    trend_summary
+"""
+from __future__ import annotations
+
+from typing import Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_lazy import pandas as pd
+from wikipedia_api.pageviews.api_matrix import PageViewMatrix
+
+
+def _as_2d(values) -> np.ndarray:
+    if hasattr(values, "toarray"):
+        values = values.toarray()
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim != 2:
+        raise InputException(f"Expected an article x time matrix, got {values.ndim}-D")
+    return values
+
+
+def _window_sums(
+    values: np.ndarray, window: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # count, sum and sum of squares of the valid values of the trailing
+    # window ending at each column, values are centered on their row mean
+    # (returned last) so the sum of squares keeps its precision on large
+    # counts
+    if window <= 0:
+        raise InputException(f"window {window} should be larger than 0")
+    valid = ~np.isnan(values)
+    has_missing = not valid.all()
+    filled = np.where(valid, values, 0.0) if has_missing else values
+    valid_counts = valid.sum(axis=1)
+    center = filled.sum(axis=1) / np.maximum(valid_counts, 1)
+    centered = filled - center[:, None]
+    if has_missing:
+        centered[~valid] = 0.0
+
+    def trailing(array: np.ndarray) -> np.ndarray:
+        sums = np.cumsum(array, axis=1)
+        sums[:, window:] -= sums[:, :-window].copy()
+        return sums
+
+    if has_missing:
+        counts = trailing(valid.astype(np.float64))
+    else:
+        counts = np.minimum(np.arange(1, values.shape[1] + 1), window)
+        counts = np.broadcast_to(counts.astype(np.float64), values.shape)
+    sums = trailing(centered)
+    squares = trailing(centered * centered)
+    return counts, sums, squares, center
+
+
+def _rolling_moments(
+    values: np.ndarray, window: int, min_periods: Optional[int], ddof: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    counts, sums, squares, center = _window_sums(values, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / counts
+        variance = (squares - sums * mean) / (counts - ddof)
+    mean += center[:, None]
+    std = np.sqrt(np.maximum(variance, 0.0))
+    too_few = counts < (window if min_periods is None else min_periods)
+    mean[too_few] = np.nan
+    std[too_few | (counts - ddof <= 0)] = np.nan
+    return mean, std
+
+
+def rolling_mean(values, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """
+    Mean of the trailing window ending at each column, NaN where the window
+    has fewer than min_periods values (default to window)
+
+    Args:
+        values: 2-D array of shape (articles, days)
+        window (int): number of columns of the window
+        min_periods (Optional[int]): minimum number of valid values
+
+    Returns:
+        np.ndarray: float array of the same shape as values
+    """
+    values = _as_2d(values)
+    counts, sums, _, center = _window_sums(values, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / counts + center[:, None]
+    mean[counts < (window if min_periods is None else min_periods)] = np.nan
+    return mean
+
+
+def rolling_std(
+    values, window: int, min_periods: Optional[int] = None, ddof: int = 0
+) -> np.ndarray:
+    """
+    Standard deviation of the trailing window ending at each column, NaN
+    where the window has fewer than min_periods values (default to window)
+
+    Args:
+        values: 2-D array of shape (articles, days)
+        window (int): number of columns of the window
+        min_periods (Optional[int]): minimum number of valid values
+        ddof (int): delta degrees of freedom of the divisor
+
+    Returns:
+        np.ndarray: float array of the same shape as values
+    """
+    return _rolling_moments(_as_2d(values), window, min_periods, ddof)[1]
+
+
+def spike_scores(values, window: int = 28, min_std: float = 1.0) -> np.ndarray:
+    """
+    Z-score of each value against the mean and standard deviation of the
+    window days before it, the deviation is at least min_std so flat series
+    don't turn small changes into huge scores
+
+    Args:
+        values: 2-D array of shape (articles, days)
+        window (int): number of previous days of the baseline
+        min_std (float): lower bound of the baseline standard deviation
+
+    Returns:
+        np.ndarray: float array of the same shape as values, NaN for the
+        first window days and missing values
+    """
+    values = _as_2d(values)
+    scores = np.full(values.shape, np.nan)
+    if values.shape[1] <= window:
+        return scores
+    mean, std = _rolling_moments(values[:, :-1], window, None, 0)
+    scores[:, 1:] = (values[:, 1:] - mean) / np.maximum(std, min_std)
+    return scores
+
+
+def week_over_week(values, period: int = 7) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Change of the sum of the last period days against the period before
+
+    Args:
+        values: 2-D array of shape (articles, days)
+        period (int): number of days of a period
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: difference and relative change of
+        the period ending at each column, NaN for the first 2 * period - 1
+        days and where the previous period has no views
+    """
+    values = _as_2d(values)
+    sums = rolling_mean(values, period) * period
+    delta = np.full(values.shape, np.nan)
+    delta[:, period:] = sums[:, period:] - sums[:, :-period]
+    ratio = np.full(values.shape, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ratio[:, period:] = delta[:, period:] / sums[:, :-period]
+    ratio[~np.isfinite(ratio)] = np.nan
+    return delta, ratio
+
+
+def iter_row_chunks(values, chunk_rows: int) -> Iterator[Tuple[slice, np.ndarray]]:
+    """
+    Yield blocks of at most chunk_rows rows as dense float arrays, only one
+    block is loaded at a time
+
+    Args:
+        values: 2-D numpy array, memory mapped array or scipy sparse matrix
+        chunk_rows (int): number of rows of a block
+
+    Returns:
+        Iterator[Tuple[slice, np.ndarray]]: rows of each block and its values
+    """
+    if chunk_rows <= 0:
+        raise InputException(f"chunk_rows {chunk_rows} should be larger than 0")
+    for start in range(0, values.shape[0], chunk_rows):
+        rows = slice(start, min(start + chunk_rows, values.shape[0]))
+        yield rows, _as_2d(values[rows])
+
+
+def trend_summary(
+    matrix,
+    window: int = 28,
+    period: int = 7,
+    min_std: float = 1.0,
+    chunk_rows: int = 8192,
+    articles: Optional[Sequence[str]] = None,
+    index: Optional[pd.DatetimeIndex] = None,
+) -> pd.DataFrame:
+    """
+    Summarize the trend of every article at the last day of the matrix,
+    processing chunk_rows articles at a time
+
+    Args:
+        matrix: PageViewMatrix, or a 2-D array of shape (articles, days)
+        such as a memory mapped array or a scipy sparse matrix
+        window (int): number of days of the rolling mean and spike baseline
+        period (int): number of days of the week over week change
+        min_std (float): lower bound of the spike baseline deviation
+        chunk_rows (int): number of articles processed at once
+        articles (Optional[Sequence[str]]): row labels, default to the
+        articles of a PageViewMatrix or to the row numbers
+        index (Optional[pd.DatetimeIndex]): column timestamps, default to
+        the index of a PageViewMatrix or to the column numbers
+
+    Returns:
+        pd.DataFrame: indexed by article, columns:
+            "mean": float, rolling mean of the last day
+            "zscore": float, spike score of the last day
+            "max_zscore": float, largest spike score of the range
+            "max_zscore_at": timestamp of max_zscore
+            "wow_delta": float, week over week difference of the last day
+            "wow_ratio": float, week over week relative change
+    """
+    if isinstance(matrix, PageViewMatrix):
+        articles = matrix.articles if articles is None else articles
+        index = matrix.index if index is None else index
+        matrix = matrix.values
+    rows, days = matrix.shape
+    if articles is None:
+        articles = pd.RangeIndex(rows)
+    if index is None:
+        index = pd.RangeIndex(days)
+    columns = {
+        name: np.full(rows, np.nan)
+        for name in ("mean", "zscore", "max_zscore", "wow_delta", "wow_ratio")
+    }
+    max_at = np.full(rows, -1)
+    if days > 0:
+        for block, values in iter_row_chunks(matrix, chunk_rows):
+            columns["mean"][block] = rolling_mean(values, window)[:, -1]
+            scores = spike_scores(values, window, min_std)
+            columns["zscore"][block] = scores[:, -1]
+            scored = ~np.isnan(scores).all(axis=1)
+            positions = np.argmax(np.where(np.isnan(scores), -np.inf, scores), axis=1)
+            max_at[block] = np.where(scored, positions, -1)
+            columns["max_zscore"][block] = np.where(
+                scored, scores[np.arange(len(scores)), positions], np.nan
+            )
+            delta, ratio = week_over_week(values, period)
+            columns["wow_delta"][block] = delta[:, -1]
+            columns["wow_ratio"][block] = ratio[:, -1]
+
+    df = pd.DataFrame(columns, index=pd.Index(articles, name="article"))
+    if days > 0:
+        max_zscore_at = index.take(np.maximum(max_at, 0)).where(max_at >= 0)
+    else:
+        max_zscore_at = [None] * rows
+    df.insert(3, "max_zscore_at", max_zscore_at)
+    return df
@@ -0,0 +1,451 @@
+"""
+Resumable checkpointed batch jobs over the Wikipedia Page View API client
+
+A job directory holds a manifest of work units, a checkpoint of completed
+units and one output file per unit. Running a job only executes the units
+missing from the checkpoint, so a job interrupted by a crash or a throttle
+storm resumes where it stopped. The output of a unit is written to a
+temporary file and atomically renamed before the unit is checkpointed, so
+re-running a unit replaces its output and never duplicates rows.
+
+Files in the job directory:
+    manifest.jsonl: project and serialized request of each unit, one per line
+    checkpoint.log: id of each completed unit, appended and fsynced, jobs
+    run by several processes write checkpoint-<writer id>.log files instead
+    outputs/<unit id>.csv: result of each completed unit
+    rejected.log: id and error of each unit whose request is invalid, one
+    JSON object per line, rejected-<writer id>.log for several processes
+
+Classes:
+    BatchReport
+    BatchJob
+
+Functions:
+    serialize_request
+    deserialize_request
+    unit_id
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from wikipedia_api.pageviews.api_concurrent import bounded_map
+from wikipedia_api.pageviews.api_exceptions import InputException, NotFoundException
+from wikipedia_api.pageviews.api_lazy import pandas as pd
+from wikipedia_api.pageviews.api_scheduler import Priority, request_priority
+from wikipedia_api.pageviews.api_types import (
+    AccessMethod,
+    AgentType,
+    AggregatePageViewRequest,
+    Granularity,
+    PerArticlePageViewRequest,
+    TopViewedArticleRequest,
+    TopViewedCountryRequest,
+    TopViewedPerCountryRequest,
+)
+
+REQUEST_TYPES = {
+    request_type.__name__: request_type
+    for request_type in (
+        AggregatePageViewRequest,
+        PerArticlePageViewRequest,
+        TopViewedArticleRequest,
+        TopViewedCountryRequest,
+        TopViewedPerCountryRequest,
+    )
+}
+ENUM_FIELDS = {"access": AccessMethod, "agent": AgentType, "granularity": Granularity}
+
+logger = logging.getLogger(__name__)
+
+
+def serialize_request(request: tuple) -> dict:
+    """
+    Translate a request NamedTuple to a json compatible dict, enums are
+    stored by name
+    """
+    type_name = type(request).__name__
+    if type_name not in REQUEST_TYPES:
+        raise InputException(f"Unsupported request type {type_name}")
+    fields = {}
+    for key, value in request._asdict().items():
+        fields[key] = value.name if key in ENUM_FIELDS else value
+    return {"type": type_name, "fields": fields}
+
+
+def deserialize_request(data: dict) -> tuple:
+    """
+    Translate a dict created by serialize_request back to the request
+    """
+    request_type = REQUEST_TYPES.get(data["type"])
+    if request_type is None:
+        raise InputException(f"Unsupported request type {data['type']}")
+    fields = {}
+    for key, value in data["fields"].items():
+        fields[key] = ENUM_FIELDS[key][value] if key in ENUM_FIELDS else value
+    return request_type(**fields)
+
+
+def unit_id(request: tuple, project: str) -> str:
+    """
+    Stable id of a request of a Wikipedia project, identical requests of the
+    same project have the same id
+    """
+    payload = json.dumps(
+        {"project": project, **serialize_request(request)}, sort_keys=True
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:20]
+
+
+class BatchReport(NamedTuple):
+    """
+    Result of a batch job run
+    """
+
+    # Number of units in the manifest
+    total: int
+    # Number of units completed, including previous runs
+    completed: int
+    # Number of units executed by this run
+    executed: int
+    # Number of units that failed in this run and are still pending
+    failed: int
+    # Number of units completed without an API call because the client's
+    # negative cache knows they have no data
+    skipped: int = 0
+    # Number of units rejected in this run because their request is invalid,
+    # they are not retried
+    rejected: int = 0
+    # Last error of each unit that failed or was rejected in this run
+    errors: Optional[Dict[str, str]] = None
+
+
+class BatchJob:
+    """
+    Batch of page view requests with a durable manifest and checkpoint,
+    see the module documentation for the directory layout
+    """
+
+    MANIFEST_FILE = "manifest.jsonl"
+    CHECKPOINT_FILE = "checkpoint.log"
+    REJECTED_FILE = "rejected.log"
+    OUTPUT_DIR = "outputs"
+
+    def __init__(self, directory: str, writer_id: Optional[str] = None) -> None:
+        """
+        Open an existing job, use BatchJob.create to create a new one
+
+        Args:
+            directory (str): job directory
+            writer_id (Optional[str]): name of the checkpoint file written by
+            this instance, processes running the same job concurrently must
+            use different writer ids
+
+        Raises:
+            InputException: if the directory doesn't contain a job manifest
+        """
+        self._directory = directory
+        if writer_id is None:
+            self._checkpoint_file = self.CHECKPOINT_FILE
+            self._rejected_file = self.REJECTED_FILE
+        else:
+            self._checkpoint_file = f"checkpoint-{writer_id}.log"
+            self._rejected_file = f"rejected-{writer_id}.log"
+        manifest_path = os.path.join(directory, self.MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            raise InputException(f"No batch job manifest in {directory}")
+        os.makedirs(os.path.join(directory, self.OUTPUT_DIR), exist_ok=True)
+
+        self._units: Dict[str, tuple] = {}
+        # unit id -> Wikipedia project of the unit
+        self._projects: Dict[str, str] = {}
+        with open(manifest_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    data = json.loads(line)
+                    request = deserialize_request(data)
+                    uid = unit_id(request, data["project"])
+                    self._units[uid] = request
+                    self._projects[uid] = data["project"]
+        self._completed = set(self._read_checkpoint())
+        # unit id -> error of the units whose request is invalid
+        self._rejected = self._read_rejected()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(
+        cls, directory: str, requests: Iterable[tuple], project: str
+    ) -> "BatchJob":
+        """
+        Create a job of the requests of a Wikipedia project in directory,
+        duplicated requests are stored once. If the directory already contains
+        a job with the same units it is opened and keeps its checkpoint
+
+        Args:
+            directory (str): job directory
+            requests (Iterable[tuple]): requests of the units
+            project (str): Wikipedia project of the requests, eg en.wikipedia
+
+        Raises:
+            InputException: if the directory contains a job with other units
+        """
+        units = {}
+        for request in requests:
+            units.setdefault(unit_id(request, project), request)
+
+        manifest_path = os.path.join(directory, cls.MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            job = cls(directory)
+            if set(job._units) != set(units):
+                raise InputException(
+                    f"{directory} already contains a batch job with other units"
+                )
+            return job
+
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for request in units.values():
+                data = {"project": project, **serialize_request(request)}
+                f.write(json.dumps(data) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, manifest_path)
+        return cls(directory)
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def units(self) -> Dict[str, tuple]:
+        return dict(self._units)
+
+    def project_of(self, uid: str) -> str:
+        """
+        Return the Wikipedia project of a unit
+        """
+        return self._projects[uid]
+
+    def __len__(self) -> int:
+        return len(self._units)
+
+    def completed_units(self) -> List[str]:
+        return [uid for uid in self._units if uid in self._completed]
+
+    def pending_units(self) -> List[str]:
+        return [
+            uid
+            for uid in self._units
+            if uid not in self._completed and uid not in self._rejected
+        ]
+
+    def rejected_units(self) -> Dict[str, str]:
+        """
+        Return the error of each unit rejected because its request is
+        invalid, rejected units are not pending anymore and have no output
+        """
+        return dict(self._rejected)
+
+    def is_done(self) -> bool:
+        return not self.pending_units()
+
+    def output_path(self, uid: str) -> str:
+        return os.path.join(self._directory, self.OUTPUT_DIR, f"{uid}.csv")
+
+    def run(
+        self,
+        client,
+        max_workers: int = 4,
+        unit_ids: Optional[Iterable[str]] = None,
+        progress: Optional[Callable[[str, bool], None]] = None,
+    ) -> BatchReport:
+        """
+        Execute the pending units with the client, or a client of the project
+        of the unit created with client.with_project, each completed unit is
+        written to its output file then checkpointed. A failing unit is
+        logged and stays pending to be retried by the next run, as is a unit
+        whose result is partial because the deadline expired. A unit failing
+        with InputException is rejected and never retried. Units the client
+        knows have no data, and units the API answers with not found, are
+        completed with an empty output. The API calls are made with BULK
+        priority
+
+        Args:
+            client (WikipediaPageViewApiClient): client used to execute the
+            requests
+            max_workers (int): number of concurrent API calls
+            unit_ids (Optional[Iterable[str]]): restrict the run to these
+            units, default to every unit
+            progress (Optional[Callable[[str, bool], None]]): called with the
+            unit id and whether it succeeded after each unit
+
+        Returns:
+            BatchReport: counts of the run
+        """
+        pending = self.pending_units()
+        if unit_ids is not None:
+            selected = set(unit_ids)
+            pending = [uid for uid in pending if uid in selected]
+
+        clients = {client.project: client}
+        for uid in pending:
+            project = self._projects[uid]
+            if project not in clients:
+                clients[project] = client.with_project(project)
+
+        skipped = 0
+        if hasattr(client, "is_known_missing"):
+            missing = [
+                uid
+                for uid in pending
+                if clients[self._projects[uid]].is_known_missing(self._units[uid])
+            ]
+            for uid in missing:
+                self._write_output(uid, pd.DataFrame())
+                self._record_completion(uid)
+                if progress is not None:
+                    progress(uid, True)
+            skipped = len(missing)
+            missing = set(missing)
+            pending = [uid for uid in pending if uid not in missing]
+
+        def execute(uid: str):
+            # unit id, whether it succeeded and the error of a failed unit
+            try:
+                try:
+                    df = clients[self._projects[uid]].execute(self._units[uid])
+                except NotFoundException:
+                    df = pd.DataFrame()
+                if df.attrs.get("missing"):
+                    # partial result cut short by the deadline, retried later
+                    return uid, False, None
+                self._write_output(uid, df)
+            except Exception as e:
+                logger.warning(
+                    "Batch unit %s %s failed: %r",
+                    uid,
+                    self._units[uid],
+                    e,
+                    exc_info=not isinstance(e, InputException),
+                )
+                return uid, False, e
+            return uid, True, None
+
+        executed = 0
+        failed = 0
+        rejected = 0
+        errors: Dict[str, str] = {}
+        with request_priority(Priority.BULK):
+            results = bounded_map(execute, pending, max_workers=max_workers)
+            for uid, succeeded, error in results:
+                if succeeded:
+                    self._record_completion(uid)
+                    executed += 1
+                elif isinstance(error, InputException):
+                    errors[uid] = f"{type(error).__name__}: {error}"
+                    self._record_rejection(uid, errors[uid])
+                    rejected += 1
+                else:
+                    if error is not None:
+                        errors[uid] = f"{type(error).__name__}: {error}"
+                    failed += 1
+                if progress is not None:
+                    progress(uid, succeeded)
+
+        return BatchReport(
+            total=len(self._units),
+            completed=len(self.completed_units()),
+            executed=executed,
+            failed=failed,
+            skipped=skipped,
+            rejected=rejected,
+            errors=errors,
+        )
+
+    def iter_results(self) -> Iterator[pd.DataFrame]:
+        """
+        Yield the output of every completed unit in manifest order
+        """
+        for uid in self.completed_units():
+            path = self.output_path(uid)
+            if os.path.getsize(path) > 0:
+                yield pd.read_csv(path)
+
+    def read_results(self) -> pd.DataFrame:
+        """
+        Return the outputs of every completed unit in one data frame
+        """
+        dfs = list(self.iter_results())
+        if not dfs:
+            return pd.DataFrame()
+        return pd.concat(dfs, ignore_index=True)
+
+    def reload(self) -> None:
+        """
+        Reload the checkpoint, to see units completed by other processes
+        """
+        with self._lock:
+            self._completed = set(self._read_checkpoint())
+            self._rejected = self._read_rejected()
+
+    def _write_output(self, uid: str, df: pd.DataFrame) -> None:
+        path = self.output_path(uid)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            if not df.empty:
+                df.to_csv(f, index=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _record_completion(self, uid: str) -> None:
+        with self._lock:
+            path = os.path.join(self._directory, self._checkpoint_file)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(uid + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._completed.add(uid)
+
+    def _record_rejection(self, uid: str, error: str) -> None:
+        with self._lock:
+            path = os.path.join(self._directory, self._rejected_file)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"uid": uid, "error": error}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._rejected[uid] = error
+
+    def _read_rejected(self) -> Dict[str, str]:
+        rejected = {}
+        for name in sorted(os.listdir(self._directory)):
+            if not (name.startswith("rejected") and name.endswith(".log")):
+                continue
+            with open(os.path.join(self._directory, name), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        data = json.loads(line)
+                    except ValueError:
+                        # partial line left by a crash
+                        continue
+                    if data["uid"] in self._units:
+                        rejected[data["uid"]] = data["error"]
+        return rejected
+
+    def _read_checkpoint(self) -> List[str]:
+        completed = []
+        for name in sorted(os.listdir(self._directory)):
+            if not (name.startswith("checkpoint") and name.endswith(".log")):
+                continue
+            with open(os.path.join(self._directory, name), encoding="utf-8") as f:
+                # a crash can leave a partial line, it is not a known unit
+                completed.extend(
+                    line.strip() for line in f if line.strip() in self._units
+                )
+        return completed
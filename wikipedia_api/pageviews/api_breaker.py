@@ -0,0 +1,279 @@
+"""
+Circuit breakers of the page view API endpoints
+
+A breaker counts the consecutive failures of one endpoint template of
+PageViewApiEndPoints: server errors (5xx and 429), timeouts and connection
+errors. Once failure_threshold is reached the breaker opens and the calls of
+the endpoint fail fast with CircuitOpenException instead of piling up on a
+degraded backend. After reset_timeout seconds the breaker is half-open and
+lets a few probe calls through: a successful probe closes it, a failed one
+opens it again. Other endpoints are not affected.
+
+Enum:
+    BreakerState
+
+Classes:
+    BreakerStatus
+    CircuitBreaker
+    CircuitBreakerRegistry
+
+Functions:
+    endpoint_name
+    is_backend_failure
+"""
+from contextlib import contextmanager
+from enum import Enum
+import threading
+import time
+from typing import Callable, Dict, Iterator, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+
+from wikipedia_api.pageviews.api_constants import PageViewApiEndPoints
+from wikipedia_api.pageviews.api_exceptions import ApiException, CircuitOpenException
+
+# Name in PageViewApiEndPoints of each endpoint template path
+_TEMPLATE_NAMES = {
+    urlsplit(template).path: name
+    for name, template in vars(PageViewApiEndPoints).items()
+    if name.isupper() and name != "BASE_URL"
+}
+
+
+def endpoint_name(endpoint: str) -> str:
+    """
+    Name in PageViewApiEndPoints of an endpoint template, whatever its base
+    URL, eg "AGGRGATED_PAGEVIEWS_LEGACY", the template path for unknown
+    templates
+    """
+    path = urlsplit(endpoint).path
+    return _TEMPLATE_NAMES.get(path, path)
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """
+    Whether error shows the backend of an endpoint is degraded: 5xx or 429
+    responses, timeouts and connection errors. Client errors such as 404 and
+    expired deadlines don't count
+    """
+    if isinstance(error, ApiException):
+        status_code = error.status_code
+        return status_code is not None and (status_code >= 500 or status_code == 429)
+    return isinstance(
+        error,
+        (
+            requests.exceptions.Timeout,
+            requests.exceptions.ConnectionError,
+            urllib3.exceptions.HTTPError,
+        ),
+    )
+
+
+class BreakerState(Enum):
+    """
+    Enum for the state of a circuit breaker
+    """
+
+    # Calls go through
+    CLOSED = 0
+    # Calls fail fast
+    OPEN = 1
+    # Probe calls go through, the others fail fast
+    HALF_OPEN = 2
+
+
+class BreakerStatus(NamedTuple):
+    """
+    State and counters of a circuit breaker
+    """
+
+    # Current state
+    state: BreakerState
+    # Consecutive failures
+    failures: int
+    # Number of times the breaker opened
+    trips: int
+    # Calls rejected without calling the API
+    rejected: int
+    # Seconds before an open breaker lets a probe through, 0 otherwise
+    retry_in: float
+
+
+class CircuitBreaker:
+    """
+    Thread safe circuit breaker of one endpoint, see the module documentation
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Init CircuitBreaker
+
+        Args:
+            name (str): name of the endpoint, used in error messages
+            failure_threshold (int): consecutive failures opening the breaker
+            reset_timeout (float): seconds an open breaker waits before
+            letting probe calls through
+            half_open_max_calls (int): concurrent probe calls of a half-open
+            breaker
+            clock (Callable[[], float]): monotonic time source in seconds
+        """
+        if failure_threshold <= 0:
+            raise ValueError(
+                f"failure_threshold {failure_threshold} should be larger than 0"
+            )
+        self._name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = BreakerState.CLOSED
+        self._failures = 0
+        self._trips = 0
+        self._rejected = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def state(self) -> BreakerState:
+        with self._lock:
+            return self._current_state()
+
+    def status(self) -> BreakerStatus:
+        with self._lock:
+            state = self._current_state()
+            retry_in = 0.0
+            if state == BreakerState.OPEN:
+                retry_in = self._opened_at + self._reset_timeout - self._clock()
+            return BreakerStatus(
+                state=state,
+                failures=self._failures,
+                trips=self._trips,
+                rejected=self._rejected,
+                retry_in=max(retry_in, 0.0),
+            )
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """
+        Run one call of the endpoint in the block, recording its outcome
+
+        Raises:
+            CircuitOpenException: without running the block if the breaker
+            is open, or half-open with all probe calls running
+        """
+        is_probe = self._before_call()
+        failed = False
+        try:
+            yield
+        except Exception as e:
+            failed = is_backend_failure(e)
+            raise
+        finally:
+            self._after_call(is_probe, failed)
+
+    def _current_state(self) -> BreakerState:
+        # an open breaker turns half-open once reset_timeout has elapsed
+        if (
+            self._state == BreakerState.OPEN
+            and self._clock() - self._opened_at >= self._reset_timeout
+        ):
+            self._state = BreakerState.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def _before_call(self) -> bool:
+        with self._lock:
+            state = self._current_state()
+            if state == BreakerState.CLOSED:
+                return False
+            if state == BreakerState.HALF_OPEN and (
+                self._probes < self._half_open_max_calls
+            ):
+                self._probes += 1
+                return True
+            self._rejected += 1
+        raise CircuitOpenException(f"Circuit breaker of {self._name} is {state.name}")
+
+    def _after_call(self, is_probe: bool, failed: bool) -> None:
+        with self._lock:
+            if is_probe:
+                self._probes -= 1
+            if not failed:
+                if is_probe or self._state == BreakerState.CLOSED:
+                    self._state = BreakerState.CLOSED
+                    self._failures = 0
+                return
+            self._failures += 1
+            if self._state != BreakerState.OPEN and (
+                is_probe or self._failures >= self._failure_threshold
+            ):
+                self._state = BreakerState.OPEN
+                self._opened_at = self._clock()
+                self._trips += 1
+
+
+class CircuitBreakerRegistry:
+    """
+    Circuit breakers of the endpoint templates, created on first use with
+    the same settings, can be shared by several clients
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Init CircuitBreakerRegistry, see CircuitBreaker for the arguments
+        """
+        self._settings = {
+            "failure_threshold": failure_threshold,
+            "reset_timeout": reset_timeout,
+            "half_open_max_calls": half_open_max_calls,
+            "clock": clock,
+        }
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        """
+        Return the breaker of an endpoint template or of its name
+        """
+        name = endpoint_name(endpoint)
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name, **self._settings)
+            return breaker
+
+    def get(self, name: str) -> Optional[CircuitBreaker]:
+        """
+        Return the breaker of an endpoint name, None if it was never called
+        """
+        with self._lock:
+            return self._breakers.get(name)
+
+    def states(self) -> Dict[str, BreakerStatus]:
+        """
+        Return the status of the breaker of each endpoint called so far, by
+        endpoint name
+        """
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.status() for breaker in breakers}
@@ -0,0 +1,178 @@
+"""
+Response cache of the Wikipedia Page View API client
+
+Classes:
+    CacheStats
+    ResponseCache
+
+Functions:
+    track_cache_urls
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+import contextvars
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+_TRACKED_URLS: contextvars.ContextVar = contextvars.ContextVar(
+    "pageview_tracked_urls", default=None
+)
+
+
+@contextmanager
+def track_cache_urls() -> Iterator[List[str]]:
+    """
+    Collect the URLs looked up in any ResponseCache by the block, including
+    the calls made by worker threads of bounded_map
+    """
+    urls: List[str] = []
+    token = _TRACKED_URLS.set(urls)
+    try:
+        yield urls
+    finally:
+        _TRACKED_URLS.reset(token)
+
+
+class CacheStats(NamedTuple):
+    """
+    Counters of a ResponseCache
+    """
+
+    hits: int
+    misses: int
+    entries: int
+    # Number of expired entries revalidated by a 304 response
+    revalidated: int = 0
+
+
+class ResponseCache:
+    """
+    Thread safe in memory cache of decoded API responses keyed by request
+    URL. Entries expire ttl seconds after they are stored, the least
+    recently used entry is evicted when max_entries is reached. With
+    revalidate set, the ETag and Last-Modified validators of the responses
+    are stored and the client revalidates expired entries with a conditional
+    request, a 304 response refreshes the entry without downloading it again
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600.0,
+        max_entries: Optional[int] = 10000,
+        clock: Callable[[], float] = time.time,
+        revalidate: bool = False,
+    ) -> None:
+        """
+        Init ResponseCache
+
+        Args:
+            ttl (float): seconds before a cached response expires
+            max_entries (Optional[int]): maximum number of cached responses,
+            None for no limit
+            clock (Callable[[], float]): time source in seconds
+            revalidate (bool): revalidate expired entries with conditional
+            requests instead of fetching them again
+        """
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._clock = clock
+        self._revalidate = revalidate
+        # url -> (stored time, data, validators)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._revalidated = 0
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    @property
+    def revalidate(self) -> bool:
+        return self._revalidate
+
+    def get(self, url: str) -> Optional[dict]:
+        """
+        Return the cached response of url, None if missing or expired
+        """
+        tracked = _TRACKED_URLS.get()
+        if tracked is not None:
+            tracked.append(url)
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or self._clock() - entry[0] >= self._ttl:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(url)
+            self._hits += 1
+            return entry[1]
+
+    def put(
+        self, url: str, data: dict, validators: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Store the response of url with its ETag and Last-Modified validators
+        """
+        with self._lock:
+            self._entries[url] = (self._clock(), data, validators or {})
+            self._entries.move_to_end(url)
+            if self._max_entries is not None:
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+
+    def get_stale(self, url: str) -> Optional[Tuple[dict, Dict[str, str]]]:
+        """
+        Return the response and validators of an expired entry of url that
+        can be revalidated, None if revalidate is not set, the entry is
+        missing or has no validators
+        """
+        if not self._revalidate:
+            return None
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None or not entry[2]:
+                return None
+            return entry[1], entry[2]
+
+    def refresh(self, url: str, validators: Optional[Dict[str, str]] = None) -> None:
+        """
+        Reset the age of the entry of url after a 304 response, updating its
+        validators if given
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return
+            self._entries[url] = (self._clock(), entry[1], validators or entry[2])
+            self._entries.move_to_end(url)
+            self._revalidated += 1
+
+    def age(self, url: str) -> Optional[float]:
+        """
+        Return the seconds since the response of url was stored, None if it
+        is not cached
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return None
+            return self._clock() - entry[0]
+
+    def __contains__(self, url: str) -> bool:
+        age = self.age(url)
+        return age is not None and age < self._ttl
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                self._hits, self._misses, len(self._entries), self._revalidated
+            )
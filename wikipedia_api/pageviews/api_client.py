@@ -1,12 +1,31 @@
+from __future__ import annotations
+
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timedelta
-import pandas as pd
-from wikipedia_api.pageviews.api_exceptions import InputException
+from functools import partial, wraps
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+import numpy as np
+from wikipedia_api.pageviews.api_deadline import (
+    DEFAULT_TIMEOUT,
+    is_timeout_error,
+    request_deadline,
+    request_timeout,
+    time_left,
+)
+from wikipedia_api.pageviews.api_exceptions import (
+    ApiException,
+    DeadlineExceededException,
+    InputException,
+    NotFoundException,
+)
 
 from wikipedia_api.pageviews.api_types import (
     AccessMethod,
     AgentType,
     AggregatePageViewRequest,
     APIHeader,
+    ApiResponse,
+    ArticleMatrixRequest,
     Granularity,
     PerArticlePageViewRequest,
     TopViewedArticleRequest,
@@ -17,15 +36,72 @@ from wikipedia_api.pageviews.api_constants import (
     PageViewApiEndPoints,
     PageViewApiValidDateRange,
 )
+from wikipedia_api.pageviews.api_breaker import CircuitBreakerRegistry
+from wikipedia_api.pageviews.api_cache import ResponseCache
+from wikipedia_api.pageviews.api_concurrent import bounded_map
+from wikipedia_api.pageviews.api_negative_cache import (
+    NegativeCache,
+    article_key,
+    country_day_key,
+)
+from wikipedia_api.pageviews.api_lazy import pandas as pd
+from wikipedia_api.pageviews.api_matrix import (
+    PageViewMatrix,
+    build_time_index,
+    collect_sparse_row,
+    fill_dense_row,
+)
+from wikipedia_api.pageviews.api_titles import (
+    encode_title,
+    is_case_sensitive,
+    normalize_titles,
+)
+from wikipedia_api.pageviews.api_pipeline import (
+    TopArticleRows,
+    TopHistory,
+    TopRequest,
+)
+from wikipedia_api.pageviews.api_plan import (
+    BatchRunReport,
+    plan_requests,
+    split_result,
+    upstream_call_count,
+)
+from wikipedia_api.pageviews.api_records import TopArticleRecords
+from wikipedia_api.pageviews.api_scheduler import RequestScheduler, Slot
+from wikipedia_api.pageviews.api_sketch import rank_frames
+from wikipedia_api.pageviews.api_stream import (
+    iter_json_array_items,
+    iter_record_batches,
+    stream_api_call,
+)
+from wikipedia_api.pageviews.api_transport import Transport, transport_api_call
 from wikipedia_api.pageviews.api_utils import (
+    conditional_api_call,
+    parse_start_end_month_or_day,
     parse_start_end_time,
+    rebase_endpoint,
     rest_api_call,
+    split_time_range_by_month,
+    split_time_range_by_year,
     split_time_range_for_legacy_api,
     translate_access_method_to_str,
     translate_agent_type_to_str,
     translate_granularity_to_str,
 )
 
+T = TypeVar("T")
+
+
+def _with_deadline(method):
+    # run a public method within the deadline of the client
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with request_deadline(self._deadline):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
 
 class WikipediaPageViewApiClient:
     """
@@ -39,29 +115,283 @@ class WikipediaPageViewApiClient:
         aggregated page viwe API result
         -- extend the top viewed artical per country api to support get result
         on whole month
+    Each API call has a timeout and public methods can have a deadline (see
+    api_deadline). Methods making one API call raise
+    DeadlineExceededException when the deadline expires, methods making
+    several calls return the partial result gathered so far and list the
+    missing units in the "missing" attribute of the result (df.attrs for
+    data frames)
     """
 
-    def __init__(self, project: str, api_header: APIHeader) -> None:
+    # client method of each request type, used by execute
+    _REQUEST_METHODS = {
+        AggregatePageViewRequest: "get_aggregated_pageviews",
+        PerArticlePageViewRequest: "get_per_article_pageviews",
+        TopViewedArticleRequest: "get_top_pageviews",
+        TopViewedCountryRequest: "get_top_viewed_country",
+        TopViewedPerCountryRequest: "get_top_view_per_country",
+    }
+
+    def __init__(
+        self,
+        project: str,
+        api_header: APIHeader,
+        cache: Optional[ResponseCache] = None,
+        negative_cache: Optional[NegativeCache] = None,
+        transport: Optional[Transport] = None,
+        base_url: Optional[str] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+        deadline: Optional[float] = None,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+    ) -> None:
         """
         Init WikipediaPageViewApiClient with header and project
 
         Args:
             api_header (APIHeader): API Header used to call underlying REST API
             project (str): wikipedia project, eg: en.wikipedia.org
+            cache (Optional[ResponseCache]): cache of API responses, can be
+            shared by several clients, responses are not cached if None
+            negative_cache (Optional[NegativeCache]): cache of articles and
+            country days known to have no data, they are answered without
+            calling the API, nothing is remembered if None
+            transport (Optional[Transport]): HTTP transport of the API calls,
+            eg RequestsTransport, Urllib3Transport or FakeTransport, default
+            to the requests calls of api_utils
+            base_url (Optional[str]): scheme and host replacing
+            https://wikimedia.org in the endpoints, eg the URL of a local
+            CachingProxyServer shared by the processes of a host
+            scheduler (Optional[RequestScheduler]): scheduler granting the API
+            calls by priority class, can be shared by several clients, calls
+            are not scheduled if None
+            timeout (Optional[float]): seconds each API call may take,
+            DEFAULT_TIMEOUT if None
+            deadline (Optional[float]): seconds each public method may take,
+            no deadline if None
+            breakers (Optional[CircuitBreakerRegistry]): circuit breakers of
+            the endpoints, calls of an endpoint whose breaker is open raise
+            CircuitOpenException, can be shared by several clients
         """
 
         self._project = project
+        self._header = api_header
         self._api_header = {
             "User-Agent": api_header.user_agent,
             "From": api_header.call_from,
         }
+        self._cache = cache
+        self._negative_cache = negative_cache
+        self._transport = transport
+        self._base_url = base_url
+        self._scheduler = scheduler
+        self._timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+        self._deadline = deadline
+        self._breakers = breakers
 
     @property
     def project(self) -> str:
         return self._project
 
+    @property
+    def cache(self) -> Optional[ResponseCache]:
+        return self._cache
+
+    @property
+    def negative_cache(self) -> Optional[NegativeCache]:
+        return self._negative_cache
+
+    @property
+    def transport(self) -> Optional[Transport]:
+        return self._transport
+
+    @property
+    def base_url(self) -> Optional[str]:
+        return self._base_url
+
+    @property
+    def scheduler(self) -> Optional[RequestScheduler]:
+        return self._scheduler
+
+    @property
+    def timeout(self) -> float:
+        return self._timeout
+
+    @property
+    def deadline(self) -> Optional[float]:
+        return self._deadline
+
+    @property
+    def breakers(self) -> Optional[CircuitBreakerRegistry]:
+        return self._breakers
+
+    def with_project(self, project: str) -> "WikipediaPageViewApiClient":
+        """
+        Return a client of another wikipedia project sharing the API header,
+        the caches, the transport, the base URL, the scheduler, the timeout,
+        the deadline and the circuit breakers of this client
+        """
+        return WikipediaPageViewApiClient(
+            project,
+            self._header,
+            cache=self._cache,
+            negative_cache=self._negative_cache,
+            transport=self._transport,
+            base_url=self._base_url,
+            scheduler=self._scheduler,
+            timeout=self._timeout,
+            deadline=self._deadline,
+            breakers=self._breakers,
+        )
+
+    def execute(self, request: tuple) -> pd.DataFrame:
+        """
+        Call the client method matching the type of request, eg
+        get_top_pageviews for a TopViewedArticleRequest
+
+        Args:
+            request (tuple): one of the request NamedTuples of api_types
+
+        Raises:
+            InputException: if the request type is not supported
+
+        Returns:
+            pd.DataFrame: result of the matching method
+        """
+        method = self._REQUEST_METHODS.get(type(request))
+        if method is None:
+            raise InputException(f"Unsupported request type {type(request).__name__}")
+        return getattr(self, method)(request)
+
+    @_with_deadline
+    def run_batch(self, requests: List[tuple], max_workers: int = 4) -> BatchRunReport:
+        """
+        Execute a batch of heterogeneous requests: identical requests are
+        executed once and overlapping aggregated or per article date ranges
+        are merged (see api_plan), the planned requests are executed
+        concurrently and their results split back per request
+
+        Args:
+            requests (List[tuple]): request NamedTuples of api_types
+            max_workers (int): number of concurrent planned requests
+
+        Raises:
+            InputException: if a request is invalid or its type is not
+            supported
+
+        Returns:
+            BatchRunReport: result of each request and the number of upstream
+            API calls saved by the plan, requests not executed before the
+            deadline expired or whose API call failed, eg an article that
+            doesn't exist, get an empty data frame and are listed in missing,
+            the error of failed requests is kept in errors
+        """
+        requests = list(requests)
+        for request in requests:
+            if type(request) not in self._REQUEST_METHODS:
+                raise InputException(
+                    f"Unsupported request type {type(request).__name__}"
+                )
+        plan = plan_requests(requests)
+
+        def run(planned: tuple):
+            # result of the planned request, or the error of its API call
+            try:
+                return self._until_deadline(partial(self.execute, planned))
+            except ApiException as e:
+                return e
+
+        frames = list(bounded_map(run, plan.requests, max_workers=max_workers))
+
+        results = []
+        missing = []
+        errors = {}
+        partial_results = {}
+        for index, (request, planned) in enumerate(zip(requests, plan.assignments)):
+            frame = frames[planned]
+            if frame is None or isinstance(frame, ApiException):
+                missing.append(index)
+                results.append(pd.DataFrame())
+                if frame is not None:
+                    errors[index] = frame
+                continue
+            result = split_result(request, plan.requests[planned], frame)
+            if frame.attrs.get("missing"):
+                partial_results[index] = result.attrs["missing"] = list(
+                    frame.attrs["missing"]
+                )
+            results.append(result)
+        upstream_calls = sum(upstream_call_count(r) for r in plan.requests)
+        return BatchRunReport(
+            results=results,
+            requests=len(requests),
+            executed=len(plan.requests),
+            upstream_calls=upstream_calls,
+            calls_saved=sum(upstream_call_count(r) for r in requests)
+            - upstream_calls,
+            missing=missing,
+            errors=errors,
+            partial=partial_results,
+        )
+
+    def is_known_missing(self, request: tuple) -> bool:
+        """
+        Whether the negative cache knows the request has no data: a per
+        article request of a missing article, or a top per country request
+        of a country withheld on every requested day
+
+        Args:
+            request (tuple): one of the request NamedTuples of api_types
+
+        Returns:
+            bool: True if executing the request would return no data
+        """
+        if self._negative_cache is None:
+            return False
+        if isinstance(request, PerArticlePageViewRequest):
+            try:
+                start_time, end_time = self._validate_per_article_request(
+                    request.access,
+                    request.granularity,
+                    request.start_time,
+                    request.end_time,
+                )
+            except InputException:
+                return False
+            params = self._per_article_params(
+                request.access,
+                request.agent,
+                request.article,
+                request.granularity,
+                start_time,
+                end_time,
+            )
+            return article_key(**params) in self._negative_cache
+        if isinstance(request, TopViewedPerCountryRequest):
+            try:
+                dates, _ = self._top_view_per_country_dates(request)
+            except InputException:
+                return False
+            access = translate_access_method_to_str(request.access, is_legacy=False)
+            return all(
+                country_day_key(
+                    request.country,
+                    access,
+                    date.strftime("%Y"),
+                    date.strftime("%m"),
+                    date.strftime("%d"),
+                )
+                in self._negative_cache
+                for date in dates
+            )
+        return False
+
+    @_with_deadline
     def get_aggregated_pageviews(
-        self, request: AggregatePageViewRequest
+        self,
+        request: AggregatePageViewRequest,
+        sum_mobile: bool = False,
+        max_workers: int = 3,
     ) -> pd.DataFrame:
         """
         Given a date range, returns a timeseries of pageview counts.
@@ -70,10 +400,16 @@ class WikipediaPageViewApiClient:
         if start time specified is between 12/01/2007 and 07/01/2015, legacy
         API data will be combined with new page view API data if agent type
         is set to MOBILE and date range include 07/01/2015, both the
-        mobile-app and mobile-web data will be returned
+        mobile-app and mobile-web data will be returned. The underlying API
+        calls (legacy API, and mobile-app and mobile-web for MOBILE access)
+        are made concurrently
         Args:
             request (AggregatePageViewRequest): Request data for get
             aggregated page view
+            sum_mobile (bool): for MOBILE access, also return the sum of the
+            mobile-app and mobile-web page views as rows with "mobile" access
+            after the split rows, ignored for other access methods
+            max_workers (int): number of concurrent API calls
         Raises:
             InputException: User input error if start time or end time is
             invalid or out of supported range
@@ -86,63 +422,227 @@ class WikipediaPageViewApiClient:
                 "granularity": str,
                 "timestamp": str,
                 "views": int
+            if the deadline expires, df.attrs["missing"] lists the API and
+            date range of each call without result
         """
 
-        start_time, end_time = parse_start_end_time(
-            request.start_time, request.end_time, support_hour=True
+        (
+            legacy_api_start_time,
+            legacy_api_end_time,
+            page_view_api_start_time,
+            page_view_api_end_time,
+        ) = self._split_aggregated_request(request)
+
+        calls = []
+        labels = []
+        if legacy_api_start_time is not None:
+            calls.append(
+                partial(
+                    self._call_legacy_api,
+                    request.access,
+                    request.granularity,
+                    legacy_api_start_time,
+                    legacy_api_end_time,
+                )
+            )
+            labels.append(
+                "legacy/"
+                + translate_access_method_to_str(request.access, is_legacy=True)
+                + f"/{legacy_api_start_time:%Y%m%d%H}-{legacy_api_end_time:%Y%m%d%H}"
+            )
+
+        is_mobile = request.access == AccessMethod.MOBILE
+        if page_view_api_start_time is not None:
+            if is_mobile:
+                accesses = [AccessMethod.MOBILE_APP, AccessMethod.MOBILE_WEB]
+            else:
+                accesses = [request.access]
+            for access in accesses:
+                calls.append(
+                    partial(
+                        self._call_page_view_api,
+                        access,
+                        request.agent,
+                        request.granularity,
+                        page_view_api_start_time,
+                        page_view_api_end_time,
+                    )
+                )
+                labels.append(
+                    translate_access_method_to_str(access, is_legacy=False)
+                    + f"/{page_view_api_start_time:%Y%m%d%H}"
+                    + f"-{page_view_api_end_time:%Y%m%d%H}"
+                )
+
+        if len(calls) == 1:
+            dfs = [calls[0]()]
+        else:
+            dfs = list(
+                bounded_map(
+                    self._until_deadline,
+                    calls,
+                    max_workers=max(1, min(max_workers, len(calls))),
+                )
+            )
+        missing = [label for label, df in zip(labels, dfs) if df is None]
+        dfs = [df for df in dfs if df is not None]
+        df = pd.concat(dfs, ignore_index=True) if dfs else pd.DataFrame()
+
+        if missing:
+            # no mobile sum of a partial result
+            df.attrs["missing"] = missing
+        elif sum_mobile and is_mobile and page_view_api_start_time is not None:
+            mobile_df = self._sum_mobile_pageviews(df)
+            df = pd.concat([df, mobile_df], ignore_index=True)
+        return df
+
+    def iter_aggregated_pageviews(
+        self,
+        request: AggregatePageViewRequest,
+        ordered: bool = True,
+        max_workers: int = 4,
+        max_pending: Optional[int] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Iterator version of get_aggregated_pageviews, the date range is split
+        into calendar years for each underlying API call (legacy API, and
+        mobile-app and mobile-web for MOBILE access) and the data frame of
+        each period is yielded as soon as it is fetched. Periods are fetched
+        concurrently, at most max_pending periods are fetched ahead of the
+        consumer so a slow consumer limits the fetching
+
+        Args:
+            request (AggregatePageViewRequest): Request data for get
+            aggregated page view
+            ordered (bool): yield periods in the order of
+            get_aggregated_pageviews if True, in completion order otherwise
+            max_workers (int): number of concurrent API calls
+            max_pending (Optional[int]): maximum number of periods fetched but
+            not consumed yet, default to max_workers
+
+        Raises:
+            InputException: User input error if start time or end time is
+            invalid or out of supported range
+
+        Returns:
+            Iterator[pd.DataFrame]: one data frame per period with the same
+            columns as get_aggregated_pageviews
+        """
+        (
+            legacy_api_start_time,
+            legacy_api_end_time,
+            page_view_api_start_time,
+            page_view_api_end_time,
+        ) = self._split_aggregated_request(request)
+
+        periods = []
+        if legacy_api_start_time is not None:
+            for start_time, end_time in split_time_range_by_year(
+                legacy_api_start_time, legacy_api_end_time
+            ):
+                periods.append(
+                    partial(
+                        self._call_legacy_api,
+                        request.access,
+                        request.granularity,
+                        start_time,
+                        end_time,
+                    )
+                )
+        if page_view_api_start_time is not None:
+            if request.access == AccessMethod.MOBILE:
+                accesses = [AccessMethod.MOBILE_APP, AccessMethod.MOBILE_WEB]
+            else:
+                accesses = [request.access]
+            for access in accesses:
+                for start_time, end_time in split_time_range_by_year(
+                    page_view_api_start_time, page_view_api_end_time
+                ):
+                    periods.append(
+                        partial(
+                            self._call_page_view_api,
+                            access,
+                            request.agent,
+                            request.granularity,
+                            start_time,
+                            end_time,
+                        )
+                    )
+
+        return bounded_map(
+            lambda call: call(),
+            periods,
+            max_workers=max_workers,
+            max_pending=max_pending,
+            ordered=ordered,
         )
 
-        # Validate start time
-        if start_time < PageViewApiValidDateRange.LEGACY_API_START_DATE:
-            raise InputException(f"Data before {request.start_time} is not available")
+    def stream_aggregated_pageviews(
+        self, request: AggregatePageViewRequest, batch_size: int = 10000
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Streaming version of get_aggregated_pageviews, the response "items"
+        array is decoded incrementally while it is downloaded and emitted in
+        data frames of at most batch_size rows, so peak memory is bounded by
+        the batch size instead of the whole response. Batches of legacy API
+        data come first, followed by page view API data in the same order as
+        get_aggregated_pageviews. The scheduler slot and circuit breaker of
+        the call are only held while a batch is downloaded, not while the
+        consumer processes it
+
+        Args:
+            request (AggregatePageViewRequest): Request data for get
+            aggregated page view
+            batch_size (int): Maximum number of rows of each data frame
+
+        Raises:
+            InputException: User input error if start time or end time is
+            invalid or out of supported range or batch size is not positive
+
+        Returns:
+            Iterator[pd.DataFrame]: data frames with the same columns as
+            get_aggregated_pageviews
+        """
+        if batch_size <= 0:
+            raise InputException(f"Batch size {batch_size} should be larger than 0")
 
         (
             legacy_api_start_time,
             legacy_api_end_time,
             page_view_api_start_time,
             page_view_api_end_time,
-        ) = split_time_range_for_legacy_api(start_time, end_time)
+        ) = self._split_aggregated_request(request)
 
-        legacy_df = pd.DataFrame()
+        # validate every sub call before starting any download
+        calls = []
         if legacy_api_start_time is not None:
-            legacy_df = self._call_legacy_api(
+            params = self._legacy_api_params(
                 request.access,
                 request.granularity,
                 legacy_api_start_time,
                 legacy_api_end_time,
             )
-
-        pageview_df = pd.DataFrame()
+            calls.append(
+                (PageViewApiEndPoints.AGGRGATED_PAGEVIEWS_LEGACY, params, True)
+            )
         if page_view_api_start_time is not None:
             if request.access == AccessMethod.MOBILE:
-                mobile_app_df = self._call_page_view_api(
-                    AccessMethod.MOBILE_APP,
-                    request.agent,
-                    request.granularity,
-                    page_view_api_start_time,
-                    page_view_api_end_time,
-                )
-                mobile_web_df = self._call_page_view_api(
-                    AccessMethod.MOBILE_WEB,
-                    request.agent,
-                    request.granularity,
-                    page_view_api_start_time,
-                    page_view_api_end_time,
-                )
-                pageview_df = pd.concat(
-                    [mobile_app_df, mobile_web_df], ignore_index=True
-                )
+                accesses = [AccessMethod.MOBILE_APP, AccessMethod.MOBILE_WEB]
             else:
-                pageview_df = self._call_page_view_api(
-                    request.access,
+                accesses = [request.access]
+            for access in accesses:
+                params = self._page_view_api_params(
+                    access,
                     request.agent,
                     request.granularity,
                     page_view_api_start_time,
                     page_view_api_end_time,
                 )
+                calls.append((PageViewApiEndPoints.AGGRGATED_PAGEVIEWS, params, False))
 
-        return pd.concat([legacy_df, pageview_df], ignore_index=True)
+        return self._stream_batches(calls, batch_size)
 
+    @_with_deadline
     def get_top_view_per_country(self, request: TopViewedPerCountryRequest):
         """
         Lists the 1000 most viewed articles for a given country and date,
@@ -175,94 +675,175 @@ class WikipediaPageViewApiClient:
                 "article": str,
                 "project": str,
                 "views_ceil": int
+            for all-days, if the deadline expires df.attrs["missing"] lists
+            the days without result, as YYYYMMDD
         """
 
-        if request.access == AccessMethod.MOBILE:
-            raise InputException("Current API doesn't support MOBILE access")
+        dates, is_all_days = self._top_view_per_country_dates(request)
+        if is_all_days is not True:
+            return self._call_top_view_per_country_date(
+                request.country, request.access, dates[0]
+            )
 
-        year = request.year
-        month = request.month
-        day = request.day
+        dfs = list(
+            bounded_map(
+                lambda date: self._until_deadline(
+                    partial(
+                        self._call_top_view_per_country_date,
+                        request.country,
+                        request.access,
+                        date,
+                    )
+                ),
+                dates,
+                max_workers=1,
+            )
+        )
+        missing = [
+            date.strftime("%Y%m%d") for date, df in zip(dates, dfs) if df is None
+        ]
+        dfs = [df for df in dfs if df is not None]
+        if not dfs:
+            df = pd.DataFrame()
+            df.attrs["missing"] = missing
+            return df
+        # skip the days without data unless the whole month has none
+        dfs = [df for df in dfs if not df.empty] or dfs
+        df = pd.concat(dfs, ignore_index=True)
+        # group by month to find top 1000 article per month
+        aggregated_df = df.groupby(
+            ["country", "access", "year", "month", "article", "project"]
+        ).agg(views_ceil=("views_ceil", "sum"))
+        aggregated_df = (
+            aggregated_df.reset_index()
+            .sort_values(["views_ceil"], ascending=False)
+            .reset_index(drop=True)
+            .head(1000)
+        )
+        aggregated_df["rank"] = aggregated_df.index + 1
+        aggregated_df["day"] = "all-days"
+        if missing:
+            aggregated_df.attrs["missing"] = missing
+        return aggregated_df
 
-        if year <= 0:
-            raise InputException(f"Year value {year} should not smaller or equal to 0")
+    def iter_top_view_per_country(
+        self,
+        request: TopViewedPerCountryRequest,
+        ordered: bool = True,
+        max_workers: int = 4,
+        max_pending: Optional[int] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Iterator version of get_top_view_per_country, yields the top viewed
+        articles of each day as soon as it is fetched instead of collecting
+        the whole month. If all-days is specified, the daily results are not
+        aggregated to a monthly ranking. Days are fetched concurrently, at
+        most max_pending days are fetched ahead of the consumer so a slow
+        consumer limits the fetching
 
-        if month <= 0:
-            raise InputException(
-                f"Month value {month} should not smaller or equal to 0"
-            )
+        Args:
+            request (TopViewedPerCountryRequest): Request data for get top
+            page viewed article per country
+            ordered (bool): yield days in date order if True, in completion
+            order otherwise
+            max_workers (int): number of concurrent API calls
+            max_pending (Optional[int]): maximum number of days fetched but not
+            consumed yet, default to max_workers
 
-        if month > 12:
-            raise InputException(f"Month value {month} should not larger than 12")
+        Raises:
+            InputException: Same validation as get_top_view_per_country
 
-        is_all_days = False
-        try:
-            day = int(day)
-        except ValueError:
-            if day != "all-days":
-                raise InputException(f"Day value {day} only accept 1-31 or all-days")
-            is_all_days = True
+        Returns:
+            Iterator[pd.DataFrame]: one data frame per day with the same
+            columns as get_top_view_per_country
+        """
+        dates, _ = self._top_view_per_country_dates(request)
+        return bounded_map(
+            lambda date: self._call_top_view_per_country_date(
+                request.country, request.access, date
+            ),
+            dates,
+            max_workers=max_workers,
+            max_pending=max_pending,
+            ordered=ordered,
+        )
 
-        api_start_time = PageViewApiValidDateRange.TOP_PER_COUNTRY_PAGEVIEW_API_START_DATE
-        if is_all_days is not True:
-            try:
-                date_time = datetime(year, month, day)
-                year = date_time.strftime("%Y")
-                month = date_time.strftime("%m")
-                day = date_time.strftime("%d")
-            except ValueError:
-                raise InputException(f"Invalid date provide:{year}-{month}-{day}")
+    @_with_deadline
+    def get_top_view_per_country_range(
+        self,
+        country: str,
+        access: AccessMethod,
+        start_time: str,
+        end_time: str,
+        top_n: int = 1000,
+        sketch_capacity: Optional[int] = None,
+        max_workers: int = 4,
+    ) -> pd.DataFrame:
+        """
+        Rank the top viewed articles of a country over a date range by
+        summing the views of the daily top lists. Days are fetched
+        concurrently and aggregated while they arrive, with exact totals of
+        every article or, if sketch_capacity is set, a bounded Space-Saving
+        sketch (see api_sketch) trading accuracy for memory on year-scale
+        ranges
 
-            # Validate start time
+        Args:
+            country (str): 2-letter country code
+            access (AccessMethod): Access Method to filter page view data
+            start_time (str): first day in string format of YYYYMMDD
+            end_time (str): last day in string format of YYYYMMDD
+            top_n (int): number of ranked articles
+            sketch_capacity (Optional[int]): counters of the approximate
+            mode, at least top_n, exact mode if None
+            max_workers (int): number of concurrent API calls
 
-            if (date_time < api_start_time):
-                raise InputException(
-                    f"Data before {api_start_time.strftime('%Y%m%d')} is not available"
-                )
+        Raises:
+            InputException: User input error if a date is invalid or out of
+            supported range, or MOBILE access method is specified
 
-            return self._call_top_view_per_country_api(
-                request.country, request.access, year, month, day
+        Returns:
+            pd.DataFrame: columns:
+                "project": str,
+                "article": str,
+                "views_ceil": int,
+                "error": int, maximum overestimation of views_ceil, 0 in
+                exact mode
+                "rank": int
+            if the deadline expires, df.attrs["missing"] lists the days
+            without result, as YYYYMMDD
+        """
+        if access == AccessMethod.MOBILE:
+            raise InputException("Current API doesn't support MOBILE access")
+        start, end = parse_start_end_time(start_time, end_time)
+        api_start_time = PageViewApiValidDateRange.TOP_PER_COUNTRY_PAGEVIEW_API_START_DATE
+        if start < api_start_time:
+            raise InputException(
+                f"Data before {api_start_time.strftime('%Y%m%d')} is not available"
             )
-        else:
-            current_date = datetime(year, month, 1)
-            # Validate start time
-            if (current_date < api_start_time):
-                raise InputException(
-                    f"Data before {api_start_time.strftime('%Y%m%d')} is not available"
-                )
+        dates = [start + timedelta(days=n) for n in range((end - start).days + 1)]
 
-            dfs = []
-            while True:
-                current_year = current_date.strftime("%Y")
-                current_month = current_date.strftime("%m")
-                current_day = current_date.strftime("%d")
-                current_df = self._call_top_view_per_country_api(
-                    request.country,
-                    request.access,
-                    current_year,
-                    current_month,
-                    current_day,
-                )
-                dfs.append(current_df)
-                current_date = current_date + timedelta(days=1)
-                if current_date.month > month:
-                    break
-
-            df = pd.concat(dfs, ignore_index=True)
-            # group by month to find top 1000 article per month
-            aggregated_df = df.groupby(
-                ["country", "access", "year", "month", "article", "project"]
-            ).agg(views_ceil=("views_ceil", "sum"))
-            aggregated_df = (
-                aggregated_df.reset_index()
-                .sort_values(["views_ceil"], ascending=False)
-                .reset_index(drop=True)
-                .head(1000)
+        missing = []
+
+        def frames() -> Iterator[pd.DataFrame]:
+            results = bounded_map(
+                lambda date: self._until_deadline(
+                    partial(self._call_top_view_per_country_date, country, access, date)
+                ),
+                dates,
+                max_workers=max_workers,
             )
-            aggregated_df["rank"] = aggregated_df.index + 1
-            aggregated_df["day"] = "all-days"
-            return aggregated_df
+            for date, df in zip(dates, results):
+                if df is None:
+                    missing.append(date.strftime("%Y%m%d"))
+                else:
+                    yield df
+
+        df = rank_frames(frames(), top_n, capacity=sketch_capacity)
+        if missing:
+            df.attrs["missing"] = missing
+        return df
 
+    @_with_deadline
     def get_per_article_pageviews(
         self, request: PerArticlePageViewRequest
     ) -> pd.DataFrame:
@@ -278,6 +859,7 @@ class WikipediaPageViewApiClient:
             InputException: User input error if start time or end time is
             invalid or MOBILE access method is specified as current page view
             API doesn't support this access type
+            NotFoundException: if the article doesn't exist in the project
         Returns:
             pd.DataFrame: columns:
                 "project": str,
@@ -289,53 +871,145 @@ class WikipediaPageViewApiClient:
                 "views": int
         """
 
-        start_time, end_time = parse_start_end_time(
-            request.start_time, request.end_time, support_hour=True
+        start_time, end_time = self._validate_per_article_request(
+            request.access, request.granularity, request.start_time, request.end_time
         )
 
-        # Validate start time
-        if start_time < PageViewApiValidDateRange.PAGEVIEW_API_START_DATE:
-            raise InputException(
-                f"Data before {PageViewApiValidDateRange.PAGEVIEW_API_START_DATE} is not available"
-            )
-
-        if request.access == AccessMethod.MOBILE:
-            raise InputException(
-                "get_per_article_pageviews API doesn't support MOBILE access method"
-            )
-
-        if request.granularity == Granularity.HOURLY:
-            raise InputException(
-                "get_per_article_pageviews API doesn't support hourly granularity"
-            )
-
-        params = {
-            "project": self._project,
-            "access": translate_access_method_to_str(request.access, is_legacy=False),
-            "agent": translate_agent_type_to_str(request.agent),
-            "article": request.article,
-            "granularity": translate_granularity_to_str(request.granularity),
-            "start": start_time.strftime("%Y%m%d%H"),
-            "end": end_time.strftime("%Y%m%d%H"),
-        }
-
-        pageview_data = rest_api_call(
-            PageViewApiEndPoints.PER_ARTICLE_PAGEVIEWS, self._api_header, params
+        pageview_data = self._call_per_article_api(
+            request.access,
+            request.agent,
+            request.article,
+            request.granularity,
+            start_time,
+            end_time,
         )
         return pd.DataFrame.from_dict(pageview_data["items"])
 
-    def get_top_pageviews(self, request: TopViewedArticleRequest) -> pd.DataFrame:
+    @_with_deadline
+    def get_per_article_pageviews_matrix(
+        self,
+        request: ArticleMatrixRequest,
+        dtype=np.int64,
+        fill_nan: bool = False,
+        sparse: bool = False,
+        max_workers: int = 4,
+    ) -> PageViewMatrix:
         """
-        Lists the 1000 most viewed articles timespan (month or day), support
-        filter by access method
+        Given a list of articles and a date range, returns the page view
+        counts as an article x time matrix instead of a long data frame. The
+        matrix is filled directly from the decoded API response without
+        building intermediate data frames, articles are fetched concurrently.
+        Titles normalizing to the same article are fetched once and rows
+        keep the titles given by the caller. Days or months omitted by the
+        API are filled with zero, or with NaN if fill_nan is set
 
         Args:
-            request (TopViewedArticleRequest): Request data for get top viewed
-            article
+            request (ArticleMatrixRequest): Request data for get page view of
+            a list of articles
+            dtype: numpy dtype of the matrix values, default to int64
+            fill_nan (bool): fill missing values with NaN instead of zero,
+            dtype has to be a float type
+            sparse (bool): return a scipy.sparse CSR matrix instead of a dense
+            numpy array, requires scipy to be installed
+            max_workers (int): number of concurrent API calls
 
         Raises:
             InputException: User input error if start time or end time is
-            invalid or out of supported range
+            invalid, MOBILE access method or HOURLY granularity is specified,
+            or fill_nan is used with an integer dtype or sparse output
+
+        Returns:
+            PageViewMatrix: values of shape (number of articles, number of
+            days or months), with article index and datetime index
+        """
+        start_time, end_time = self._validate_per_article_request(
+            request.access, request.granularity, request.start_time, request.end_time
+        )
+        dtype = np.dtype(dtype)
+        if fill_nan and dtype.kind != "f":
+            raise InputException(f"fill_nan requires a float dtype, got {dtype}")
+        if fill_nan and sparse:
+            raise InputException("fill_nan is not supported for sparse output")
+
+        articles = list(request.articles)
+        index = build_time_index(start_time, end_time, request.granularity)
+        origin = index[0].to_pydatetime() if len(index) > 0 else start_time
+
+        batch = normalize_titles(articles, not is_case_sensitive(self._project))
+        encoded_of = batch.encoded_of()
+        # rows of each distinct encoded title
+        rows_of = {}
+        for row_index, article in enumerate(articles):
+            rows_of.setdefault(encoded_of[article], []).append(row_index)
+
+        missing = set()
+
+        def fetch_items(encoded: str) -> list:
+            article = batch.originals[encoded][0]
+            try:
+                pageview_data = self._call_per_article_api(
+                    request.access,
+                    request.agent,
+                    article,
+                    request.granularity,
+                    start_time,
+                    end_time,
+                )
+            except NotFoundException:
+                # a missing article is a row without data
+                return []
+            except DeadlineExceededException:
+                missing.add(encoded)
+                return []
+            return pageview_data.get("items", [])
+
+        responses = zip(
+            batch.encoded,
+            bounded_map(fetch_items, batch.encoded, max_workers=max_workers),
+        )
+
+        if sparse:
+            from scipy.sparse import csr_matrix
+
+            rows, columns, data = [], [], []
+            for encoded, items in responses:
+                for row_index in rows_of[encoded]:
+                    row_rows, row_columns, row_data = collect_sparse_row(
+                        row_index, items, origin, request.granularity, len(index)
+                    )
+                    rows.extend(row_rows)
+                    columns.extend(row_columns)
+                    data.extend(row_data)
+            values = csr_matrix(
+                (np.asarray(data, dtype=dtype), (rows, columns)),
+                shape=(len(articles), len(index)),
+            )
+        else:
+            values = np.full(
+                (len(articles), len(index)), np.nan if fill_nan else 0, dtype=dtype
+            )
+            for encoded, items in responses:
+                for row_index in rows_of[encoded]:
+                    fill_dense_row(
+                        values[row_index], items, origin, request.granularity
+                    )
+
+        missing_articles = [a for a in articles if encoded_of[a] in missing]
+        return PageViewMatrix(values, articles, index, missing=missing_articles)
+
+    @_with_deadline
+    def get_top_pageviews(self, request: TopViewedArticleRequest) -> pd.DataFrame:
+        """
+        Lists the 1000 most viewed articles timespan (month or day), support
+        filter by access method
+
+        Args:
+            request (TopViewedArticleRequest): Request data for get top viewed
+            article
+
+        Raises:
+            InputException: User input error if start time or end time is
+            invalid or out of supported range
 
         Returns:
             pd.DataFrame: columns:
@@ -348,69 +1022,239 @@ class WikipediaPageViewApiClient:
                 "views": int
                 "rank":int,
         """
-        if request.access == AccessMethod.MOBILE:
-            raise InputException("Current API doesn't support MOBILE access")
+        params = self._top_pageviews_params(request)
+        pageview_data = self._rest_api_call(PageViewApiEndPoints.TOP_PAGEVIEWS, params)
 
-        year = request.year
-        month = request.month
-        day = request.day
+        articles_df = pd.DataFrame.from_dict(pageview_data["items"][0]["articles"])
+        # add the common parameters into the data frame columns
+        for key, value in params.items():
+            articles_df[key] = value
+        return articles_df
 
-        if year <= 0:
-            raise InputException(f"Year value {year} should not smaller or equal to 0")
+    @_with_deadline
+    def get_top_pageviews_records(
+        self, request: TopViewedArticleRequest
+    ) -> TopArticleRecords:
+        """
+        Same as get_top_pageviews without pandas: the articles are returned
+        as compact columns, see api_records, and pandas is not imported
 
-        if month <= 0:
-            raise InputException(
-                f"Month value {month} should not smaller or equal to 0"
-            )
+        Args:
+            request (TopViewedArticleRequest): Request data for get top viewed
+            article
 
-        if month > 12:
-            raise InputException(f"Month value {month} should not larger than 12")
+        Raises:
+            InputException: Same validation as get_top_pageviews
 
-        is_all_days = False
-        try:
-            day = int(day)
-        except ValueError:
-            if day != "all-days":
-                raise InputException(f"Day value {day} only accept 1-31 or all-days")
-            is_all_days = True
+        Returns:
+            TopArticleRecords: article, views and rank of each article, and
+            the project, access, year, month and day of the request,
+            to_pandas returns the data frame of get_top_pageviews
+        """
+        params = self._top_pageviews_params(request)
+        pageview_data = self._rest_api_call(PageViewApiEndPoints.TOP_PAGEVIEWS, params)
+        return TopArticleRecords.from_items(
+            params, pageview_data["items"][0]["articles"]
+        )
 
-        if is_all_days is not True:
-            try:
-                date_time = datetime(year, month, day)
-                year = date_time.strftime("%Y")
-                month = date_time.strftime("%m")
-                day = date_time.strftime("%d")
-            except ValueError:
-                raise InputException(f"Invalid date provide:{year}-{month}-{day}")
-        else:
-            date_time = datetime(year, month, 1)
-            year = date_time.strftime("%Y")
-            month = date_time.strftime("%m")
+    @_with_deadline
+    def get_top_pageviews_range(
+        self,
+        access: AccessMethod,
+        start_time: str,
+        end_time: str,
+        top_n: int = 1000,
+        sketch_capacity: Optional[int] = None,
+        max_workers: int = 4,
+    ) -> pd.DataFrame:
+        """
+        Rank the top viewed articles of the project over a date range by
+        summing the views of the top lists of its whole months (all-days)
+        and of its remaining days at both ends. Periods are fetched
+        concurrently and aggregated while they arrive, see
+        get_top_view_per_country_range for the exact and approximate modes.
+        Each period only reports its 1000 top articles, so the total of an
+        article missing from some of them is a lower bound
 
-        # Validate start time
+        Args:
+            access (AccessMethod): Access Method to filter page view data
+            start_time (str): first month (YYYYMM) or day (YYYYMMDD)
+            end_time (str): last month (YYYYMM) or day (YYYYMMDD)
+            top_n (int): number of ranked articles
+            sketch_capacity (Optional[int]): counters of the approximate
+            mode, at least top_n, exact mode if None
+            max_workers (int): number of concurrent API calls
+
+        Raises:
+            InputException: User input error if a date is invalid or out of
+            supported range, or MOBILE access method is specified
+
+        Returns:
+            pd.DataFrame: columns:
+                "project": str,
+                "article": str,
+                "views": int,
+                "error": int, maximum overestimation of views, 0 in exact
+                mode
+                "rank": int
+            if the deadline expires, df.attrs["missing"] lists the periods
+            without result, as YYYYMM for months and YYYYMMDD for days
+        """
+        if access == AccessMethod.MOBILE:
+            raise InputException("Current API doesn't support MOBILE access")
+        start, end = parse_start_end_month_or_day(start_time, end_time)
         api_start_time = PageViewApiValidDateRange.PAGEVIEW_API_START_DATE
-        if date_time < api_start_time:
+        if start < api_start_time:
             raise InputException(
                 f"Data before {api_start_time.strftime('%Y%m%d')} is not available"
             )
+        months, days = split_time_range_by_month(start, end)
+        # (label, request) of each whole month then each remaining day
+        periods = [
+            (
+                month.strftime("%Y%m"),
+                TopViewedArticleRequest(access, month.year, month.month, "all-days"),
+            )
+            for month in months
+        ] + [
+            (
+                day.strftime("%Y%m%d"),
+                TopViewedArticleRequest(access, day.year, day.month, day.day),
+            )
+            for day in days
+        ]
+
+        missing = []
+
+        def frames() -> Iterator[pd.DataFrame]:
+            results = bounded_map(
+                lambda period: self._until_deadline(
+                    partial(self.get_top_pageviews, period[1])
+                ),
+                periods,
+                max_workers=max_workers,
+            )
+            for (label, _), df in zip(periods, results):
+                if df is None:
+                    missing.append(label)
+                else:
+                    yield df
+
+        df = rank_frames(
+            frames(), top_n, value_column="views", capacity=sketch_capacity
+        )
+        if missing:
+            df.attrs["missing"] = missing
+        return df
 
-        params = {
-            "project": self._project,
-            "access": translate_access_method_to_str(request.access, is_legacy=False),
-            "year": str(year),
-            "month": str(month),
-            "day": str(day),
-        }
-        pageview_data = rest_api_call(
-            PageViewApiEndPoints.TOP_PAGEVIEWS, self._api_header, params
+    @_with_deadline
+    def get_top_pageviews_history(
+        self,
+        top_requests: Sequence[TopRequest],
+        start_time: str,
+        end_time: str,
+        access: AccessMethod = AccessMethod.ALL,
+        agent: AgentType = AgentType.ALL,
+        granularity: Granularity = Granularity.DAILY,
+        max_workers: int = 8,
+    ) -> TopHistory:
+        """
+        Fetch top lists and the page view history of their articles. The
+        history fetches of a top list start as soon as it is decoded and
+        run concurrently with the remaining top lists, each distinct
+        (project, article) is fetched once, with a client of its project for
+        the cross-project top lists of get_top_view_per_country
+
+        Args:
+            top_requests (Sequence[TopRequest]): TopViewedArticleRequest or
+            TopViewedPerCountryRequest of each top list
+            start_time (str): first day of the history, YYYYMMDD
+            end_time (str): last day of the history, YYYYMMDD
+            access (AccessMethod): Access Method of the history
+            agent (AgentType): Agent Type of the history
+            granularity (Granularity): DAILY or MONTHLY history
+            max_workers (int): number of concurrent history calls
+
+        Raises:
+            InputException: User input error if a request is not a top list
+            request or is invalid, or the history range is invalid
+
+        Returns:
+            TopHistory: top list rows with the history row of each article,
+            and the history matrix, missing lists the articles whose history
+            was not fetched before the deadline expired
+        """
+        for request in top_requests:
+            if not isinstance(
+                request, (TopViewedArticleRequest, TopViewedPerCountryRequest)
+            ):
+                raise InputException(f"Unsupported top list request {request!r}")
+        start, end = self._validate_per_article_request(
+            access, granularity, start_time, end_time
+        )
+        index = build_time_index(start, end, granularity)
+        origin = index[0].to_pydatetime() if len(index) > 0 else start
+
+        rows = TopArticleRows()
+        tops = []
+        missing_tops = []
+        clients = {self._project: self}
+
+        def fetch_top(request: TopRequest) -> Optional[pd.DataFrame]:
+            if isinstance(request, TopViewedPerCountryRequest):
+                return self._until_deadline(
+                    partial(self.get_top_view_per_country, request)
+                )
+            return self._until_deadline(partial(self.get_top_pageviews, request))
+
+        def new_articles() -> Iterator[Tuple["WikipediaPageViewApiClient", str]]:
+            # top lists are fetched one call ahead of the history calls
+            results = bounded_map(fetch_top, top_requests, max_workers=2)
+            for request, df in zip(top_requests, results):
+                if df is None:
+                    missing_tops.append(request)
+                    continue
+                if df.empty:
+                    continue
+                df = df.copy()
+                df["row"], created = rows.assign(df["project"], df["article"])
+                tops.append(df)
+                for row in created:
+                    project = rows.projects[row]
+                    if project not in clients:
+                        clients[project] = self.with_project(project)
+                    yield clients[project], rows.articles[row]
+
+        def fetch_history(
+            target: Tuple["WikipediaPageViewApiClient", str]
+        ) -> Optional[list]:
+            client, article = target
+            try:
+                pageview_data = client._call_per_article_api(
+                    access, agent, article, granularity, start, end
+                )
+            except NotFoundException:
+                return []
+            except DeadlineExceededException:
+                return None
+            return pageview_data.get("items", [])
+
+        histories = list(
+            bounded_map(fetch_history, new_articles(), max_workers=max_workers)
         )
+        values = np.zeros((len(histories), len(index)), dtype=np.int64)
+        missing = []
+        for row, items in enumerate(histories):
+            if items is None:
+                missing.append(rows.articles[row])
+            else:
+                fill_dense_row(values[row], items, origin, granularity)
 
-        articles_df = pd.DataFrame.from_dict(pageview_data["items"][0]["articles"])
-        # add the common parameters into the data frame columns
-        for key, value in params.items():
-            articles_df[key] = value
-        return articles_df
+        ranks = pd.concat(tops, ignore_index=True) if tops else pd.DataFrame()
+        history = PageViewMatrix(values, rows.articles, index, missing=missing)
+        return TopHistory(ranks, history, rows.projects, missing_tops)
 
+    @_with_deadline
     def get_top_viewed_country(self, request: TopViewedCountryRequest) -> pd.DataFrame:
         """
         Lists the pageviews to this project, split by country of origin for a
@@ -473,8 +1317,8 @@ class WikipediaPageViewApiClient:
             "year": str(year),
             "month": str(month),
         }
-        pageview_data = rest_api_call(
-            PageViewApiEndPoints.TOP_VIEW_BY_COUNTRY, self._api_header, params
+        pageview_data = self._rest_api_call(
+            PageViewApiEndPoints.TOP_VIEW_BY_COUNTRY, params
         )
 
         df = pd.DataFrame.from_dict(pageview_data["items"][0]["countries"])
@@ -483,6 +1327,71 @@ class WikipediaPageViewApiClient:
             df[key] = value
         return df
 
+    def _top_view_per_country_dates(
+        self, request: TopViewedPerCountryRequest
+    ) -> Tuple[List[datetime], bool]:
+        if request.access == AccessMethod.MOBILE:
+            raise InputException("Current API doesn't support MOBILE access")
+
+        year = request.year
+        month = request.month
+        day = request.day
+
+        if year <= 0:
+            raise InputException(f"Year value {year} should not smaller or equal to 0")
+
+        if month <= 0:
+            raise InputException(
+                f"Month value {month} should not smaller or equal to 0"
+            )
+
+        if month > 12:
+            raise InputException(f"Month value {month} should not larger than 12")
+
+        is_all_days = False
+        try:
+            day = int(day)
+        except ValueError:
+            if day != "all-days":
+                raise InputException(f"Day value {day} only accept 1-31 or all-days")
+            is_all_days = True
+
+        api_start_time = PageViewApiValidDateRange.TOP_PER_COUNTRY_PAGEVIEW_API_START_DATE
+        if is_all_days is not True:
+            try:
+                date_time = datetime(year, month, day)
+            except ValueError:
+                raise InputException(f"Invalid date provide:{year}-{month}-{day}")
+        else:
+            date_time = datetime(year, month, 1)
+
+        # Validate start time
+        if date_time < api_start_time:
+            raise InputException(
+                f"Data before {api_start_time.strftime('%Y%m%d')} is not available"
+            )
+
+        if is_all_days is not True:
+            return [date_time], is_all_days
+
+        dates = []
+        current_date = date_time
+        while current_date.month == month:
+            dates.append(current_date)
+            current_date = current_date + timedelta(days=1)
+        return dates, is_all_days
+
+    def _call_top_view_per_country_date(
+        self, country: str, access: AccessMethod, date_time: datetime
+    ) -> pd.DataFrame:
+        return self._call_top_view_per_country_api(
+            country,
+            access,
+            date_time.strftime("%Y"),
+            date_time.strftime("%m"),
+            date_time.strftime("%d"),
+        )
+
     def _call_top_view_per_country_api(
         self, country: str, access: AccessMethod, year: str, month: str, day: str
     ):
@@ -493,16 +1402,34 @@ class WikipediaPageViewApiClient:
             "month": str(month),
             "day": str(day),
         }
-        pageview_data = rest_api_call(
-            PageViewApiEndPoints.TOP_VIEW_PER_COUNTRY, self._api_header, params
-        )
+        missing_key = country_day_key(country, params["access"], year, month, day)
+        if self._negative_cache is not None and missing_key in self._negative_cache:
+            return self._empty_top_view_per_country_df(params)
+
+        try:
+            pageview_data = self._rest_api_call(
+                PageViewApiEndPoints.TOP_VIEW_PER_COUNTRY, params
+            )
+        except NotFoundException:
+            # countries withheld for privacy reasons have no data
+            self._remember_missing_day(missing_key, year, month, day)
+            return self._empty_top_view_per_country_df(params)
 
-        df = pd.DataFrame.from_dict(pageview_data["items"][0]["articles"])
+        articles = pageview_data["items"][0]["articles"]
+        if not articles:
+            self._remember_missing_day(missing_key, year, month, day)
+            return self._empty_top_view_per_country_df(params)
+
+        df = pd.DataFrame.from_dict(articles)
         # add the common parameters into the data frame columns
         for key, value in params.items():
             df[key] = value
         return df
 
+    def _empty_top_view_per_country_df(self, params: dict) -> pd.DataFrame:
+        columns = ["article", "project", "views_ceil", "rank"] + list(params)
+        return pd.DataFrame(columns=columns)
+
     def _call_legacy_api(
         self,
         access: AccessMethod,
@@ -510,16 +1437,10 @@ class WikipediaPageViewApiClient:
         start_time: datetime,
         end_time: datetime,
     ) -> pd.DataFrame:
-        params = {
-            "project": self._project,
-            "access-site": translate_access_method_to_str(access, is_legacy=True),
-            "granularity": translate_granularity_to_str(granularity),
-            "start": start_time.strftime("%Y%m%d%H"),
-            "end": end_time.strftime("%Y%m%d%H"),
-        }
+        params = self._legacy_api_params(access, granularity, start_time, end_time)
 
-        legacy_data = rest_api_call(
-            PageViewApiEndPoints.AGGRGATED_PAGEVIEWS_LEGACY, self._api_header, params
+        legacy_data = self._rest_api_call(
+            PageViewApiEndPoints.AGGRGATED_PAGEVIEWS_LEGACY, params
         )
         legacy_df = pd.DataFrame.from_dict(legacy_data["items"])
         self._align_legacy_df_to_pageview_df(legacy_df)
@@ -533,19 +1454,321 @@ class WikipediaPageViewApiClient:
         start_time: datetime,
         end_time: datetime,
     ) -> pd.DataFrame:
-        params = {
+        params = self._page_view_api_params(
+            access, agent, granularity, start_time, end_time
+        )
+
+        pageview_data = self._rest_api_call(
+            PageViewApiEndPoints.AGGRGATED_PAGEVIEWS, params
+        )
+        return pd.DataFrame.from_dict(pageview_data["items"])
+
+    def _validate_per_article_request(
+        self,
+        access: AccessMethod,
+        granularity: Granularity,
+        start_time_str: str,
+        end_time_str: str,
+    ) -> Tuple[datetime, datetime]:
+        start_time, end_time = parse_start_end_time(
+            start_time_str, end_time_str, support_hour=True
+        )
+
+        # Validate start time
+        if start_time < PageViewApiValidDateRange.PAGEVIEW_API_START_DATE:
+            raise InputException(
+                f"Data before {PageViewApiValidDateRange.PAGEVIEW_API_START_DATE} is not available"
+            )
+
+        if access == AccessMethod.MOBILE:
+            raise InputException(
+                "get_per_article_pageviews API doesn't support MOBILE access method"
+            )
+
+        if granularity == Granularity.HOURLY:
+            raise InputException(
+                "get_per_article_pageviews API doesn't support hourly granularity"
+            )
+        return start_time, end_time
+
+    def _per_article_params(
+        self,
+        access: AccessMethod,
+        agent: AgentType,
+        article: str,
+        granularity: Granularity,
+        start_time: datetime,
+        end_time: datetime,
+    ) -> dict:
+        return {
             "project": self._project,
             "access": translate_access_method_to_str(access, is_legacy=False),
             "agent": translate_agent_type_to_str(agent),
+            "article": encode_title(article, not is_case_sensitive(self._project)),
             "granularity": translate_granularity_to_str(granularity),
             "start": start_time.strftime("%Y%m%d%H"),
             "end": end_time.strftime("%Y%m%d%H"),
         }
 
-        pageview_data = rest_api_call(
-            PageViewApiEndPoints.AGGRGATED_PAGEVIEWS, self._api_header, params
+    def _remember_missing_day(self, key: str, year: str, month: str, day: str) -> None:
+        # days not published yet have no data either, only the days older
+        # than the publication lag are known to be missing
+        if self._negative_cache is None:
+            return
+        age = datetime.now() - datetime(int(year), int(month), int(day))
+        if age > PageViewApiValidDateRange.PUBLICATION_LAG:
+            self._negative_cache.add(key)
+
+    def _call_per_article_api(
+        self,
+        access: AccessMethod,
+        agent: AgentType,
+        article: str,
+        granularity: Granularity,
+        start_time: datetime,
+        end_time: datetime,
+    ) -> dict:
+        params = self._per_article_params(
+            access, agent, article, granularity, start_time, end_time
         )
-        return pd.DataFrame.from_dict(pageview_data["items"])
+
+        key = article_key(**params)
+        if self._negative_cache is not None and key in self._negative_cache:
+            raise NotFoundException(
+                f"Article {article} is known to be missing from {self._project}",
+                404,
+            )
+        try:
+            return self._rest_api_call(
+                PageViewApiEndPoints.PER_ARTICLE_PAGEVIEWS, params
+            )
+        except NotFoundException:
+            if self._negative_cache is not None:
+                self._negative_cache.add(key)
+            raise
+
+    def _top_pageviews_params(self, request: TopViewedArticleRequest) -> dict:
+        if request.access == AccessMethod.MOBILE:
+            raise InputException("Current API doesn't support MOBILE access")
+
+        year = request.year
+        month = request.month
+        day = request.day
+
+        if year <= 0:
+            raise InputException(f"Year value {year} should not smaller or equal to 0")
+
+        if month <= 0:
+            raise InputException(
+                f"Month value {month} should not smaller or equal to 0"
+            )
+
+        if month > 12:
+            raise InputException(f"Month value {month} should not larger than 12")
+
+        is_all_days = False
+        try:
+            day = int(day)
+        except ValueError:
+            if day != "all-days":
+                raise InputException(f"Day value {day} only accept 1-31 or all-days")
+            is_all_days = True
+
+        if is_all_days is not True:
+            try:
+                date_time = datetime(year, month, day)
+                year = date_time.strftime("%Y")
+                month = date_time.strftime("%m")
+                day = date_time.strftime("%d")
+            except ValueError:
+                raise InputException(f"Invalid date provide:{year}-{month}-{day}")
+        else:
+            date_time = datetime(year, month, 1)
+            year = date_time.strftime("%Y")
+            month = date_time.strftime("%m")
+
+        # Validate start time
+        api_start_time = PageViewApiValidDateRange.PAGEVIEW_API_START_DATE
+        if date_time < api_start_time:
+            raise InputException(
+                f"Data before {api_start_time.strftime('%Y%m%d')} is not available"
+            )
+
+        return {
+            "project": self._project,
+            "access": translate_access_method_to_str(request.access, is_legacy=False),
+            "year": str(year),
+            "month": str(month),
+            "day": str(day),
+        }
+
+    def _split_aggregated_request(
+        self, request: AggregatePageViewRequest
+    ) -> Tuple[
+        Optional[datetime], Optional[datetime], Optional[datetime], Optional[datetime]
+    ]:
+        start_time, end_time = parse_start_end_time(
+            request.start_time, request.end_time, support_hour=True
+        )
+
+        # Validate start time
+        if start_time < PageViewApiValidDateRange.LEGACY_API_START_DATE:
+            raise InputException(f"Data before {request.start_time} is not available")
+
+        return split_time_range_for_legacy_api(start_time, end_time)
+
+    def _legacy_api_params(
+        self,
+        access: AccessMethod,
+        granularity: Granularity,
+        start_time: datetime,
+        end_time: datetime,
+    ) -> dict:
+        return {
+            "project": self._project,
+            "access-site": translate_access_method_to_str(access, is_legacy=True),
+            "granularity": translate_granularity_to_str(granularity),
+            "start": start_time.strftime("%Y%m%d%H"),
+            "end": end_time.strftime("%Y%m%d%H"),
+        }
+
+    def _page_view_api_params(
+        self,
+        access: AccessMethod,
+        agent: AgentType,
+        granularity: Granularity,
+        start_time: datetime,
+        end_time: datetime,
+    ) -> dict:
+        return {
+            "project": self._project,
+            "access": translate_access_method_to_str(access, is_legacy=False),
+            "agent": translate_agent_type_to_str(agent),
+            "granularity": translate_granularity_to_str(granularity),
+            "start": start_time.strftime("%Y%m%d%H"),
+            "end": end_time.strftime("%Y%m%d%H"),
+        }
+
+    def _rest_api_call(self, endpoint: str, params: dict) -> dict:
+        endpoint = rebase_endpoint(endpoint, self._base_url)
+        if self._cache is None:
+            return self._call_api(endpoint, params)
+
+        url = endpoint.format(**params)
+        data = self._cache.get(url)
+        if data is not None:
+            return data
+        if not self._cache.revalidate:
+            data = self._call_api(endpoint, params)
+            # error responses don't have items and are not cached
+            if "items" in data:
+                self._cache.put(url, data)
+            return data
+
+        stale = self._cache.get_stale(url)
+        response = self._conditional_call_api(
+            endpoint, params, stale[1] if stale else None
+        )
+        if response.data is None and stale is not None:
+            # 304 Not Modified, the expired entry is still valid
+            self._cache.refresh(url, response.validators)
+            return stale[0]
+        if "items" in response.data:
+            self._cache.put(url, response.data, response.validators)
+        return response.data
+
+    @staticmethod
+    def _until_deadline(call: Callable[[], T]) -> Optional[T]:
+        # result of call, None if the deadline expired before it completed
+        try:
+            return call()
+        except DeadlineExceededException:
+            return None
+
+    @contextmanager
+    def _call_scope(self, endpoint: str) -> Iterator[Optional[Slot]]:
+        # circuit breaker, priority slot and timeout of one API call, yields
+        # the scheduler slot, None without scheduler
+        left = time_left()
+        capped = left is not None and left < self._timeout
+        breaker = nullcontext()
+        if self._breakers is not None:
+            breaker = self._breakers.breaker(endpoint).guard()
+        slot = nullcontext() if self._scheduler is None else self._scheduler.slot()
+        with breaker, request_timeout(self._timeout), slot as granted:
+            try:
+                yield granted
+            except Exception as e:
+                if capped and is_timeout_error(e):
+                    # the timeout was the time left before the deadline
+                    raise DeadlineExceededException(
+                        f"Deadline expired during the API call: {e}"
+                    ) from e
+                raise
+
+    def _call_api(self, endpoint: str, params: dict) -> dict:
+        if self._transport is None:
+            with self._call_scope(endpoint):
+                return rest_api_call(endpoint, self._api_header, params)
+        return self._conditional_call_api(endpoint, params).data
+
+    def _conditional_call_api(
+        self, endpoint: str, params: dict, validators: Optional[dict] = None
+    ) -> ApiResponse:
+        with self._call_scope(endpoint):
+            if self._transport is None:
+                return conditional_api_call(
+                    endpoint, self._api_header, params, validators
+                )
+            return transport_api_call(
+                self._transport, endpoint, self._api_header, params, validators
+            )
+
+    def _stream_batches(self, calls: list, batch_size: int) -> Iterator[pd.DataFrame]:
+        for endpoint, params, is_legacy in calls:
+            endpoint = rebase_endpoint(endpoint, self._base_url)
+            records = self._stream_records(endpoint, params, batch_size)
+            try:
+                with self._call_scope(endpoint) as slot:
+                    while True:
+                        batch = next(records, None)
+                        if batch is None:
+                            break
+                        df = pd.DataFrame.from_records(batch)
+                        if is_legacy:
+                            self._align_legacy_df_to_pageview_df(df)
+                        # the slot is held while the next batch is downloaded
+                        # and decoded, not while the consumer processes it
+                        if slot is not None:
+                            slot.pause()
+                        yield df
+                        if slot is not None:
+                            slot.resume()
+            finally:
+                records.close()
+
+    def _stream_records(
+        self, endpoint: str, params: dict, batch_size: int
+    ) -> Iterator[List[dict]]:
+        if self._transport is None:
+            items = stream_api_call(endpoint, self._api_header, params)
+            yield from iter_record_batches(items, batch_size)
+            return
+        with self._transport.stream(
+            endpoint.format(**params), self._api_header, chunk_size=65536
+        ) as response:
+            yield from iter_record_batches(iter_json_array_items(response), batch_size)
+
+    @staticmethod
+    def _sum_mobile_pageviews(df: pd.DataFrame) -> pd.DataFrame:
+        # one row per timestamp with the views of mobile-app and mobile-web
+        if df.empty:
+            return pd.DataFrame()
+        split_df = df[df["access"].isin(["mobile-app", "mobile-web"])]
+        keys = ["project", "agent", "granularity", "timestamp"]
+        mobile_df = split_df.groupby(keys, sort=False, as_index=False)["views"].sum()
+        mobile_df["access"] = "mobile"
+        return mobile_df[[column for column in df.columns if column in mobile_df]]
 
     def _align_legacy_df_to_pageview_df(self, legacy_df: pd.DataFrame) -> None:
         # rename the column to make it consistent with page view API
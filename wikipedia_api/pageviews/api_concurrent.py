@@ -0,0 +1,159 @@
+"""
+Concurrency helpers shared by the Wikipedia Page View API client
+
+Classes:
+    TokenBucket
+
+Functions:
+    bounded_map
+"""
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import contextvars
+import threading
+import time
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def bounded_map(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = 4,
+    max_pending: Optional[int] = None,
+    ordered: bool = True,
+) -> Iterator[R]:
+    """
+    Apply func to every item on a thread pool and yield the results while
+    they become available. At most max_pending items are running or waiting
+    to be consumed at any time, a new item is only submitted after the
+    consumer takes a result, so a slow consumer limits the fetching. func
+    runs in a copy of the context variables of the consumer, eg the request
+    priority of api_scheduler
+
+    Args:
+        func (Callable): function applied to each item
+        items (Iterable): items to process, consumed lazily
+        max_workers (int): number of worker threads
+        max_pending (Optional[int]): maximum number of submitted but not yet
+        consumed items, default to max_workers
+        ordered (bool): yield results in input order if True, in completion
+        order otherwise
+
+    Returns:
+        Iterator: results of func, exceptions raised by func are re-raised
+        when the corresponding result is consumed
+    """
+    if max_workers <= 0:
+        raise ValueError(f"max_workers {max_workers} should be larger than 0")
+    if max_pending is None:
+        max_pending = max_workers
+    max_pending = max(max_pending, 1)
+
+    items = iter(items)
+    pending = deque()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit_next() -> bool:
+        try:
+            item = next(items)
+        except StopIteration:
+            return False
+        context = contextvars.copy_context()
+        pending.append(executor.submit(context.run, func, item))
+        return True
+
+    try:
+        while len(pending) < max_pending and submit_next():
+            pass
+        while pending:
+            if ordered:
+                future = pending.popleft()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = next(f for f in pending if f in done)
+                pending.remove(future)
+            result = future.result()
+            submit_next()
+            yield result
+    finally:
+        # consumer stopped early or an error was raised, drop queued work
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket rate limiter: tokens are added at rate per
+    second up to burst, each call takes one token
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        Init TokenBucket
+
+        Args:
+            rate (float): tokens added per second
+            burst (Optional[float]): maximum number of tokens, default to
+            rate or 1 if rate is smaller
+            clock (Callable[[], float]): monotonic time source in seconds
+            sleep (Callable[[float], None]): function waiting for seconds
+        """
+        if rate <= 0:
+            raise ValueError(f"rate {rate} should be larger than 0")
+        self._rate = rate
+        self._burst = burst if burst is not None else max(rate, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self._burst
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def try_acquire(self) -> bool:
+        """
+        Take a token if one is available, without waiting
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self) -> float:
+        """
+        Take a token, waiting until one is available
+
+        Returns:
+            float: seconds waited
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self._rate
+            self._sleep(delay)
+            waited += delay
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self._burst, self._tokens + (now - self._updated_at) * self._rate
+        )
+        self._updated_at = now
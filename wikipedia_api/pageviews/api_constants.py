@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
 class PageViewApiEndPoints:
@@ -6,6 +6,10 @@ class PageViewApiEndPoints:
     Wikipedia Page view RESTful API Endpoint templates
     """
 
+    # Scheme and host of the endpoints, replaced by the base URL of a client
+    # pointing at a proxy
+    BASE_URL = "https://wikimedia.org"
+
     AGGRGATED_PAGEVIEWS_LEGACY = "https://wikimedia.org/api/rest_v1/metrics/legacy/pagecounts/aggregate/{project}/{access-site}/{granularity}/{start}/{end}"
     AGGRGATED_PAGEVIEWS = "https://wikimedia.org/api/rest_v1/metrics/pageviews/aggregate/{project}/{access}/{agent}/{granularity}/{start}/{end}"
     PER_ARTICLE_PAGEVIEWS = "https://wikimedia.org/api/rest_v1/metrics/pageviews/per-article/{project}/{access}/{agent}/{article}/{granularity}/{start}/{end}"
@@ -23,3 +27,6 @@ class PageViewApiValidDateRange:
     TOP_BY_COUNTRY_PAGEVIEW_API_START_DATE: datetime = datetime(2015, 5, 1)
     # Date that top artical per country page view API have data
     TOP_PER_COUNTRY_PAGEVIEW_API_START_DATE: datetime = datetime(2021, 1, 1)
+    # Delay after which the data of a day is published, more recent days
+    # are answered with 404 until then
+    PUBLICATION_LAG: timedelta = timedelta(days=2)
@@ -0,0 +1,106 @@
+"""
+Per-call timeouts and overall deadlines of API calls
+
+Every API call is sent with a timeout: the per-call timeout set by
+request_timeout, DEFAULT_TIMEOUT otherwise, capped by the time left before
+the deadline set by request_deadline. Both are context variables, so they
+follow the work submitted through bounded_map, and nested deadlines keep the
+earliest one. A call started after the deadline raises
+DeadlineExceededException.
+
+Functions:
+    request_deadline
+    request_timeout
+    time_left
+    remaining_timeout
+    is_timeout_error
+"""
+from contextlib import contextmanager
+import contextvars
+import time
+from typing import Iterator, Optional
+
+import requests
+import urllib3
+
+from wikipedia_api.pageviews.api_exceptions import DeadlineExceededException
+
+# Seconds an API call may take when no per-call timeout is set
+DEFAULT_TIMEOUT = 30.0
+
+_DEADLINE: contextvars.ContextVar = contextvars.ContextVar(
+    "pageview_deadline", default=None
+)
+_TIMEOUT: contextvars.ContextVar = contextvars.ContextVar(
+    "pageview_call_timeout", default=DEFAULT_TIMEOUT
+)
+
+
+@contextmanager
+def request_deadline(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Make the API calls of the block complete within seconds from now, no
+    deadline if None. An enclosing earlier deadline is kept
+    """
+    if seconds is None:
+        yield
+        return
+    expires_at = time.monotonic() + seconds
+    current = _DEADLINE.get()
+    if current is not None:
+        expires_at = min(expires_at, current)
+    token = _DEADLINE.set(expires_at)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+@contextmanager
+def request_timeout(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Set the timeout of each API call of the block, DEFAULT_TIMEOUT if None
+    """
+    token = _TIMEOUT.set(DEFAULT_TIMEOUT if seconds is None else seconds)
+    try:
+        yield
+    finally:
+        _TIMEOUT.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """
+    Seconds left before the current deadline, None without deadline
+    """
+    expires_at = _DEADLINE.get()
+    if expires_at is None:
+        return None
+    return expires_at - time.monotonic()
+
+
+def remaining_timeout() -> float:
+    """
+    Timeout of an API call started now
+
+    Raises:
+        DeadlineExceededException: if the deadline has expired
+
+    Returns:
+        float: per-call timeout capped by the time left before the deadline
+    """
+    timeout = _TIMEOUT.get()
+    left = time_left()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceededException("Deadline expired before the API call")
+    return min(timeout, left)
+
+
+def is_timeout_error(error: BaseException) -> bool:
+    """
+    Whether error is a timeout raised by requests or urllib3
+    """
+    return isinstance(
+        error, (requests.exceptions.Timeout, urllib3.exceptions.TimeoutError)
+    )
@@ -1,6 +1,49 @@
+from typing import Optional
+
+
 class InputException(Exception):
     """
     Exception thrown when user's input is not correct
     """
 
     pass
+
+
+class ApiException(Exception):
+    """
+    Exception thrown when the page view API returns an error response
+    """
+
+    def __init__(
+        self, message: str, status_code: Optional[int] = None, url: Optional[str] = None
+    ) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.url = url
+
+
+class NotFoundException(ApiException):
+    """
+    Exception thrown when the page view API has no data for the request, eg
+    the article doesn't exist in the project
+    """
+
+    pass
+
+
+class DeadlineExceededException(ApiException):
+    """
+    Exception thrown when the deadline of a client method expires before an
+    API call completes
+    """
+
+    pass
+
+
+class CircuitOpenException(ApiException):
+    """
+    Exception thrown without calling the API when the circuit breaker of the
+    endpoint is open
+    """
+
+    pass
@@ -0,0 +1,229 @@
+"""
+Chunked export of Wikipedia Page View API results
+
+Results are written chunk by chunk as they are fetched so an export of any
+size only keeps the chunks in flight in memory.
+
+Classes:
+    ExportStats
+    ChunkWriter
+    CsvChunkWriter
+    JsonlChunkWriter
+    ParquetChunkWriter
+
+Functions:
+    create_chunk_writer
+    export_frames
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import sys
+import time
+from typing import Callable, Iterable, List, Optional, TextIO
+
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_lazy import pandas as pd
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+
+
+class ExportStats:
+    """
+    Progress and throughput of an export
+    """
+
+    def __init__(self, total_units: Optional[int] = None) -> None:
+        self.total_units = total_units
+        self.units = 0
+        self.failed_units = 0
+        # failed units with a partial result, eg cut short by a deadline
+        self.partial_units = 0
+        self.rows = 0
+        self.chunks = 0
+        self._started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.rows / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def units_per_second(self) -> float:
+        elapsed = self.elapsed
+        return self.units / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        total = "?" if self.total_units is None else str(self.total_units)
+        return (
+            f"{self.units}/{total} units, {self.failed_units} failed "
+            f"({self.partial_units} partial), "
+            f"{self.rows} rows in {self.elapsed:.1f}s "
+            f"({self.units_per_second:.1f} units/s, {self.rows_per_second:.0f} rows/s)"
+        )
+
+
+class ChunkWriter(ABC):
+    """
+    Base class of the writers appending data frame chunks to an output
+    """
+
+    @abstractmethod
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Append a chunk to the output
+        """
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "ChunkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class _TextChunkWriter(ChunkWriter):
+    def __init__(self, path: str) -> None:
+        if path == "-":
+            self._file: TextIO = sys.stdout
+            self._owns_file = False
+        else:
+            self._file = open(path, "w", newline="", encoding="utf-8")
+            self._owns_file = True
+
+    def close(self) -> None:
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class CsvChunkWriter(_TextChunkWriter):
+    """
+    Write chunks to a CSV file, the header is taken from the first chunk and
+    the following chunks are aligned to its columns
+    """
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._columns: Optional[List[str]] = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._columns is None:
+            self._columns = list(df.columns)
+            df.to_csv(self._file, index=False)
+        else:
+            df.reindex(columns=self._columns).to_csv(
+                self._file, index=False, header=False
+            )
+
+
+class JsonlChunkWriter(_TextChunkWriter):
+    """
+    Write chunks to a JSON lines file, one record per line
+    """
+
+    def write(self, df: pd.DataFrame) -> None:
+        text = df.to_json(orient="records", lines=True, force_ascii=False)
+        # older pandas versions don't end the last line
+        if text and not text.endswith("\n"):
+            text += "\n"
+        self._file.write(text)
+
+
+class ParquetChunkWriter(ChunkWriter):
+    """
+    Write chunks as row groups of a Parquet file, the schema is taken from
+    the first chunk. Requires pyarrow to be installed
+    """
+
+    def __init__(self, path: str) -> None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise InputException("Parquet output requires pyarrow to be installed")
+        self._pyarrow = pyarrow
+        self._path = path
+        self._writer = None
+        self._schema = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._writer is None:
+            table = self._pyarrow.Table.from_pandas(df, preserve_index=False)
+            self._schema = table.schema
+            self._writer = self._pyarrow.parquet.ParquetWriter(self._path, self._schema)
+        else:
+            df = df.reindex(columns=self._schema.names)
+            table = self._pyarrow.Table.from_pandas(
+                df, schema=self._schema, preserve_index=False
+            )
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def create_chunk_writer(path: str, output_format: str) -> ChunkWriter:
+    """
+    Create the writer of an output format, path "-" writes text formats to
+    stdout
+    """
+    if output_format == "csv":
+        return CsvChunkWriter(path)
+    elif output_format == "jsonl":
+        return JsonlChunkWriter(path)
+    elif output_format == "parquet":
+        if path == "-":
+            raise InputException("Parquet output can't be written to stdout")
+        return ParquetChunkWriter(path)
+    raise InputException(
+        f"Output format {output_format} only accept {', '.join(EXPORT_FORMATS)}"
+    )
+
+
+def export_frames(
+    frames: Iterable[Optional[pd.DataFrame]],
+    writer: ChunkWriter,
+    stats: Optional[ExportStats] = None,
+    progress: Optional[Callable[[ExportStats], None]] = None,
+) -> ExportStats:
+    """
+    Write every frame to the writer as soon as it is produced, a None frame
+    counts as a failed unit. A partial frame, with the parts not fetched
+    before the deadline in df.attrs["missing"], also counts as a failed unit
+    and is not written. Empty frames are counted but not written
+
+    Args:
+        frames (Iterable[Optional[pd.DataFrame]]): one frame per work unit
+        writer (ChunkWriter): destination of the frames
+        stats (Optional[ExportStats]): stats to update, created if None
+        progress (Optional[Callable[[ExportStats], None]]): called after each
+        unit
+
+    Returns:
+        ExportStats: final stats of the export
+    """
+    if stats is None:
+        stats = ExportStats()
+    for df in frames:
+        stats.units += 1
+        if df is None:
+            stats.failed_units += 1
+        elif df.attrs.get("missing"):
+            stats.failed_units += 1
+            stats.partial_units += 1
+        elif not df.empty:
+            writer.write(df)
+            stats.rows += len(df)
+            stats.chunks += 1
+        if progress is not None:
+            progress(stats)
+    return stats
@@ -0,0 +1,319 @@
+"""
+In-memory index of top viewed articles per country results
+
+Daily results of get_top_view_per_country (or iter_top_view_per_country) are
+ingested into dictionary-encoded column arrays: article, project and country
+titles are replaced by integer codes and days by their offset from
+1970-01-01. Two indexes point into the arrays: an inverted index of the rows
+of each article, answering in which countries and on which days an article
+was in the top list and at what rank, and a forward index of the ranking of
+each country and day. An article is a (project, title) pair, the same title
+in two projects being two articles. Days are added incrementally and lookups
+only touch the rows they return. An index holds the results of a single
+access method.
+
+Classes:
+    IndexRows
+    TopViewIndex
+"""
+from __future__ import annotations
+
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_lazy import pandas as pd
+from wikipedia_api.pageviews.api_utils import parse_time_parameter
+
+DateLike = Union[datetime, str]
+
+_EPOCH = datetime(1970, 1, 1)
+
+# Columns of the frames ingested by TopViewIndex
+INDEX_COLUMNS = (
+    "country",
+    "access",
+    "year",
+    "month",
+    "day",
+    "article",
+    "project",
+    "rank",
+    "views_ceil",
+)
+
+
+class IndexRows(NamedTuple):
+    """
+    Rows returned by a TopViewIndex lookup, one array per column
+    """
+
+    # Article titles
+    article: np.ndarray
+    # Wikipedia projects of the articles
+    project: np.ndarray
+    # 2-letter country codes
+    country: np.ndarray
+    # Days, datetime64[D]
+    date: np.ndarray
+    # Rank of the article in the top list of the country and day
+    rank: np.ndarray
+    # Views of the article in the country and day, rounded up
+    views_ceil: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.rank)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self._asdict())
+
+
+def _day_offset(date: DateLike) -> int:
+    if isinstance(date, str):
+        date = parse_time_parameter(date)
+    return (date - _EPOCH).days
+
+
+class _Dictionary:
+    # dictionary encoding of titles to consecutive integer codes
+    def __init__(self) -> None:
+        self.codes: Dict[str, int] = {}
+        self.names: List[str] = []
+        # names as an array for vectorized decoding, rebuilt when stale
+        self._lookup = np.empty(0, dtype=object)
+
+    def encode(self, name: str) -> int:
+        code = self.codes.get(name)
+        if code is None:
+            code = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        if len(self._lookup) != len(self.names):
+            self._lookup = np.array(self.names, dtype=object)
+        return self._lookup[codes]
+
+
+class TopViewIndex:
+    """
+    Inverted and forward index of top viewed articles per country and day,
+    see the module documentation
+    """
+
+    # dtype of each encoded column
+    _DTYPES = {
+        "article": np.int32,
+        "project": np.int16,
+        "country": np.int16,
+        "date": np.int32,
+        "rank": np.int16,
+        "views_ceil": np.int64,
+    }
+
+    def __init__(self, capacity: int = 4096) -> None:
+        """
+        Init TopViewIndex
+
+        Args:
+            capacity (int): initial number of rows of the column arrays,
+            doubled when full
+        """
+        self._articles = _Dictionary()
+        self._projects = _Dictionary()
+        self._countries = _Dictionary()
+        self._columns = {
+            name: np.empty(max(capacity, 1), dtype=dtype)
+            for name, dtype in self._DTYPES.items()
+        }
+        self._size = 0
+        self._access: Optional[str] = None
+        # (project code, article code) -> row ids
+        self._postings: Dict[Tuple[int, int], array] = {}
+        # article code -> project codes of the article
+        self._article_projects: Dict[int, List[int]] = {}
+        # (country code, day offset) -> (first row, end row)
+        self._days: Dict[Tuple[int, int], Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def access(self) -> Optional[str]:
+        """
+        Access method of the ingested results, None while empty
+        """
+        return self._access
+
+    @property
+    def article_count(self) -> int:
+        """
+        Number of distinct (project, article) pairs in the index
+        """
+        return len(self._postings)
+
+    def days(self) -> List[Tuple[str, np.datetime64]]:
+        """
+        Return the (country, day) pairs in the index, sorted
+        """
+        return sorted(
+            (self._countries.names[country], np.datetime64(day, "D"))
+            for country, day in self._days
+        )
+
+    def add(self, df: pd.DataFrame) -> int:
+        """
+        Ingest top viewed articles per country frames, country days already
+        in the index are skipped
+
+        Args:
+            df (pd.DataFrame): daily result of get_top_view_per_country, or
+            several of them concatenated
+
+        Raises:
+            InputException: if a column is missing, the access method is not
+            the one of the index or a row has no valid day, eg the all-days
+            monthly ranking
+
+        Returns:
+            int: number of rows added
+        """
+        missing = [column for column in INDEX_COLUMNS if column not in df.columns]
+        if missing:
+            raise InputException(f"Missing columns {missing}")
+        accesses = set(df["access"])
+        if self._access is not None:
+            accesses.add(self._access)
+        if len(accesses) > 1:
+            raise InputException(f"Index of a single access method, got {accesses}")
+        added = 0
+        for (country, year, month, day), group in df.groupby(
+            ["country", "year", "month", "day"], sort=False
+        ):
+            try:
+                date = datetime(int(year), int(month), int(day))
+            except ValueError:
+                raise InputException(f"Invalid day {year}-{month}-{day}")
+            key = (self._countries.encode(country), _day_offset(date))
+            if key in self._days:
+                continue
+            added += self._append(key, group.sort_values("rank", kind="stable"))
+        if accesses:
+            self._access = accesses.pop()
+        return added
+
+    def add_frames(self, frames: Iterable[pd.DataFrame]) -> int:
+        """
+        Ingest frames one at a time, eg iter_top_view_per_country(request)
+
+        Returns:
+            int: number of rows added
+        """
+        return sum(self.add(df) for df in frames if not df.empty)
+
+    def postings(
+        self,
+        article: str,
+        start_date: Optional[DateLike] = None,
+        end_date: Optional[DateLike] = None,
+        country: Optional[str] = None,
+        project: Optional[str] = None,
+    ) -> IndexRows:
+        """
+        Return the countries and days where article was in the top list,
+        sorted by day then in ingestion order
+
+        Args:
+            article (str): article title as returned by the API
+            start_date (Optional[DateLike]): first day, datetime or YYYYMMDD
+            end_date (Optional[DateLike]): last day, datetime or YYYYMMDD
+            country (Optional[str]): only rows of this country
+            project (Optional[str]): only rows of the article in this
+            project, eg en.wikipedia, default to every project
+        """
+        code = self._articles.codes.get(article)
+        if project is None:
+            projects = self._article_projects.get(code, [])
+        else:
+            projects = [self._projects.codes.get(project, -1)]
+        postings = [
+            np.frombuffer(self._postings[key], dtype=np.int64)
+            for key in ((project_code, code) for project_code in projects)
+            if key in self._postings
+        ]
+        if not postings:
+            return self._rows(np.empty(0, dtype=np.int64))
+        if len(postings) == 1:
+            rows = postings[0]
+        else:
+            # row ids follow the ingestion order
+            rows = np.sort(np.concatenate(postings))
+        mask = np.ones(len(rows), dtype=bool)
+        dates = self._columns["date"][rows]
+        if start_date is not None:
+            mask &= dates >= _day_offset(start_date)
+        if end_date is not None:
+            mask &= dates <= _day_offset(end_date)
+        if country is not None:
+            country_code = self._countries.codes.get(country, -1)
+            mask &= self._columns["country"][rows] == country_code
+        order = np.argsort(dates[mask], kind="stable")
+        return self._rows(rows[mask][order])
+
+    def ranking(self, country: str, date: DateLike) -> IndexRows:
+        """
+        Return the top list of a country and day, sorted by rank, empty if
+        not in the index
+        """
+        key = (self._countries.codes.get(country, -1), _day_offset(date))
+        start, end = self._days.get(key, (0, 0))
+        return self._rows(np.arange(start, end))
+
+    def _append(self, key: Tuple[int, int], group: pd.DataFrame) -> int:
+        count = len(group)
+        start = self._size
+        self._reserve(start + count)
+        articles = [self._articles.encode(title) for title in group["article"]]
+        projects = [self._projects.encode(project) for project in group["project"]]
+        columns = self._columns
+        end = start + count
+        columns["article"][start:end] = articles
+        columns["project"][start:end] = projects
+        columns["country"][start:end] = key[0]
+        columns["date"][start:end] = key[1]
+        columns["rank"][start:end] = group["rank"].to_numpy()
+        columns["views_ceil"][start:end] = group["views_ceil"].to_numpy()
+        for row, (project, article) in enumerate(zip(projects, articles), start):
+            postings = self._postings.get((project, article))
+            if postings is None:
+                postings = self._postings[(project, article)] = array("q")
+                self._article_projects.setdefault(article, []).append(project)
+            postings.append(row)
+        self._days[key] = (start, end)
+        self._size = end
+        return count
+
+    def _reserve(self, size: int) -> None:
+        capacity = len(self._columns["rank"])
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for name, values in self._columns.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[: self._size] = values[: self._size]
+            self._columns[name] = grown
+
+    def _rows(self, rows: np.ndarray) -> IndexRows:
+        columns = self._columns
+        return IndexRows(
+            article=self._articles.decode(columns["article"][rows]),
+            project=self._projects.decode(columns["project"][rows]),
+            country=self._countries.decode(columns["country"][rows]),
+            date=columns["date"][rows].astype("datetime64[D]"),
+            rank=columns["rank"][rows],
+            views_ceil=columns["views_ceil"][rows],
+        )
@@ -0,0 +1,36 @@
+"""
+Lazy import of pandas
+
+The modules of the package reference pandas through a LazyModule proxy:
+pandas is only imported the first time one of its attributes is used, so
+importing the package and using the pandas-free results of api_records
+never imports it.
+
+Classes:
+    LazyModule
+"""
+import importlib
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule:
+    """
+    Proxy of a module imported on first attribute access
+    """
+
+    def __init__(self, name: str) -> None:
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def __getattr__(self, attribute: str) -> Any:
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name)
+        return getattr(module, attribute)
+
+    def __repr__(self) -> str:
+        return f"LazyModule({self._name!r})"
+
+
+pandas = LazyModule("pandas")
@@ -0,0 +1,158 @@
+"""
+Wide article x time matrix result for per article page views
+
+Classes:
+    PageViewMatrix
+
+Functions:
+    build_time_index
+    timestamp_to_offset
+    fill_dense_row
+    collect_sparse_row
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from wikipedia_api.pageviews.api_lazy import pandas as pd
+from wikipedia_api.pageviews.api_types import Granularity
+
+
+class PageViewMatrix:
+    """
+    Page view counts of many articles over the same time range, stored in a
+    2-D array with one row per article and one column per day or month
+    """
+
+    def __init__(
+        self,
+        values,
+        articles: Sequence[str],
+        index: pd.DatetimeIndex,
+        missing: Sequence[str] = (),
+    ):
+        """
+        Init PageViewMatrix
+
+        Args:
+            values: 2-D numpy array or scipy sparse matrix of shape
+            (len(articles), len(index))
+            articles (Sequence[str]): article title of each row
+            index (pd.DatetimeIndex): timestamp of each column
+            missing (Sequence[str]): articles not fetched before the deadline
+            expired, their rows are left empty
+        """
+        self._values = values
+        self._articles = pd.Index(articles, name="article")
+        self._index = index
+        self._missing = list(missing)
+
+    @property
+    def values(self):
+        return self._values
+
+    @property
+    def articles(self) -> pd.Index:
+        return self._articles
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return self._index
+
+    @property
+    def missing(self) -> List[str]:
+        return self._missing
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self._values.shape
+
+    def row(self, article: str) -> np.ndarray:
+        """
+        Return the time series of one article
+        """
+        position = self._articles.get_loc(article)
+        row = self._values[position]
+        if hasattr(row, "toarray"):
+            row = row.toarray()[0]
+        return row
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Convert to a data frame indexed by article with one column per
+        timestamp, sparse values are densified
+        """
+        values = self._values
+        if hasattr(values, "toarray"):
+            values = values.toarray()
+        return pd.DataFrame(values, index=self._articles, columns=self._index)
+
+
+def build_time_index(
+    start_time: datetime, end_time: datetime, granularity: Granularity
+) -> pd.DatetimeIndex:
+    """
+    Build the column index of the matrix, one entry per day for DAILY
+    granularity or per month for MONTHLY granularity
+    """
+    if granularity == Granularity.MONTHLY:
+        start = datetime(start_time.year, start_time.month, 1)
+        return pd.date_range(start, end_time, freq="MS")
+    start = datetime(start_time.year, start_time.month, start_time.day)
+    return pd.date_range(start, end_time, freq="D")
+
+
+def timestamp_to_offset(
+    timestamp: str, start_time: datetime, granularity: Granularity
+) -> int:
+    """
+    Translate an API timestamp in YYYYMMDDHH format to the column offset
+    of the matrix starting at start_time
+    """
+    year = int(timestamp[0:4])
+    month = int(timestamp[4:6])
+    if granularity == Granularity.MONTHLY:
+        return (year - start_time.year) * 12 + month - start_time.month
+    day = int(timestamp[6:8])
+    return datetime(year, month, day).toordinal() - start_time.toordinal()
+
+
+def fill_dense_row(
+    row: np.ndarray,
+    items: Iterable[dict],
+    start_time: datetime,
+    granularity: Granularity,
+) -> None:
+    """
+    Write the views of the API items into a row of a dense matrix, items
+    outside of the row are ignored
+    """
+    size = row.shape[0]
+    for item in items:
+        offset = timestamp_to_offset(item["timestamp"], start_time, granularity)
+        if 0 <= offset < size:
+            row[offset] = item["views"]
+
+
+def collect_sparse_row(
+    row_index: int,
+    items: Iterable[dict],
+    start_time: datetime,
+    granularity: Granularity,
+    size: int,
+) -> Tuple[List[int], List[int], List[int]]:
+    """
+    Collect the (row, column, views) triplets of the API items for building
+    a sparse matrix, items outside of the row are ignored
+    """
+    rows, columns, data = [], [], []
+    for item in items:
+        offset = timestamp_to_offset(item["timestamp"], start_time, granularity)
+        if 0 <= offset < size and item["views"]:
+            rows.append(row_index)
+            columns.append(offset)
+            data.append(item["views"])
+    return rows, columns, data
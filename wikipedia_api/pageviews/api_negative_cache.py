@@ -0,0 +1,210 @@
+"""
+Negative cache of requests known to have no data
+
+Per article calls for titles that don't exist and top per country calls for
+countries withheld for privacy fail the same way every time. The negative
+cache remembers them for a ttl so the client and batch jobs skip them
+instead of spending a round trip.
+
+Classes:
+    BloomFilter
+    NegativeCache
+
+Functions:
+    article_key
+    country_day_key
+"""
+from collections import OrderedDict
+import hashlib
+import math
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+
+def article_key(
+    project: str,
+    article: str,
+    access: str,
+    agent: str,
+    granularity: str,
+    start: str,
+    end: str,
+) -> str:
+    """
+    Negative cache key of the page views of an article in a project over a
+    time range, a range not published yet doesn't hide the other ranges
+    """
+    return f"article|{project}|{article}|{access}|{agent}|{granularity}|{start}|{end}"
+
+
+def country_day_key(country: str, access: str, year: str, month: str, day: str) -> str:
+    """
+    Negative cache key of the top viewed articles of a country on a day
+    """
+    return f"country|{country}|{access}|{year}{month}{day}"
+
+
+class BloomFilter:
+    """
+    Fixed size probabilistic set, membership tests can return false
+    positives at about error_rate but never false negatives
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        """
+        Init BloomFilter sized for capacity keys
+
+        Args:
+            capacity (int): expected number of keys
+            error_rate (float): false positive rate at capacity
+        """
+        capacity = max(capacity, 1)
+        self._bit_count = max(
+            int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8
+        )
+        self._hash_count = max(int(round(self._bit_count / capacity * math.log(2))), 1)
+        self._bits = bytearray((self._bit_count + 7) // 8)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def size_in_bytes(self) -> int:
+        return len(self._bits)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        # double hashing to derive hash_count positions from one digest
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self._hash_count):
+            yield (first + i * second) % self._bit_count
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class NegativeCache:
+    """
+    Thread safe set of keys known to have no data, each key expires ttl
+    seconds after it is added. The exact set keeps at most max_entries keys,
+    if bloom_capacity is set every key is also added to a Bloom filter so
+    very large lists of missing titles are remembered in a few bytes per key
+    with a small false positive rate. The Bloom filter is rotated every ttl
+    seconds, keys only known by the filter expire between ttl and 2 * ttl
+    """
+
+    def __init__(
+        self,
+        ttl: float = 86400.0,
+        max_entries: Optional[int] = 100000,
+        bloom_capacity: Optional[int] = None,
+        bloom_error_rate: float = 0.001,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """
+        Init NegativeCache
+
+        Args:
+            ttl (float): seconds a key is remembered
+            max_entries (Optional[int]): maximum number of keys of the exact
+            set, the oldest key is evicted first, None for no limit
+            bloom_capacity (Optional[int]): expected number of keys of the
+            Bloom filter, no Bloom filter if None
+            bloom_error_rate (float): false positive rate of the Bloom filter
+            clock (Callable[[], float]): time source in seconds
+        """
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._bloom_capacity = bloom_capacity
+        self._bloom_error_rate = bloom_error_rate
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> expiry time, ordered by insertion
+        self._entries = OrderedDict()
+        self._blooms = []
+        self._bloom_rotated_at = clock()
+        if bloom_capacity is not None:
+            self._blooms = [self._new_bloom()]
+        self._hits = 0
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    def add(self, key: str) -> None:
+        """
+        Remember that key has no data
+        """
+        with self._lock:
+            now = self._clock()
+            self._entries[key] = now + self._ttl
+            self._entries.move_to_end(key)
+            if self._max_entries is not None:
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+            if self._blooms:
+                self._rotate_blooms(now)
+                self._blooms[0].add(key)
+
+    def update(self, keys: Iterable[str]) -> None:
+        """
+        Remember that every key of keys has no data, eg to load the keys
+        known to be missing by a previous run
+        """
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            now = self._clock()
+            expiry = self._entries.get(key)
+            if expiry is not None:
+                if expiry > now:
+                    self._hits += 1
+                    return True
+                del self._entries[key]
+            if self._blooms:
+                self._rotate_blooms(now)
+                if any(key in bloom for bloom in self._blooms):
+                    self._hits += 1
+                    return True
+            return False
+
+    def discard(self, key: str) -> None:
+        """
+        Forget key from the exact set, keys of the Bloom filter can't be
+        removed and expire with the filter
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _new_bloom(self) -> BloomFilter:
+        return BloomFilter(self._bloom_capacity, self._bloom_error_rate)
+
+    def _rotate_blooms(self, now: float) -> None:
+        elapsed = now - self._bloom_rotated_at
+        if elapsed < self._ttl:
+            return
+        if elapsed >= 2 * self._ttl:
+            self._blooms = [self._new_bloom()]
+        else:
+            self._blooms = [self._new_bloom(), self._blooms[0]]
+        self._bloom_rotated_at = now
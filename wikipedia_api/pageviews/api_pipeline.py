@@ -0,0 +1,91 @@
+"""
+Top list to per article history pipeline
+
+get_top_pageviews_history fetches top lists and the page view history of
+their articles in a single pipeline: the articles of a top list are queued
+for history fetching as soon as the list is decoded, while the next lists
+are still being fetched. Articles appearing in several top lists (several
+countries, days or access methods) get a single row and a single history
+fetch, the same title in two projects being two articles.
+
+Classes:
+    TopArticleRows
+    TopHistory
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, NamedTuple, Tuple, Union
+
+import numpy as np
+
+from wikipedia_api.pageviews.api_lazy import pandas as pd
+from wikipedia_api.pageviews.api_matrix import PageViewMatrix
+from wikipedia_api.pageviews.api_titles import encode_title, is_case_sensitive
+from wikipedia_api.pageviews.api_types import (
+    TopViewedArticleRequest,
+    TopViewedPerCountryRequest,
+)
+
+TopRequest = Union[TopViewedArticleRequest, TopViewedPerCountryRequest]
+
+
+class TopArticleRows:
+    """
+    Assign a history row to each distinct (project, article) of top lists,
+    titles are compared in their encoded form
+    """
+
+    def __init__(self) -> None:
+        self._rows: Dict[Tuple[str, str], int] = {}
+        self.projects: List[str] = []
+        self.articles: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+    def assign(
+        self, projects: Iterable[str], articles: Iterable[str]
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Return the row of each (project, article) pair and the rows created
+        by this call, in order
+        """
+        rows = []
+        created = []
+        for project, article in zip(projects, articles):
+            key = (project, encode_title(article, not is_case_sensitive(project)))
+            row = self._rows.get(key)
+            if row is None:
+                row = self._rows[key] = len(self.articles)
+                self.projects.append(project)
+                self.articles.append(article)
+                created.append(row)
+            rows.append(row)
+        return rows, created
+
+
+class TopHistory(NamedTuple):
+    """
+    Result of get_top_pageviews_history
+    """
+
+    # Rows of every top list, with a "row" column giving the history row of
+    # the article
+    ranks: pd.DataFrame
+    # Page views of each distinct article, one row per article in the order
+    # they first appear in the top lists
+    history: PageViewMatrix
+    # Project of each history row
+    projects: List[str]
+    # Top list requests without result before the deadline expired
+    missing_tops: List[TopRequest]
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Join the top lists with the history of their articles, one column
+        per timestamp
+        """
+        history = pd.DataFrame(
+            np.asarray(self.history.to_frame()), columns=self.history.index
+        )
+        return self.ranks.join(history, on="row")
@@ -0,0 +1,222 @@
+"""
+Planning of heterogeneous request batches
+
+A batch of requests is compiled into a plan of distinct requests before any
+API call: identical requests are executed once, and aggregated or per article
+requests of the same series (project, access, agent, granularity and article)
+at daily or hourly granularity whose date ranges overlap or touch are merged
+into one request covering their union. Aggregated requests are only merged
+with requests split the same way between the legacy and the page view API,
+so a merge never adds legacy rows to a request. The result of a planned
+request is then split back into the rows of each original request.
+
+Classes:
+    RequestPlan
+    BatchRunReport
+
+Functions:
+    plan_requests
+    split_result
+    upstream_call_count
+"""
+from __future__ import annotations
+
+import calendar
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Tuple
+
+from wikipedia_api.pageviews.api_lazy import pandas as pd
+from wikipedia_api.pageviews.api_types import (
+    AccessMethod,
+    AggregatePageViewRequest,
+    Granularity,
+    PerArticlePageViewRequest,
+    TopViewedPerCountryRequest,
+)
+from wikipedia_api.pageviews.api_utils import (
+    parse_start_end_time,
+    split_time_range_for_legacy_api,
+)
+
+# Granularities whose rows can be split back by timestamp after a merge
+_MERGEABLE_GRANULARITY_STEPS = {
+    Granularity.DAILY: timedelta(days=1),
+    Granularity.HOURLY: timedelta(hours=1),
+}
+
+
+class RequestPlan(NamedTuple):
+    """
+    Distinct requests to execute for a batch
+    """
+
+    # Requests to execute, merged and deduplicated
+    requests: List[tuple]
+    # Index in requests of the planned request serving each batch request
+    assignments: List[int]
+
+
+class BatchRunReport(NamedTuple):
+    """
+    Results and counters of WikipediaPageViewApiClient.run_batch
+    """
+
+    # Result of each request of the batch, in batch order
+    results: List[pd.DataFrame]
+    # Number of requests of the batch
+    requests: int
+    # Number of planned requests executed
+    executed: int
+    # Upstream API calls made by the plan
+    upstream_calls: int
+    # Upstream API calls saved compared to executing every request
+    calls_saved: int
+    # Index of the requests without result because the deadline expired or
+    # their API call failed
+    missing: List[int]
+    # Error of each request whose API call failed, by index
+    errors: Dict[int, Exception]
+    # Missing API calls, periods or days of each partial result, by index,
+    # the same as the missing attribute of the data frame
+    partial: Dict[int, List[str]]
+
+
+def _time_range(request: tuple) -> Tuple[datetime, datetime]:
+    start_time, end_time = parse_start_end_time(
+        request.start_time, request.end_time, support_hour=True
+    )
+    if request.granularity == Granularity.DAILY:
+        start_time = start_time.replace(hour=0)
+        end_time = end_time.replace(hour=0)
+    return start_time, end_time
+
+
+def _series_key(request: tuple):
+    if not isinstance(request, (AggregatePageViewRequest, PerArticlePageViewRequest)):
+        return None
+    if request.granularity not in _MERGEABLE_GRANULARITY_STEPS:
+        return None
+    if isinstance(request, AggregatePageViewRequest):
+        start_time, end_time = parse_start_end_time(
+            request.start_time, request.end_time, support_hour=True
+        )
+        # which of the legacy and page view API calls the request makes
+        apis = tuple(
+            part is not None
+            for part in split_time_range_for_legacy_api(start_time, end_time)
+        )
+        return (type(request), request.access, request.agent, request.granularity, apis)
+    return (
+        type(request),
+        request.access,
+        request.agent,
+        request.granularity,
+        request.article,
+    )
+
+
+def plan_requests(requests: List[tuple]) -> RequestPlan:
+    """
+    Compile a batch of requests into a plan, see the module documentation
+
+    Args:
+        requests (List[tuple]): request NamedTuples of api_types
+
+    Raises:
+        InputException: if the start or end time of a mergeable request is
+        invalid
+
+    Returns:
+        RequestPlan: planned requests and the assignment of each request
+    """
+    planned: List[tuple] = []
+    assignments: List[int] = [0] * len(requests)
+    distinct: Dict[tuple, int] = {}
+    series: Dict[tuple, List[Tuple[int, datetime, datetime]]] = {}
+
+    for index, request in enumerate(requests):
+        key = _series_key(request)
+        if key is None:
+            if request not in distinct:
+                distinct[request] = len(planned)
+                planned.append(request)
+            assignments[index] = distinct[request]
+        else:
+            start_time, end_time = _time_range(request)
+            series.setdefault(key, []).append((index, start_time, end_time))
+
+    for key, ranges in series.items():
+        step = _MERGEABLE_GRANULARITY_STEPS[key[3]]
+        ranges.sort(key=lambda item: item[1])
+        group = [ranges[0]]
+        group_end = ranges[0][2]
+        for item in ranges[1:] + [None]:
+            if item is not None and item[1] <= group_end + step:
+                group.append(item)
+                group_end = max(group_end, item[2])
+                continue
+            # close the group with one request covering the union
+            merged = requests[group[0][0]]
+            if len(group) > 1:
+                merged = merged._replace(
+                    start_time=group[0][1].strftime("%Y%m%d%H"),
+                    end_time=group_end.strftime("%Y%m%d%H"),
+                )
+            for index, _, _ in group:
+                assignments[index] = len(planned)
+            planned.append(merged)
+            if item is not None:
+                group = [item]
+                group_end = item[2]
+
+    return RequestPlan(planned, assignments)
+
+
+def split_result(
+    request: tuple, planned_request: tuple, df: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Return the rows of the result df of planned_request that answer request
+
+    Args:
+        request (tuple): request of the batch
+        planned_request (tuple): planned request serving request
+        df (pd.DataFrame): result of planned_request
+
+    Returns:
+        pd.DataFrame: result of request, a copy of df if the two requests are
+        the same
+    """
+    if request == planned_request or "timestamp" not in df:
+        return df.copy()
+    start_time, end_time = _time_range(request)
+    timestamps = df["timestamp"].astype(str)
+    mask = (timestamps >= start_time.strftime("%Y%m%d%H")) & (
+        timestamps <= end_time.strftime("%Y%m%d%H")
+    )
+    return df[mask].reset_index(drop=True)
+
+
+def upstream_call_count(request: tuple) -> int:
+    """
+    Number of upstream API calls made to execute request: aggregated
+    requests call the legacy API and the page view API (twice for MOBILE
+    access) depending on their date range, top per country requests of
+    all-days call the API once per day of the month
+    """
+    if isinstance(request, AggregatePageViewRequest):
+        start_time, end_time = parse_start_end_time(
+            request.start_time, request.end_time, support_hour=True
+        )
+        legacy_start, _, page_view_start, _ = split_time_range_for_legacy_api(
+            start_time, end_time
+        )
+        calls = 0
+        if legacy_start is not None:
+            calls += 1
+        if page_view_start is not None:
+            calls += 2 if request.access == AccessMethod.MOBILE else 1
+        return calls
+    if isinstance(request, TopViewedPerCountryRequest) and request.day == "all-days":
+        return calendar.monthrange(int(request.year), int(request.month))[1]
+    return 1
@@ -0,0 +1,296 @@
+"""
+Local caching reverse proxy of the page view API
+
+Worker processes of a host point their clients at the proxy through a base
+URL instead of each calling the API with its own cache and connection
+pool. The proxy implements the page view endpoint paths: concurrent
+requests of the same path are coalesced into one upstream call
+(single-flight), successful responses are kept in an on-disk cache shared
+by every client of the host and revalidated with their ETag once expired,
+and upstream calls go through one token bucket so the whole host stays
+within one request budget.
+
+Classes:
+    ProxyStats
+    DiskCache
+    CachingProxyServer
+"""
+from email.utils import formatdate
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from wikipedia_api.pageviews.api_concurrent import TokenBucket
+from wikipedia_api.pageviews.api_constants import PageViewApiEndPoints
+from wikipedia_api.pageviews.api_transport import (
+    RequestsTransport,
+    Transport,
+    TransportResponse,
+)
+
+# Path prefix of the page view endpoints served by the proxy
+API_PATH_PREFIX = "/api/rest_v1/metrics/"
+
+# Request headers forwarded upstream
+FORWARDED_HEADERS = ("User-Agent", "From", "Api-User-Agent")
+
+
+class ProxyStats(NamedTuple):
+    """
+    Counters of a CachingProxyServer
+    """
+
+    # Requests answered from the disk cache
+    hits: int
+    # Requests that called the upstream API
+    misses: int
+    # Requests that waited for the upstream call of a concurrent request
+    coalesced: int
+    # Expired entries revalidated by a 304 upstream response
+    revalidated: int
+    # Upstream calls that failed
+    errors: int
+
+
+class DiskCache:
+    """
+    Cache of raw responses in a directory, one file per path written
+    atomically so several processes can share the directory
+    """
+
+    def __init__(
+        self, directory: str, ttl: float = 3600.0, clock: Callable[[], float] = time.time
+    ) -> None:
+        self._directory = directory
+        self._ttl = ttl
+        self._clock = clock
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def ttl(self) -> float:
+        return self._ttl
+
+    def get(self, key: str) -> Optional[Tuple[float, Dict[str, str], bytes]]:
+        """
+        Return the stored time, headers and body of key, expired or not,
+        None if missing
+        """
+        try:
+            with open(self._path(key), "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (FileNotFoundError, ValueError):
+            return None
+        return meta["stored_at"], meta["headers"], body
+
+    def put(self, key: str, headers: Dict[str, str], body: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = json.dumps({"key": key, "stored_at": self._clock(), "headers": headers})
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(meta.encode("utf-8") + b"\n" + body)
+        os.replace(tmp_path, path)
+
+    def is_fresh(self, stored_at: float) -> bool:
+        return self._clock() - stored_at < self._ttl
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self._directory, digest[:2], digest)
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.response: Optional[TransportResponse] = None
+
+
+class CachingProxyServer:
+    """
+    Caching reverse proxy of the page view API, see the module documentation.
+    Clients use it with WikipediaPageViewApiClient(..., base_url=proxy.base_url)
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        host: str = "127.0.0.1",
+        port: int = 8787,
+        ttl: float = 3600.0,
+        rate: float = 50.0,
+        burst: Optional[float] = None,
+        upstream_base_url: str = PageViewApiEndPoints.BASE_URL,
+        transport: Optional[Transport] = None,
+    ) -> None:
+        """
+        Init CachingProxyServer, the socket is bound immediately
+
+        Args:
+            cache_dir (str): directory of the on-disk cache
+            host (str): interface to listen on
+            port (int): port to listen on, 0 for a free port
+            ttl (float): seconds before a cached response is revalidated
+            rate (float): maximum upstream requests per second
+            burst (Optional[float]): upstream requests allowed at once after
+            an idle period, default to rate
+            upstream_base_url (str): scheme and host of the upstream API
+            transport (Optional[Transport]): transport of the upstream calls,
+            default to a RequestsTransport
+        """
+        self._cache = DiskCache(cache_dir, ttl)
+        self._bucket = TokenBucket(rate, burst)
+        self._upstream_base_url = upstream_base_url.rstrip("/")
+        self._transport = transport or RequestsTransport()
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._counts = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "revalidated": 0,
+            "errors": 0,
+        }
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stats(self) -> ProxyStats:
+        with self._lock:
+            return ProxyStats(**self._counts)
+
+    def serve_forever(self) -> None:
+        """
+        Serve requests in the calling thread until stop is called
+        """
+        self._server.serve_forever()
+
+    def start(self) -> "CachingProxyServer":
+        """
+        Serve requests in a background daemon thread
+        """
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="pageview-proxy", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "CachingProxyServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def fetch(self, path: str, headers: Dict[str, str]) -> Tuple[TransportResponse, str]:
+        """
+        Answer a request of path from the cache or the upstream API
+
+        Returns:
+            Tuple[TransportResponse, str]: response and cache status, HIT,
+            MISS, REVALIDATED or COALESCED
+        """
+        cached = self._cache.get(path)
+        if cached is not None and self._cache.is_fresh(cached[0]):
+            self._count("hits")
+            return TransportResponse(200, cached[1], cached[2]), "HIT"
+
+        with self._lock:
+            flight = self._flights.get(path)
+            is_leader = flight is None
+            if is_leader:
+                flight = self._flights[path] = _Flight()
+        if not is_leader:
+            flight.event.wait()
+            self._count("coalesced")
+            return flight.response, "COALESCED"
+
+        try:
+            flight.response, status = self._fetch_upstream(path, headers, cached)
+        except Exception as e:
+            self._count("errors")
+            body = json.dumps({"title": "Upstream error", "detail": repr(e)})
+            flight.response, status = TransportResponse(502, {}, body.encode()), "ERROR"
+        finally:
+            flight.event.set()
+            with self._lock:
+                del self._flights[path]
+        return flight.response, status
+
+    def _fetch_upstream(
+        self,
+        path: str,
+        headers: Dict[str, str],
+        cached: Optional[Tuple[float, Dict[str, str], bytes]],
+    ) -> Tuple[TransportResponse, str]:
+        upstream_headers = {
+            name: headers[name] for name in FORWARDED_HEADERS if name in headers
+        }
+        if cached is not None and "ETag" in cached[1]:
+            upstream_headers["If-None-Match"] = cached[1]["ETag"]
+
+        self._bucket.acquire()
+        response = self._transport.get(self._upstream_base_url + path, upstream_headers)
+        if response.status_code == 304 and cached is not None:
+            self._cache.put(path, cached[1], cached[2])
+            self._count("revalidated")
+            return TransportResponse(200, cached[1], cached[2]), "REVALIDATED"
+
+        self._count("misses")
+        if response.status_code == 200:
+            kept = {
+                name: response.headers[name]
+                for name in ("ETag", "Last-Modified")
+                if name in response.headers
+            }
+            self._cache.put(path, kept, response.body)
+            return TransportResponse(200, kept, response.body), "MISS"
+        return TransportResponse(response.status_code, {}, response.body), "MISS"
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counts[name] += 1
+
+    def _handler_class(self):
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                if not self.path.startswith(API_PATH_PREFIX):
+                    self._send(404, {}, b'{"title": "Not found."}', "NONE")
+                    return
+                response, status = proxy.fetch(self.path, dict(self.headers))
+                self._send(response.status_code, response.headers, response.body, status)
+
+            def _send(self, status_code, headers, body, cache_status):
+                self.send_response(status_code)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Date", formatdate(usegmt=True))
+                self.send_header("X-Cache", cache_status)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
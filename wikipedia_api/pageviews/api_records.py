@@ -0,0 +1,133 @@
+"""
+Pandas-free results of the top viewed articles API
+
+get_top_pageviews_records returns the decoded rows as compact columns
+(a list of titles and arrays of integers from the array module) instead of a
+pandas DataFrame, for callers that only need (article, views, rank) rows and
+don't want to pay the import of pandas. to_pandas converts them to the data
+frame of get_top_pageviews.
+
+Classes:
+    TopArticleRecord
+    TopArticleRecords
+"""
+from array import array
+from typing import Iterator, List, Sequence
+
+
+class TopArticleRecord:
+    """
+    One row of a top viewed articles list
+    """
+
+    __slots__ = ("article", "views", "rank")
+
+    def __init__(self, article: str, views: int, rank: int) -> None:
+        self.article = article
+        self.views = views
+        self.rank = rank
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, TopArticleRecord):
+            return NotImplemented
+        return (self.article, self.views, self.rank) == (
+            other.article,
+            other.views,
+            other.rank,
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"TopArticleRecord(article={self.article!r}, views={self.views}, "
+            f"rank={self.rank})"
+        )
+
+
+class TopArticleRecords:
+    """
+    Top viewed articles of a project and date, stored column wise
+    """
+
+    __slots__ = (
+        "project",
+        "access",
+        "year",
+        "month",
+        "day",
+        "articles",
+        "views",
+        "ranks",
+    )
+
+    def __init__(
+        self,
+        params: dict,
+        articles: List[str],
+        views: Sequence[int],
+        ranks: Sequence[int],
+    ) -> None:
+        """
+        Init TopArticleRecords
+
+        Args:
+            params (dict): project, access, year, month and day of the API
+            call
+            articles (List[str]): article titles
+            views (Sequence[int]): page views of each article
+            ranks (Sequence[int]): rank of each article
+        """
+        self.project = params["project"]
+        self.access = params["access"]
+        self.year = params["year"]
+        self.month = params["month"]
+        self.day = params["day"]
+        self.articles = articles
+        self.views = array("q", views)
+        self.ranks = array("l", ranks)
+
+    @classmethod
+    def from_items(cls, params: dict, items: List[dict]) -> "TopArticleRecords":
+        """
+        Build from the articles of a decoded API response
+        """
+        return cls(
+            params,
+            [item["article"] for item in items],
+            [item["views"] for item in items],
+            [item["rank"] for item in items],
+        )
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+    def __getitem__(self, position: int) -> TopArticleRecord:
+        return TopArticleRecord(
+            self.articles[position], self.views[position], self.ranks[position]
+        )
+
+    def __iter__(self) -> Iterator[TopArticleRecord]:
+        for article, views, rank in zip(self.articles, self.views, self.ranks):
+            yield TopArticleRecord(article, views, rank)
+
+    def to_pandas(self):
+        """
+        Convert to the data frame returned by get_top_pageviews, imports
+        pandas
+
+        Returns:
+            pd.DataFrame: columns "article", "views", "rank", "project",
+            "access", "year", "month" and "day"
+        """
+        import numpy as np
+        import pandas as pd
+
+        df = pd.DataFrame(
+            {
+                "article": self.articles,
+                "views": np.asarray(self.views, dtype=np.int64),
+                "rank": np.asarray(self.ranks, dtype=np.int64),
+            }
+        )
+        for column in ("project", "access", "year", "month", "day"):
+            df[column] = getattr(self, column)
+        return df
@@ -0,0 +1,227 @@
+"""
+Record and replay of API traffic
+
+RecordingTransport wraps another transport and appends every exchange (URL,
+status, headers, body and latency) to a gzip compressed JSON lines archive.
+ReplayTransport serves an archive back, at full speed or with the recorded
+latencies, so client side CPU and memory can be profiled offline on
+production shaped traffic.
+
+Classes:
+    RecordingTransport
+    ReplayTransport
+
+Functions:
+    read_archive
+"""
+import base64
+from collections import defaultdict
+import gzip
+import json
+import threading
+import time
+from typing import Dict, Iterator, List
+
+from wikipedia_api.pageviews.api_transport import (
+    Transport,
+    TransportResponse,
+    TransportStream,
+    iter_body_chunks,
+)
+
+
+def _encode_body(body: bytes) -> dict:
+    try:
+        return {"body": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_base64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode_body(record: dict) -> bytes:
+    if "body_base64" in record:
+        return base64.b64decode(record["body_base64"])
+    return record["body"].encode("utf-8")
+
+
+def read_archive(path: str) -> Iterator[dict]:
+    """
+    Yield the records of an archive written by RecordingTransport, in
+    recording order. Each record has "url", "status", "headers", "latency"
+    and "body" or "body_base64" keys
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class RecordingTransport:
+    """
+    Transport recording every exchange of an inner transport to an archive,
+    use as a context manager or call close to flush the archive
+    """
+
+    def __init__(self, transport: Transport, path: str) -> None:
+        """
+        Init RecordingTransport
+
+        Args:
+            transport (Transport): transport sending the requests, eg
+            RequestsTransport
+            path (str): archive file, gzip compressed JSON lines, overwritten
+        """
+        self._transport = transport
+        self._path = path
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def get(self, url: str, headers: dict) -> TransportResponse:
+        start = time.perf_counter()
+        response = self._transport.get(url, headers)
+        self._record(
+            url,
+            response.status_code,
+            response.headers,
+            response.body,
+            time.perf_counter() - start,
+        )
+        return response
+
+    def stream(self, url: str, headers: dict, chunk_size: int) -> TransportStream:
+        start = time.perf_counter()
+        response = self._transport.stream(url, headers, chunk_size)
+        if response.status_code != 200:
+            # error bodies are small and not iterated by the client, they
+            # are recorded right away
+            with response:
+                body = b"".join(response.chunks)
+            self._record(
+                url,
+                response.status_code,
+                response.headers,
+                body,
+                time.perf_counter() - start,
+            )
+            return TransportStream(
+                url,
+                response.status_code,
+                response.headers,
+                iter_body_chunks(body, chunk_size),
+            )
+
+        def chunks() -> Iterator[bytes]:
+            body = []
+            try:
+                for chunk in response.chunks:
+                    body.append(chunk)
+                    yield chunk
+            except GeneratorExit:
+                # the consumer stopped after the items array, the rest of
+                # the body is read so the whole response is recorded
+                body.extend(response.chunks)
+            self._record(
+                url,
+                response.status_code,
+                response.headers,
+                b"".join(body),
+                time.perf_counter() - start,
+            )
+
+        return TransportStream(
+            url, response.status_code, response.headers, chunks(), response.close
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self) -> "RecordingTransport":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _record(
+        self, url: str, status_code: int, headers, body: bytes, latency: float
+    ) -> None:
+        record = {
+            "url": url,
+            "status": status_code,
+            "headers": dict(headers),
+            "latency": round(latency, 6),
+            **_encode_body(body),
+        }
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._count += 1
+
+
+class ReplayTransport:
+    """
+    Transport serving the exchanges of an archive. Requests of a URL recorded
+    several times get the recorded responses in order, the last one being
+    repeated. Requests of a URL missing from the archive raise KeyError
+    """
+
+    def __init__(self, path: str, latency_scale: float = 0.0) -> None:
+        """
+        Init ReplayTransport
+
+        Args:
+            path (str): archive written by RecordingTransport
+            latency_scale (float): each response sleeps the recorded latency
+            times latency_scale, 0 to replay at full speed and 1 to keep the
+            recorded latencies
+        """
+        self._latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._records: Dict[str, List[TransportResponse]] = defaultdict(list)
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        for record in read_archive(path):
+            self._records[record["url"]].append(
+                TransportResponse(
+                    record["status"], record["headers"], _decode_body(record)
+                )
+            )
+            self._latencies[record["url"]].append(record["latency"])
+        self._positions: Dict[str, int] = defaultdict(int)
+
+    def __len__(self) -> int:
+        return sum(len(records) for records in self._records.values())
+
+    def get(self, url: str, headers: dict) -> TransportResponse:
+        with self._lock:
+            # _records is a defaultdict, the lookup must not race with the
+            # insertion of another URL
+            if url not in self._records:
+                raise KeyError(f"No recorded response for {url}")
+            records = self._records[url]
+            position = min(self._positions[url], len(records) - 1)
+            self._positions[url] = position + 1
+        latency = self._latencies[url][position] * self._latency_scale
+        if latency > 0:
+            time.sleep(latency)
+        return records[position]
+
+    def stream(self, url: str, headers: dict, chunk_size: int) -> TransportStream:
+        response = self.get(url, headers)
+        return TransportStream(
+            url,
+            response.status_code,
+            response.headers,
+            iter_body_chunks(response.body, chunk_size),
+        )
+
+    def rewind(self) -> None:
+        """
+        Serve the recorded responses from the start again
+        """
+        with self._lock:
+            self._positions.clear()
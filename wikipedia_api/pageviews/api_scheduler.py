@@ -0,0 +1,294 @@
+"""
+Priority scheduling of the API calls of clients sharing a connection budget
+
+A RequestScheduler bounds the number of concurrent API calls and decides
+which waiting call runs next. Calls of the INTERACTIVE class go before BULK
+calls, some slots are reserved to INTERACTIVE calls so they don't wait for
+running bulk calls to complete, calls of a class run in arrival order and a
+waiting call gains one priority class every aging seconds so bulk work is
+never starved. The priority of the calls made by a thread is set with the
+request_priority context manager and follows the work submitted through
+bounded_map. A call waiting for a slot past the deadline of its client
+method leaves the queue and raises DeadlineExceededException. A long call,
+eg a streamed response, can pause its slot while it doesn't use the
+connection and resume it later, it is still counted as one call.
+
+Enum:
+    Priority
+
+Classes:
+    PriorityStats
+    Slot
+    RequestScheduler
+
+Functions:
+    request_priority
+    current_priority
+"""
+from collections import deque
+from contextlib import contextmanager
+import contextvars
+from enum import Enum
+import threading
+import time
+from typing import Callable, Deque, Dict, Iterator, NamedTuple, Optional
+
+from wikipedia_api.pageviews.api_deadline import time_left
+from wikipedia_api.pageviews.api_exceptions import DeadlineExceededException
+
+
+class Priority(Enum):
+    """
+    Enum for the priority class of an API call, smaller values go first
+    """
+
+    # Calls of a user waiting for the result, eg a dashboard
+    INTERACTIVE = 0
+    # Backfill, export, batch and warmup calls
+    BULK = 1
+
+
+_PRIORITY: contextvars.ContextVar = contextvars.ContextVar(
+    "pageview_request_priority", default=Priority.INTERACTIVE
+)
+
+
+def current_priority() -> Priority:
+    """
+    Priority of the API calls made in the current context, INTERACTIVE
+    unless set by request_priority
+    """
+    return _PRIORITY.get()
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """
+    Make the API calls of the block, and of the work it submits through
+    bounded_map, with priority
+    """
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+class PriorityStats(NamedTuple):
+    """
+    Queue depth and wait time metrics of a priority class
+    """
+
+    # Calls waiting for a slot
+    waiting: int
+    # Calls holding a slot
+    running: int
+    # Calls that got a slot since the scheduler was created
+    started: int
+    # Mean seconds waited for a slot
+    mean_wait: float
+    # Maximum seconds waited for a slot
+    max_wait: float
+
+
+class _Waiter:
+    __slots__ = ("priority", "enqueued_at", "granted", "resumed")
+
+    def __init__(self, priority: Priority, enqueued_at: float, resumed: bool) -> None:
+        self.priority = priority
+        self.enqueued_at = enqueued_at
+        self.granted = False
+        # a paused call waiting for its slot again, not a new call
+        self.resumed = resumed
+
+
+class Slot:
+    """
+    Slot of one API call granted by RequestScheduler.slot
+    """
+
+    def __init__(self, scheduler: "RequestScheduler", priority: Priority) -> None:
+        self._scheduler = scheduler
+        self._priority = priority
+        self._held = True
+
+    @property
+    def held(self) -> bool:
+        return self._held
+
+    def pause(self) -> None:
+        """
+        Give the slot back while the call doesn't use its connection, eg
+        while the consumer of a streamed response processes a batch
+        """
+        if self._held:
+            self._held = False
+            self._scheduler._release(self._priority)
+
+    def resume(self) -> None:
+        """
+        Wait for a slot again after pause, without counting a new call
+
+        Raises:
+            DeadlineExceededException: if the deadline expires first
+        """
+        if not self._held:
+            self._scheduler._acquire(self._priority, resumed=True)
+            self._held = True
+
+
+class RequestScheduler:
+    """
+    Thread safe scheduler of API calls, see the module documentation. A
+    client created with a scheduler runs each API call inside slot()
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        reserved_interactive: int = 1,
+        aging: Optional[float] = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Init RequestScheduler
+
+        Args:
+            max_concurrency (int): maximum number of concurrent API calls
+            reserved_interactive (int): slots only INTERACTIVE calls can use
+            aging (Optional[float]): seconds of waiting after which a call is
+            scheduled like a call of the next priority class, strict priority
+            if None
+            clock (Callable[[], float]): monotonic time source in seconds
+
+        Raises:
+            ValueError: if max_concurrency is not larger than
+            reserved_interactive
+        """
+        if max_concurrency <= reserved_interactive:
+            raise ValueError(
+                f"max_concurrency {max_concurrency} should be larger than "
+                f"reserved_interactive {reserved_interactive}"
+            )
+        self._max_concurrency = max_concurrency
+        self._reserved_interactive = reserved_interactive
+        self._aging = aging
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._queues: Dict[Priority, Deque[_Waiter]] = {p: deque() for p in Priority}
+        self._running: Dict[Priority, int] = {p: 0 for p in Priority}
+        self._started: Dict[Priority, int] = {p: 0 for p in Priority}
+        self._total_wait: Dict[Priority, float] = {p: 0.0 for p in Priority}
+        self._max_wait: Dict[Priority, float] = {p: 0.0 for p in Priority}
+
+    @contextmanager
+    def slot(self, priority: Optional[Priority] = None) -> Iterator[Slot]:
+        """
+        Wait for a slot and hold it for the duration of the block, the block
+        can pause and resume the Slot it receives
+
+        Args:
+            priority (Optional[Priority]): priority class of the call,
+            default to current_priority()
+
+        Raises:
+            DeadlineExceededException: if the deadline of the current
+            request_deadline block expires before a slot is granted
+        """
+        priority = priority or current_priority()
+        self._acquire(priority)
+        slot = Slot(self, priority)
+        try:
+            yield slot
+        finally:
+            if slot.held:
+                self._release(priority)
+
+    def stats(self) -> Dict[Priority, PriorityStats]:
+        """
+        Return the metrics of each priority class
+        """
+        with self._condition:
+            return {
+                priority: PriorityStats(
+                    waiting=len(self._queues[priority]),
+                    running=self._running[priority],
+                    started=self._started[priority],
+                    mean_wait=self._total_wait[priority] / self._started[priority]
+                    if self._started[priority]
+                    else 0.0,
+                    max_wait=self._max_wait[priority],
+                )
+                for priority in Priority
+            }
+
+    def _acquire(self, priority: Priority, resumed: bool = False) -> None:
+        with self._condition:
+            waiter = _Waiter(priority, self._clock(), resumed)
+            self._queues[priority].append(waiter)
+            self._dispatch()
+            try:
+                while not waiter.granted:
+                    left = time_left()
+                    if left is not None and left <= 0:
+                        raise DeadlineExceededException(
+                            "Deadline expired waiting for an API call slot"
+                        )
+                    self._condition.wait(left)
+            except BaseException:
+                # an interrupt or the deadline never leaves a slot granted
+                # but unused or a waiter in the queue
+                if waiter.granted:
+                    self._running[priority] -= 1
+                    self._dispatch()
+                else:
+                    self._queues[priority].remove(waiter)
+                raise
+
+    def _release(self, priority: Priority) -> None:
+        with self._condition:
+            self._running[priority] -= 1
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        # grant free slots to the best waiting calls, called with the lock
+        granted = False
+        while True:
+            waiter = self._next_waiter()
+            if waiter is None:
+                break
+            self._queues[waiter.priority].popleft()
+            waiter.granted = True
+            self._running[waiter.priority] += 1
+            granted = True
+            if waiter.resumed:
+                continue
+            waited = self._clock() - waiter.enqueued_at
+            self._started[waiter.priority] += 1
+            self._total_wait[waiter.priority] += waited
+            self._max_wait[waiter.priority] = max(
+                self._max_wait[waiter.priority], waited
+            )
+        if granted:
+            self._condition.notify_all()
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        running = sum(self._running.values())
+        if running >= self._max_concurrency:
+            return None
+        bulk_allowed = running < self._max_concurrency - self._reserved_interactive
+        now = self._clock()
+        best = None
+        best_key = None
+        for priority, queue in self._queues.items():
+            if not queue or (priority != Priority.INTERACTIVE and not bulk_allowed):
+                continue
+            # the head of a queue waited the longest in its class
+            head = queue[0]
+            effective = priority.value
+            if self._aging is not None:
+                effective -= (now - head.enqueued_at) / self._aging
+            key = (effective, head.enqueued_at)
+            if best_key is None or key < best_key:
+                best, best_key = head, key
+        return best
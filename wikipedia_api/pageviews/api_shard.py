@@ -0,0 +1,316 @@
+"""
+Sharded execution of batch jobs across worker processes and machines
+
+The units of a BatchJob are partitioned in shards by a stable hash of their
+article, country or date, so every process or machine computes the same
+partition without coordination. Shards run in a process pool on one
+machine, or on several machines sharing the job directory, each shard
+writing its own checkpoint file. Machines can claim shards through lock
+files in the job directory instead of being assigned shard indexes.
+
+A claim is a claims/shard-<index>-of-<count>.<generation>.lock file created
+exclusively, the highest generation being the current claim. A stale claim
+is taken over by exclusively creating the next generation, so only one of
+the machines racing for it wins. Claims are removed when the shard run
+returns.
+
+Classes:
+    ShardReport
+
+Functions:
+    shard_key
+    shard_of
+    partition_units
+    run_shard
+    run_sharded
+    run_available_shards
+    merge_outputs
+"""
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import os
+import socket
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from wikipedia_api.pageviews.api_batch import BatchJob, BatchReport
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_export import CsvChunkWriter, export_frames
+from wikipedia_api.pageviews.api_types import (
+    PerArticlePageViewRequest,
+    TopViewedPerCountryRequest,
+)
+
+CLAIM_DIR = "claims"
+
+
+class ShardReport(NamedTuple):
+    """
+    Result of running one shard
+    """
+
+    # Index of the shard
+    shard_index: int
+    # Number of units of the shard
+    units: int
+    # Number of units executed
+    executed: int
+    # Number of units that failed and are still pending
+    failed: int
+    # Number of units skipped as known to have no data
+    skipped: int = 0
+    # Number of units rejected because their request is invalid
+    rejected: int = 0
+    # Last error of each unit that failed or was rejected
+    errors: Optional[Dict[str, str]] = None
+
+
+def shard_key(request: tuple) -> str:
+    """
+    Key used to partition a request: the article for per article requests,
+    the country and date for top per country requests and the date range or
+    date for the other requests
+    """
+    if isinstance(request, PerArticlePageViewRequest):
+        return f"article:{request.article}"
+    if isinstance(request, TopViewedPerCountryRequest):
+        return f"country:{request.country}:{request.year}-{request.month}-{request.day}"
+    values = [
+        str(value.name if hasattr(value, "name") else value) for value in request
+    ]
+    return f"{type(request).__name__}:{':'.join(values)}"
+
+
+def shard_of(request: tuple, shard_count: int) -> int:
+    """
+    Stable shard index of a request, identical across processes and machines
+    """
+    digest = hashlib.sha1(shard_key(request).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def partition_units(job: BatchJob, shard_count: int) -> List[List[str]]:
+    """
+    Split the unit ids of a job in shard_count shards
+    """
+    if shard_count <= 0:
+        raise InputException(f"Shard count {shard_count} should be larger than 0")
+    shards: List[List[str]] = [[] for _ in range(shard_count)]
+    for uid, request in job.units.items():
+        shards[shard_of(request, shard_count)].append(uid)
+    return shards
+
+
+def run_shard(
+    directory: str,
+    shard_index: int,
+    shard_count: int,
+    client_factory: Callable[[], object],
+    max_workers: int = 4,
+    progress: Optional[Callable[[str, bool], None]] = None,
+) -> ShardReport:
+    """
+    Run the pending units of one shard of the job in directory
+
+    Args:
+        directory (str): job directory created by BatchJob.create
+        shard_index (int): index of the shard to run
+        shard_count (int): total number of shards
+        client_factory (Callable[[], object]): creates the client of this
+        process, has to be picklable to be used with run_sharded, eg
+        functools.partial(WikipediaPageViewApiClient, project, api_header)
+        max_workers (int): number of concurrent API calls of this shard
+        progress (Optional[Callable[[str, bool], None]]): see BatchJob.run
+
+    Returns:
+        ShardReport: counts of the shard
+    """
+    if not 0 <= shard_index < shard_count:
+        raise InputException(
+            f"Shard index {shard_index} should be between 0 and {shard_count - 1}"
+        )
+    job = BatchJob(directory, writer_id=f"shard-{shard_index}-of-{shard_count}")
+    unit_ids = partition_units(job, shard_count)[shard_index]
+    report = job.run(
+        client_factory(),
+        max_workers=max_workers,
+        unit_ids=unit_ids,
+        progress=progress,
+    )
+    return ShardReport(
+        shard_index,
+        len(unit_ids),
+        report.executed,
+        report.failed,
+        report.skipped,
+        report.rejected,
+        report.errors,
+    )
+
+
+def run_sharded(
+    directory: str,
+    client_factory: Callable[[], object],
+    shard_count: int,
+    processes: Optional[int] = None,
+    max_workers: int = 4,
+) -> BatchReport:
+    """
+    Run every shard of the job in directory on a local process pool, JSON
+    decoding and data frame building of each shard run in its own process
+
+    Args:
+        directory (str): job directory created by BatchJob.create
+        client_factory (Callable[[], object]): picklable factory of the
+        client of each process
+        shard_count (int): number of shards
+        processes (Optional[int]): size of the process pool, default to
+        shard_count
+        max_workers (int): number of concurrent API calls of each shard
+
+    Returns:
+        BatchReport: counts of the whole job after the run
+    """
+    if shard_count <= 0:
+        raise InputException(f"Shard count {shard_count} should be larger than 0")
+    with ProcessPoolExecutor(max_workers=processes or shard_count) as executor:
+        futures = [
+            executor.submit(
+                run_shard, directory, index, shard_count, client_factory, max_workers
+            )
+            for index in range(shard_count)
+        ]
+        reports = [future.result() for future in futures]
+
+    job = BatchJob(directory)
+    errors: Dict[str, str] = {}
+    for report in reports:
+        errors.update(report.errors or {})
+    return BatchReport(
+        total=len(job),
+        completed=len(job.completed_units()),
+        executed=sum(report.executed for report in reports),
+        failed=sum(report.failed for report in reports),
+        skipped=sum(report.skipped for report in reports),
+        rejected=sum(report.rejected for report in reports),
+        errors=errors,
+    )
+
+
+def run_available_shards(
+    directory: str,
+    client_factory: Callable[[], object],
+    shard_count: int,
+    max_workers: int = 4,
+    stale_after: Optional[float] = None,
+) -> List[ShardReport]:
+    """
+    Run the shards no other machine claimed, for machines sharing the job
+    directory. A shard is claimed by creating a lock file, the claim is
+    refreshed after each unit, released when the shard run returns and a
+    claim not refreshed for stale_after seconds is taken over
+
+    Args:
+        directory (str): job directory on a filesystem shared by the machines
+        client_factory (Callable[[], object]): factory of the client
+        shard_count (int): number of shards, the same on every machine
+        max_workers (int): number of concurrent API calls
+        stale_after (Optional[float]): seconds after which the claim of a
+        crashed machine is taken over, claims never expire if None
+
+    Returns:
+        List[ShardReport]: reports of the shards run by this machine
+    """
+    claim_dir = os.path.join(directory, CLAIM_DIR)
+    os.makedirs(claim_dir, exist_ok=True)
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    reports = []
+    for index in range(shard_count):
+        claim_path = _claim(
+            claim_dir, f"shard-{index}-of-{shard_count}", owner, stale_after
+        )
+        if claim_path is None:
+            continue
+
+        def heartbeat(uid: str, succeeded: bool, claim_path=claim_path) -> None:
+            try:
+                os.utime(claim_path)
+            except FileNotFoundError:
+                # the claim was taken over by another machine
+                pass
+
+        try:
+            reports.append(
+                run_shard(
+                    directory,
+                    index,
+                    shard_count,
+                    client_factory,
+                    max_workers=max_workers,
+                    progress=heartbeat,
+                )
+            )
+        finally:
+            # pending units of the shard can be claimed again right away
+            _remove(claim_path)
+    return reports
+
+
+def merge_outputs(directory: str, output_path: str) -> int:
+    """
+    Merge the outputs of every completed unit of the job in one CSV file,
+    one unit output is read at a time
+
+    Returns:
+        int: number of rows written
+    """
+    job = BatchJob(directory)
+    with CsvChunkWriter(output_path) as writer:
+        stats = export_frames(job.iter_results(), writer)
+    return stats.rows
+
+
+def _claim(
+    claim_dir: str, name: str, owner: str, stale_after: Optional[float]
+) -> Optional[str]:
+    # return the path of the claim file created, None if the shard is claimed
+    generations = []
+    for file_name in os.listdir(claim_dir):
+        prefix, _, generation = file_name[: -len(".lock")].rpartition(".")
+        if prefix == name and file_name.endswith(".lock") and generation.isdigit():
+            generations.append(int(generation))
+
+    generation = 0
+    if generations:
+        if stale_after is None:
+            return None
+        latest = os.path.join(claim_dir, f"{name}.{max(generations)}.lock")
+        try:
+            age = time.time() - os.path.getmtime(latest)
+        except FileNotFoundError:
+            return _claim(claim_dir, name, owner, stale_after)
+        if age < stale_after:
+            return None
+        # take over the stale claim, the shard checkpoint makes it safe to
+        # resume the units the previous owner didn't complete
+        generation = max(generations) + 1
+
+    claim_path = os.path.join(claim_dir, f"{name}.{generation}.lock")
+    try:
+        fd = os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        # another machine claimed or took over the shard first
+        return None
+    with os.fdopen(fd, "w") as f:
+        f.write(owner)
+    for previous in generations:
+        if previous < generation:
+            _remove(os.path.join(claim_dir, f"{name}.{previous}.lock"))
+    return claim_path
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
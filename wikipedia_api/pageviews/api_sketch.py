@@ -0,0 +1,213 @@
+"""
+Top-k rankings over many top view results
+
+Ranking the articles of a long date range sums the views of every daily top
+list. The exact mode keeps the total of every article ever seen, the
+approximate mode keeps a Space-Saving heavy-hitter sketch of bounded size
+instead: at most capacity counters, each count overestimating the true
+total by at most its reported error, and every article whose total is above
+the sum of all views divided by capacity is guaranteed to be kept.
+
+Classes:
+    HeavyHitter
+    SpaceSaving
+
+Functions:
+    rank_frames
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence
+
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_lazy import pandas as pd
+
+
+class HeavyHitter(NamedTuple):
+    """
+    Entry of a SpaceSaving sketch, the true count of key is between
+    count - error and count
+    """
+
+    # Counted item
+    key: Hashable
+    # Estimated count, never lower than the true count
+    count: int
+    # Maximum overestimation of count
+    error: int
+
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving sketch keeping at most capacity counters. An item
+    missing from the sketch takes over the counter of the smallest count,
+    which becomes its error
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise InputException(f"Capacity {capacity} should be larger than 0")
+        self._capacity = capacity
+        # key -> [count, error]
+        self._counters: Dict[Hashable, List[int]] = {}
+        # min-heap of (count, sequence, key), entries whose count is not the
+        # current count of key are stale and skipped
+        self._heap: list = []
+        self._sequence = 0
+        self._total = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def total(self) -> int:
+        """
+        Sum of the weights of every update
+        """
+        return self._total
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._counters
+
+    def update(self, key: Hashable, weight: int = 1) -> None:
+        """
+        Add weight to the count of key
+        """
+        self._total += weight
+        counter = self._counters.get(key)
+        if counter is not None:
+            counter[0] += weight
+        elif len(self._counters) < self._capacity:
+            counter = self._counters[key] = [weight, 0]
+        else:
+            minimum, min_key = self._pop_min()
+            del self._counters[min_key]
+            counter = self._counters[key] = [minimum + weight, minimum]
+        self._push(counter[0], key)
+
+    def update_many(self, keys: Iterable[Hashable], weights: Iterable[int]) -> None:
+        """
+        Add each weight to the count of the key at the same position
+        """
+        for key, weight in zip(keys, weights):
+            self.update(key, int(weight))
+
+    def top(self, k: Optional[int] = None) -> List[HeavyHitter]:
+        """
+        Return the k entries of largest count, all entries if k is None
+        """
+        entries = [
+            HeavyHitter(key, count, error)
+            for key, (count, error) in self._counters.items()
+        ]
+        entries.sort(key=lambda entry: entry.count, reverse=True)
+        return entries if k is None else entries[:k]
+
+    def guaranteed_threshold(self) -> float:
+        """
+        Every item whose true count is above this value is in the sketch
+        """
+        return self._total / self._capacity
+
+    def _push(self, count: int, key: Hashable) -> None:
+        self._sequence += 1
+        heapq.heappush(self._heap, (count, self._sequence, key))
+        if len(self._heap) > 4 * self._capacity:
+            # drop the stale entries
+            self._heap = [
+                (counter[0], index, key)
+                for index, (key, counter) in enumerate(self._counters.items())
+            ]
+            heapq.heapify(self._heap)
+            self._sequence = len(self._heap)
+
+    def _pop_min(self):
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            counter = self._counters.get(key)
+            if counter is not None and counter[0] == count:
+                return count, key
+
+
+# Number of per frame sums merged at once by the exact mode
+_MERGE_BATCH = 32
+
+
+def _merge_sums(partials: List[pd.Series], key_columns: List[str]) -> pd.Series:
+    if len(partials) == 1:
+        return partials[0]
+    return pd.concat(partials).groupby(level=list(range(len(key_columns)))).sum()
+
+
+def rank_frames(
+    frames: Iterable[pd.DataFrame],
+    top_n: int,
+    key_columns: Sequence[str] = ("project", "article"),
+    value_column: str = "views_ceil",
+    capacity: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Sum value_column by key_columns over frames and rank the top_n keys.
+    Frames are consumed one at a time so they can be streamed
+
+    Args:
+        frames (Iterable[pd.DataFrame]): top view results, eg the daily
+        results of get_top_view_per_country
+        top_n (int): number of ranked keys
+        key_columns (Sequence[str]): columns identifying a ranked item
+        value_column (str): column summed
+        capacity (Optional[int]): counters of the Space-Saving sketch of
+        the approximate mode, exact totals of every key if None
+
+    Raises:
+        InputException: if top_n is not positive or capacity is smaller
+        than top_n
+
+    Returns:
+        pd.DataFrame: key_columns, value_column, "error" (maximum
+        overestimation of value_column, 0 in exact mode) and "rank" columns,
+        sorted by rank
+    """
+    if top_n <= 0:
+        raise InputException(f"top_n {top_n} should be larger than 0")
+    if capacity is not None and capacity < top_n:
+        raise InputException(f"capacity {capacity} should not be smaller than top_n")
+    key_columns = list(key_columns)
+    columns = key_columns + [value_column, "error", "rank"]
+
+    if capacity is None:
+        # partial sums are merged by batches of frames, one groupby each
+        partials: List[pd.Series] = []
+        for frame in frames:
+            if frame.empty:
+                continue
+            partials.append(frame.groupby(key_columns)[value_column].sum())
+            if len(partials) >= _MERGE_BATCH:
+                partials = [_merge_sums(partials, key_columns)]
+        if not partials:
+            return pd.DataFrame(columns=columns)
+        totals = _merge_sums(partials, key_columns)
+        ranked = totals.sort_values(ascending=False, kind="stable").head(top_n)
+        df = ranked.astype("int64").reset_index()
+        df["error"] = 0
+    else:
+        sketch = SpaceSaving(capacity)
+        for frame in frames:
+            if frame.empty:
+                continue
+            keys = zip(*(frame[column] for column in key_columns))
+            sketch.update_many(keys, frame[value_column])
+        entries = sketch.top(top_n)
+        if not entries:
+            return pd.DataFrame(columns=columns)
+        df = pd.DataFrame(list(entry.key for entry in entries), columns=key_columns)
+        df[value_column] = [entry.count for entry in entries]
+        df["error"] = [entry.error for entry in entries]
+
+    df["rank"] = range(1, len(df) + 1)
+    return df[columns]
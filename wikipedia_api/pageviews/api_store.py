@@ -0,0 +1,421 @@
+"""
+Memory-mapped store of per article daily page view series
+
+Daily page views since PageViewApiValidDateRange.PAGEVIEW_API_START_DATE
+have a fixed width layout: one row per article and one column per day, so
+the series of every article are kept in a single memory-mapped numpy file
+and any date range is read as a zero-copy view computed from offsets.
+
+Files in the store directory:
+    values.npy: 2-D array of shape (row capacity, day capacity)
+    filled.npy: number of days already filled for each row
+    articles.json: article title of each row
+    metadata.json: Wikipedia project of the articles
+
+Classes:
+    DailySeriesStore
+"""
+from datetime import datetime, timedelta
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from wikipedia_api.pageviews.api_constants import PageViewApiValidDateRange
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_scheduler import Priority, request_priority
+from wikipedia_api.pageviews.api_types import (
+    AccessMethod,
+    AgentType,
+    ArticleMatrixRequest,
+    Granularity,
+)
+from wikipedia_api.pageviews.api_utils import parse_time_parameter
+
+DateLike = Union[datetime, str]
+
+
+class DailySeriesStore:
+    """
+    Dense memory-mapped store of daily page views, one row per article and
+    one column per day starting at PAGEVIEW_API_START_DATE. Reading a date
+    range of any article is an offset computation returning a view of the
+    memory-mapped file, new days are appended from the client with
+    update_from_client
+    """
+
+    ORIGIN: datetime = PageViewApiValidDateRange.PAGEVIEW_API_START_DATE
+    VALUES_FILE = "values.npy"
+    FILLED_FILE = "filled.npy"
+    ARTICLES_FILE = "articles.json"
+    METADATA_FILE = "metadata.json"
+
+    def __init__(
+        self,
+        directory: str,
+        dtype=np.int64,
+        initial_rows: int = 1024,
+        initial_days: Optional[int] = None,
+        project: Optional[str] = None,
+    ) -> None:
+        """
+        Open the store in directory, create an empty one if it doesn't exist
+
+        Args:
+            directory (str): directory of the store files
+            dtype: numpy dtype of the values when creating a new store
+            initial_rows (int): number of article rows allocated up front
+            initial_days (Optional[int]): number of day columns allocated up
+            front, default to one year after today
+            project (Optional[str]): Wikipedia project of the articles, eg
+            en.wikipedia, default to the project stored or to the project of
+            the first client updating the store
+
+        Raises:
+            InputException: if the store holds the articles of another project
+        """
+        self._directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+        values_path = os.path.join(directory, self.VALUES_FILE)
+        if os.path.exists(values_path):
+            self._values = np.load(values_path, mmap_mode="r+")
+            self._filled = np.load(
+                os.path.join(directory, self.FILLED_FILE), mmap_mode="r+"
+            )
+            with open(os.path.join(directory, self.ARTICLES_FILE)) as f:
+                self._articles = json.load(f)
+        else:
+            if initial_days is None:
+                initial_days = (datetime.now() - self.ORIGIN).days + 366
+            self._values = np.lib.format.open_memmap(
+                values_path,
+                mode="w+",
+                dtype=np.dtype(dtype),
+                shape=(max(initial_rows, 1), max(initial_days, 1)),
+            )
+            self._filled = np.lib.format.open_memmap(
+                os.path.join(directory, self.FILLED_FILE),
+                mode="w+",
+                dtype=np.int32,
+                shape=(max(initial_rows, 1),),
+            )
+            self._articles = []
+            self._save_articles()
+
+        self._rows: Dict[str, int] = {
+            article: row for row, article in enumerate(self._articles)
+        }
+
+        self._project: Optional[str] = None
+        metadata_path = os.path.join(directory, self.METADATA_FILE)
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as f:
+                self._project = json.load(f)["project"]
+        if project is not None:
+            self._check_project(project)
+
+    @property
+    def articles(self) -> List[str]:
+        return list(self._articles)
+
+    @property
+    def project(self) -> Optional[str]:
+        return self._project
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._values.dtype
+
+    def __len__(self) -> int:
+        return len(self._articles)
+
+    def __contains__(self, article: str) -> bool:
+        return article in self._rows
+
+    def row_of(self, article: str) -> int:
+        """
+        Return the row of an article
+
+        Raises:
+            InputException: if the article is not in the store
+        """
+        try:
+            return self._rows[article]
+        except KeyError:
+            raise InputException(f"Article {article} is not in the store")
+
+    def day_offset(self, date: DateLike) -> int:
+        """
+        Return the column of a date, date can be a datetime or a string in
+        YYYYMMDD format
+        """
+        if isinstance(date, str):
+            date = parse_time_parameter(date)
+        offset = (datetime(date.year, date.month, date.day) - self.ORIGIN).days
+        if offset < 0:
+            raise InputException(
+                f"Data before {self.ORIGIN.strftime('%Y%m%d')} is not available"
+            )
+        return offset
+
+    def filled_through(self, article: str) -> Optional[datetime]:
+        """
+        Return the last day stored for an article, None if nothing is stored
+        """
+        filled = int(self._filled[self.row_of(article)])
+        if filled == 0:
+            return None
+        return self.ORIGIN + timedelta(days=filled - 1)
+
+    def add_articles(self, articles: Iterable[str]) -> List[int]:
+        """
+        Add articles to the store, return the row of each article, existing
+        articles keep their row
+        """
+        rows = []
+        added = False
+        for article in articles:
+            row = self._rows.get(article)
+            if row is None:
+                row = len(self._articles)
+                self._articles.append(article)
+                self._rows[article] = row
+                added = True
+            rows.append(row)
+
+        if len(self._articles) > self._values.shape[0]:
+            row_capacity = self._values.shape[0]
+            while row_capacity < len(self._articles):
+                row_capacity *= 2
+            self._resize(row_capacity, self._values.shape[1])
+        if added:
+            self._save_articles()
+        return rows
+
+    def read(self, article: str, start_time: DateLike, end_time: DateLike) -> np.ndarray:
+        """
+        Return the daily views of an article between start_time and end_time
+        inclusive, the result is a view of the memory-mapped file
+        """
+        start, end = self._column_range(start_time, end_time)
+        return self._values[self.row_of(article), start:end]
+
+    def read_many(
+        self, articles: Iterable[str], start_time: DateLike, end_time: DateLike
+    ) -> np.ndarray:
+        """
+        Return the daily views of several articles between start_time and
+        end_time inclusive, one row per article. Use window to get a
+        zero-copy view of all the articles
+        """
+        start, end = self._column_range(start_time, end_time)
+        rows = [self.row_of(article) for article in articles]
+        return self._values[rows, start:end]
+
+    def window(self, start_time: DateLike, end_time: DateLike) -> np.ndarray:
+        """
+        Return the daily views of every article between start_time and
+        end_time inclusive, rows follow the order of the articles property.
+        The result is a view of the memory-mapped file
+        """
+        start, end = self._column_range(start_time, end_time)
+        return self._values[: len(self._articles), start:end]
+
+    def write(self, article: str, start_time: DateLike, values: np.ndarray) -> None:
+        """
+        Write the daily views of an article starting at start_time, the
+        article is added to the store if needed
+        """
+        row = self.add_articles([article])[0]
+        start = self.day_offset(start_time)
+        self._write_block([row], start, np.asarray(values).reshape(1, -1))
+
+    def update_from_client(
+        self,
+        client,
+        access: AccessMethod = AccessMethod.ALL,
+        agent: AgentType = AgentType.ALL,
+        end_time: Optional[DateLike] = None,
+        max_workers: int = 4,
+    ) -> int:
+        """
+        Append the days closed since the last update for every article of the
+        store, articles added since the last update are backfilled from
+        PAGEVIEW_API_START_DATE. Articles not fetched before the client's
+        deadline are left unchanged, articles fetched without data are
+        marked filled up to the last published day so they aren't fetched
+        from PAGEVIEW_API_START_DATE again. The API calls are made with BULK
+        priority
+
+        Args:
+            client (WikipediaPageViewApiClient): client used to fetch the
+            per article page views
+            access (AccessMethod): Access Method to filter page view data
+            agent (AgentType): Agent Type to filter page view data
+            end_time (Optional[DateLike]): last day to fetch, default to
+            yesterday which is the last closed day
+            max_workers (int): number of concurrent API calls
+
+        Raises:
+            InputException: if the client is not a client of the project of
+            the store
+
+        Returns:
+            int: number of articles updated
+        """
+        self._check_project(client.project)
+        if end_time is None:
+            end_time = datetime.now() - timedelta(days=1)
+        end = self.day_offset(end_time)
+        # days older than the publication lag are final, a day the API
+        # doesn't return for them has no data
+        published_end = (
+            self.day_offset(datetime.now() - PageViewApiValidDateRange.PUBLICATION_LAG)
+            + 1
+        )
+
+        # articles filled up to the same day are fetched with one request
+        groups: Dict[int, List[int]] = {}
+        for row in range(len(self._articles)):
+            filled = int(self._filled[row])
+            if filled <= end:
+                groups.setdefault(filled, []).append(row)
+
+        updated = 0
+        for start, rows in groups.items():
+            request = ArticleMatrixRequest(
+                access=access,
+                agent=agent,
+                articles=[self._articles[row] for row in rows],
+                granularity=Granularity.DAILY,
+                start_time=(self.ORIGIN + timedelta(days=start)).strftime("%Y%m%d"),
+                end_time=(self.ORIGIN + timedelta(days=end)).strftime("%Y%m%d"),
+            )
+            # NaN marks the days the API didn't return, each row is only
+            # filled up to its last returned day so later days are refetched,
+            # rows without any returned day up to the last published day
+            with request_priority(Priority.BULK):
+                matrix = client.get_per_article_pageviews_matrix(
+                    request, dtype=np.float64, fill_nan=True, max_workers=max_workers
+                )
+            # rows not fetched before the deadline keep their values
+            missing = set(matrix.missing)
+            fetched = [
+                index
+                for index, article in enumerate(request.articles)
+                if article not in missing
+            ]
+            if not fetched:
+                continue
+            values = matrix.values[fetched]
+            returned = ~np.isnan(values)
+            last_day = np.where(
+                returned.any(axis=1),
+                values.shape[1] - np.argmax(returned[:, ::-1], axis=1),
+                max(min(end + 1, published_end) - start, 0),
+            )
+            self._write_block(
+                [rows[index] for index in fetched],
+                start,
+                np.where(returned, values, 0).astype(self._values.dtype),
+                filled=start + last_day,
+            )
+            updated += len(fetched)
+        self.flush()
+        return updated
+
+    def flush(self) -> None:
+        """
+        Flush the memory-mapped files to disk
+        """
+        self._values.flush()
+        self._filled.flush()
+
+    def _check_project(self, project: str) -> None:
+        # record the project of a store without one, reject another project
+        if self._project is None:
+            self._project = project
+            path = os.path.join(self._directory, self.METADATA_FILE)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"project": project}, f)
+            os.replace(tmp_path, path)
+        elif project != self._project:
+            raise InputException(
+                f"The store holds articles of {self._project}, not of {project}"
+            )
+
+    def _column_range(self, start_time: DateLike, end_time: DateLike):
+        start = self.day_offset(start_time)
+        end = self.day_offset(end_time) + 1
+        if start >= end:
+            raise InputException("start time should not later than end time")
+        if end > self._values.shape[1]:
+            last_day = self.ORIGIN + timedelta(days=self._values.shape[1] - 1)
+            raise InputException(
+                f"Data after {last_day.strftime('%Y%m%d')} is not in the store"
+            )
+        return start, end
+
+    def _write_block(
+        self,
+        rows: List[int],
+        start: int,
+        values: np.ndarray,
+        filled: Optional[np.ndarray] = None,
+    ) -> None:
+        # filled: end column of the days known for each row, default to the
+        # end of the block
+        end = start + values.shape[1]
+        if end > self._values.shape[1]:
+            day_capacity = self._values.shape[1]
+            while day_capacity < end:
+                day_capacity *= 2
+            self._resize(self._values.shape[0], day_capacity)
+        if rows == list(range(rows[0], rows[0] + len(rows))):
+            self._values[rows[0]: rows[0] + len(rows), start:end] = values
+        else:
+            self._values[np.asarray(rows)[:, None], np.arange(start, end)] = values
+        self._filled[rows] = np.maximum(
+            self._filled[rows], end if filled is None else filled
+        )
+
+    def _resize(self, row_capacity: int, day_capacity: int) -> None:
+        # the grown arrays are written to temporary files first, the current
+        # files are unmapped before being replaced as a mapped file can't be
+        # replaced on Windows
+        replaced = []
+        for name, old, shape in (
+            (self.VALUES_FILE, self._values, (row_capacity, day_capacity)),
+            (self.FILLED_FILE, self._filled, (row_capacity,)),
+        ):
+            path = os.path.join(self._directory, name)
+            tmp_path = path + ".tmp"
+            new = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=old.dtype, shape=shape
+            )
+            new[tuple(slice(0, size) for size in old.shape)] = old
+            new.flush()
+            del new
+            replaced.append((tmp_path, path))
+        del old
+        self._values.flush()
+        self._filled.flush()
+        self._values = self._filled = None
+        for tmp_path, path in replaced:
+            os.replace(tmp_path, path)
+        self._values = np.load(
+            os.path.join(self._directory, self.VALUES_FILE), mmap_mode="r+"
+        )
+        self._filled = np.load(
+            os.path.join(self._directory, self.FILLED_FILE), mmap_mode="r+"
+        )
+
+    def _save_articles(self) -> None:
+        path = os.path.join(self._directory, self.ARTICLES_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._articles, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,159 @@
+"""
+Incremental parsing of Wikipedia Page View API responses
+
+The page view API returns every record inside a single top level "items"
+array, a multi-year hourly response can be hundreds of megabytes. Functions
+in this module decode the array element by element from the response stream
+so only one network chunk and one batch of records are kept in memory.
+
+Functions:
+    iter_json_array_items
+    iter_record_batches
+    stream_api_call
+"""
+import codecs
+import json
+from typing import Iterable, Iterator, List, Union
+
+import requests
+
+from wikipedia_api.pageviews.api_deadline import remaining_timeout
+from wikipedia_api.pageviews.api_utils import check_response_status
+
+_WHITESPACE = " \t\n\r"
+_DECODER = json.JSONDecoder()
+
+
+def iter_json_array_items(
+    chunks: Iterable[Union[bytes, str]], key: str = "items"
+) -> Iterator[dict]:
+    """
+    Decode the elements of the array stored under the top level key of a
+    json object, reading the json document chunk by chunk
+
+    Args:
+        chunks (Iterable[Union[bytes, str]]): json document split in chunks,
+        bytes chunks are decoded as utf-8
+        key (str): top level key of the array to decode
+
+    Yields:
+        dict: each element of the array in document order
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    # state used while looking for the key before the array is reached
+    depth = 0
+    in_string = False
+    escaped = False
+    string_chars = []
+    last_string = None
+    expect_value = False
+    in_array = False
+
+    def text_chunks():
+        for chunk in chunks:
+            if isinstance(chunk, bytes):
+                chunk = decoder.decode(chunk)
+            if chunk:
+                yield chunk
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    stream = text_chunks()
+    exhausted = False
+    while True:
+        if pos >= len(buffer):
+            if exhausted:
+                return
+            try:
+                buffer = buffer[pos:] + next(stream)
+                pos = 0
+            except StopIteration:
+                exhausted = True
+            continue
+
+        if not in_array:
+            char = buffer[pos]
+            if in_string:
+                if escaped:
+                    escaped = False
+                    string_chars.append(char)
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+                    last_string = "".join(string_chars)
+                else:
+                    string_chars.append(char)
+            elif char == '"':
+                in_string = True
+                string_chars = []
+            elif char in "{[":
+                if expect_value and char == "[" and depth == 1:
+                    in_array = True
+                else:
+                    depth += 1
+                expect_value = False
+            elif char in "}]":
+                depth -= 1
+            elif char == ":":
+                expect_value = depth == 1 and last_string == key
+            elif char not in _WHITESPACE:
+                expect_value = False
+            pos += 1
+            continue
+
+        # Inside the array: skip separators then decode one element
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE + ",":
+            pos += 1
+        if pos >= len(buffer):
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            item, end = _DECODER.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if exhausted:
+                raise
+            try:
+                buffer = buffer[pos:] + next(stream)
+                pos = 0
+            except StopIteration:
+                exhausted = True
+            continue
+        yield item
+        pos = end
+
+
+def iter_record_batches(
+    records: Iterable[dict], batch_size: int
+) -> Iterator[List[dict]]:
+    """
+    Group records into lists of batch_size records, the last batch may be
+    smaller
+    """
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_api_call(
+    endpoint: str, api_header: dict, parameters: dict, chunk_size: int = 65536
+) -> Iterator[dict]:
+    """
+    Streaming version of rest_api_call, yields the records of the "items"
+    array while the response body is being downloaded
+    """
+    url = endpoint.format(**parameters)
+    with requests.get(
+        url, headers=api_header, stream=True, timeout=remaining_timeout()
+    ) as call:
+        check_response_status(call.status_code, url)
+        yield from iter_json_array_items(call.iter_content(chunk_size=chunk_size))
@@ -0,0 +1,133 @@
+"""
+Article title normalization and URL encoding
+
+The page view API expects article titles with underscores instead of
+spaces, an upper case first letter on most projects and percent encoded in
+the URL path. Titles are taken literally, a title containing "%20" is not
+a title with a space, titles the caller already percent encoded are passed
+with encoded=True to be decoded first. Titles are normalized once per
+distinct title in a bounded memo cache, so bulk jobs repeating the same
+titles across date ranges and projects don't pay the normalization again,
+and batches of titles are deduplicated and mapped back to the caller's
+original titles.
+
+Classes:
+    TitleBatch
+
+Functions:
+    is_case_sensitive
+    normalize_title
+    encode_title
+    normalize_titles
+    title_cache_info
+    clear_title_cache
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+from urllib.parse import quote, unquote
+
+# Maximum number of distinct titles kept in the memo cache
+TITLE_CACHE_SIZE = 1 << 20
+
+# Projects where the first letter of a title is case sensitive
+CASE_SENSITIVE_PROJECTS = ("wiktionary",)
+
+
+class TitleBatch(NamedTuple):
+    """
+    Normalized batch of article titles
+    """
+
+    # Distinct encoded titles in the order they first appear
+    encoded: List[str]
+    # Original titles of each encoded title, several spellings of a title
+    # share the same encoded title
+    originals: Dict[str, List[str]]
+
+    def encoded_of(self) -> Dict[str, str]:
+        """
+        Map each original title to its encoded title
+        """
+        return {
+            original: encoded
+            for encoded, originals in self.originals.items()
+            for original in originals
+        }
+
+
+def is_case_sensitive(project: str) -> bool:
+    """
+    Whether the first letter of titles of the project is case sensitive
+    """
+    return any(name in project for name in CASE_SENSITIVE_PROJECTS)
+
+
+@lru_cache(maxsize=TITLE_CACHE_SIZE)
+def _normalize_and_encode(
+    title: str, capitalize: bool, encoded: bool
+) -> Tuple[str, str]:
+    # titles already percent encoded by the caller are decoded first so they
+    # are not encoded twice
+    if encoded:
+        title = unquote(title)
+    normalized = "_".join(title.replace("_", " ").split())
+    if capitalize and normalized:
+        normalized = normalized[0].upper() + normalized[1:]
+    return normalized, quote(normalized, safe="")
+
+
+def normalize_title(title: str, capitalize: bool = True, encoded: bool = False) -> str:
+    """
+    Normalize an article title: decode percent escapes if encoded is set,
+    trim and collapse whitespace, replace spaces with underscores and upper
+    case the first letter if capitalize is set, eg " albert  Einstein" ->
+    "Albert_Einstein"
+    """
+    return _normalize_and_encode(title, capitalize, encoded)[0]
+
+
+def encode_title(title: str, capitalize: bool = True, encoded: bool = False) -> str:
+    """
+    Normalize an article title and percent encode it for the URL path,
+    slashes included, eg "AC/DC" -> "AC%2FDC". Set encoded for a title
+    already percent encoded so it is not encoded twice
+    """
+    return _normalize_and_encode(title, capitalize, encoded)[1]
+
+
+def normalize_titles(
+    titles: Iterable[str], capitalize: bool = True, encoded: bool = False
+) -> TitleBatch:
+    """
+    Normalize and encode a batch of titles, each distinct title is
+    normalized once
+
+    Args:
+        titles (Iterable[str]): article titles as given by the caller
+        capitalize (bool): upper case the first letter of the titles
+        encoded (bool): the titles are already percent encoded
+
+    Returns:
+        TitleBatch: distinct encoded titles and their original titles
+    """
+    originals: Dict[str, List[str]] = {}
+    seen = set()
+    for title in titles:
+        if title in seen:
+            continue
+        seen.add(title)
+        originals.setdefault(encode_title(title, capitalize, encoded), []).append(
+            title
+        )
+    return TitleBatch(list(originals), originals)
+
+
+def title_cache_info():
+    """
+    Hits, misses and size of the title memo cache
+    """
+    return _normalize_and_encode.cache_info()
+
+
+def clear_title_cache() -> None:
+    _normalize_and_encode.cache_clear()
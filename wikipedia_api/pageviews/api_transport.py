@@ -0,0 +1,320 @@
+"""
+Pluggable HTTP transports of the Wikipedia Page View API client
+
+The client sends its requests through a Transport, by default the
+module level requests calls of api_utils. RequestsTransport and
+Urllib3Transport keep a connection pool, FakeTransport serves canned
+payloads in process so the client can be tested and benchmarked without
+network.
+
+Classes:
+    TransportResponse
+    TransportStream
+    Transport
+    RequestsTransport
+    Urllib3Transport
+    FakeTransport
+
+Functions:
+    iter_body_chunks
+    transport_api_call
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import (
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Union,
+)
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+
+from wikipedia_api.pageviews.api_deadline import remaining_timeout
+from wikipedia_api.pageviews.api_types import ApiResponse
+from wikipedia_api.pageviews.api_utils import (
+    check_response_status,
+    conditional_headers,
+    to_api_response,
+)
+
+
+class TransportResponse(NamedTuple):
+    """
+    Raw HTTP response returned by a transport
+    """
+
+    # HTTP status code
+    status_code: int
+    # Response headers
+    headers: Dict[str, str]
+    # Response body
+    body: bytes
+
+    def json(self) -> dict:
+        return json.loads(self.body)
+
+
+class TransportStream:
+    """
+    Streamed HTTP response returned by a transport once the status and the
+    headers are received. Iterating it raises for error statuses then yields
+    the body in chunks while it is downloaded, the raw chunks are available
+    whatever the status. Use as a context manager or call close to release
+    the connection of a body not read to the end
+    """
+
+    def __init__(
+        self,
+        url: str,
+        status_code: int,
+        headers: Dict[str, str],
+        chunks: Iterator[bytes],
+        close: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """
+        Init TransportStream
+
+        Args:
+            url (str): requested URL
+            status_code (int): HTTP status code
+            headers (Dict[str, str]): response headers
+            chunks (Iterator[bytes]): response body in chunks
+            close (Optional[Callable[[], None]]): releases the connection
+        """
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.chunks = chunks
+        self._close = close
+
+    def __iter__(self) -> Iterator[bytes]:
+        check_response_status(self.status_code, self.url)
+        return iter(self.chunks)
+
+    def close(self) -> None:
+        if hasattr(self.chunks, "close"):
+            self.chunks.close()
+        if self._close is not None:
+            self._close()
+
+    def __enter__(self) -> "TransportStream":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def iter_body_chunks(body: bytes, chunk_size: int) -> Iterator[bytes]:
+    """
+    Split a response body already in memory in chunks
+    """
+    for start in range(0, len(body), chunk_size):
+        yield body[start : start + chunk_size]
+
+
+class Transport(Protocol):
+    """
+    Interface of the HTTP transports accepted by the client
+    """
+
+    def get(self, url: str, headers: dict) -> TransportResponse:
+        """
+        Send a GET request and return the whole response
+        """
+        ...
+
+    def stream(self, url: str, headers: dict, chunk_size: int) -> TransportStream:
+        """
+        Send a GET request and return the response once its status and
+        headers are received, the body is read in chunks of chunk_size
+        bytes while iterating it
+        """
+        ...
+
+
+def transport_api_call(
+    transport: Transport,
+    endpoint: str,
+    api_header: dict,
+    parameters: dict,
+    validators: Optional[Dict[str, str]] = None,
+) -> ApiResponse:
+    """
+    conditional_api_call sent through a transport
+
+    Raises:
+        NotFoundException: for 404 response
+        ApiException: for other error responses
+    """
+    url = endpoint.format(**parameters)
+    response = transport.get(url, conditional_headers(api_header, validators))
+    return to_api_response(
+        response.status_code, response.headers, response.json, url, validators
+    )
+
+
+class RequestsTransport:
+    """
+    Transport sending requests through a requests Session, connections are
+    kept alive and reused across calls
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None) -> None:
+        self._session = session or requests.Session()
+
+    def get(self, url: str, headers: dict) -> TransportResponse:
+        call = self._session.get(url, headers=headers, timeout=remaining_timeout())
+        return TransportResponse(call.status_code, call.headers, call.content)
+
+    def stream(self, url: str, headers: dict, chunk_size: int) -> TransportStream:
+        call = self._session.get(
+            url, headers=headers, stream=True, timeout=remaining_timeout()
+        )
+
+        def chunks() -> Iterator[bytes]:
+            with call:
+                yield from call.iter_content(chunk_size=chunk_size)
+
+        return TransportStream(
+            url, call.status_code, call.headers, chunks(), close=call.close
+        )
+
+    def close(self) -> None:
+        self._session.close()
+
+
+class Urllib3Transport:
+    """
+    Transport sending requests with urllib3 directly, without the overhead
+    of the requests layer
+    """
+
+    def __init__(
+        self,
+        pool_manager: Optional[urllib3.PoolManager] = None,
+        maxsize: int = 10,
+    ) -> None:
+        """
+        Init Urllib3Transport
+
+        Args:
+            pool_manager (Optional[urllib3.PoolManager]): pool manager to use,
+            default to a new one
+            maxsize (int): connections kept per host by the default pool
+            manager, should match the number of concurrent calls
+        """
+        self._pool = pool_manager or urllib3.PoolManager(maxsize=maxsize)
+
+    def get(self, url: str, headers: dict) -> TransportResponse:
+        call = self._pool.request(
+            "GET", url, headers=headers, timeout=remaining_timeout()
+        )
+        return TransportResponse(call.status, call.headers, call.data)
+
+    def stream(self, url: str, headers: dict, chunk_size: int) -> TransportStream:
+        call = self._pool.request(
+            "GET",
+            url,
+            headers=headers,
+            preload_content=False,
+            timeout=remaining_timeout(),
+        )
+
+        def chunks() -> Iterator[bytes]:
+            try:
+                yield from call.stream(chunk_size)
+            finally:
+                call.release_conn()
+
+        return TransportStream(
+            url, call.status, call.headers, chunks(), close=call.release_conn
+        )
+
+    def close(self) -> None:
+        self._pool.clear()
+
+
+class FakeTransport:
+    """
+    In process transport serving canned JSON payloads, for tests and
+    benchmarks without network. Payloads are keyed by URL or by URL path and
+    encoded once when added, unknown URLs are answered with 404. Responses
+    carry an ETag and conditional requests are answered with 304
+    """
+
+    def __init__(
+        self,
+        payloads: Optional[Dict[str, Union[dict, bytes]]] = None,
+        handler: Optional[Callable[[str], Optional[dict]]] = None,
+        latency: float = 0.0,
+    ) -> None:
+        """
+        Init FakeTransport
+
+        Args:
+            payloads (Optional[Dict[str, Union[dict, bytes]]]): response of
+            each URL or URL path, as a dict or an encoded JSON body
+            handler (Optional[Callable[[str], Optional[dict]]]): called with
+            the URL of requests missing from payloads, returns the response
+            or None for 404
+            latency (float): seconds each request sleeps, to simulate the
+            network round trip, requests whose timeout is shorter raise
+            requests.exceptions.ReadTimeout once it has elapsed
+        """
+        self._payloads: Dict[str, bytes] = {}
+        self._handler = handler
+        self._latency = latency
+        self._lock = threading.Lock()
+        # URL of every request received
+        self.calls: List[str] = []
+        for key, data in (payloads or {}).items():
+            self.add(key, data)
+
+    def add(self, key: str, data: Union[dict, bytes]) -> None:
+        """
+        Serve data as the response of a URL or URL path
+        """
+        body = data if isinstance(data, bytes) else json.dumps(data).encode("utf-8")
+        with self._lock:
+            self._payloads[key] = body
+
+    def get(self, url: str, headers: dict) -> TransportResponse:
+        timeout = remaining_timeout()
+        with self._lock:
+            self.calls.append(url)
+            body = self._payloads.get(url)
+            if body is None:
+                body = self._payloads.get(urlsplit(url).path)
+        if body is None and self._handler is not None:
+            data = self._handler(url)
+            if data is not None:
+                body = json.dumps(data).encode("utf-8")
+        if self._latency > 0:
+            time.sleep(min(self._latency, timeout))
+            if self._latency > timeout:
+                raise requests.exceptions.ReadTimeout(f"{url} timed out")
+        if body is None:
+            return TransportResponse(404, {}, b'{"title": "Not found."}')
+
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if headers.get("If-None-Match") == etag:
+            return TransportResponse(304, {"ETag": etag}, b"")
+        return TransportResponse(200, {"ETag": etag}, body)
+
+    def stream(self, url: str, headers: dict, chunk_size: int) -> TransportStream:
+        response = self.get(url, headers)
+        return TransportStream(
+            url,
+            response.status_code,
+            response.headers,
+            iter_body_chunks(response.body, chunk_size),
+        )
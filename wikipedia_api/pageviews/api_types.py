@@ -10,12 +10,14 @@ Classes:
     APIHeader
     AggregatePageViewRequest
     PerArticlePageViewRequest
+    ArticleMatrixRequest
     TopViewedArticleRequest
     TopViewedByCountryRequest
     TopViewedPerCountryRequest
+    ApiResponse
 """
 from enum import Enum
-from typing import NamedTuple, Union
+from typing import Dict, List, NamedTuple, Optional, Union
 
 
 class AccessMethod(Enum):
@@ -113,6 +115,27 @@ class PerArticlePageViewRequest(NamedTuple):
     end_time: str
 
 
+class ArticleMatrixRequest(NamedTuple):
+    """
+    Request for per article page view API of many articles over the same
+    date range, returned as an article x time matrix
+    """
+
+    # Access Method to filter page view data
+    access: AccessMethod
+    # Agent Type to filter page view data
+    agent: AgentType
+    # The titles of articles in the specified project, one matrix row per
+    # title in the same order
+    articles: List[str]
+    # Granularity level of page view data, support DAILY, MONTHLY
+    granularity: Granularity
+    # Start date of page view data in string format of YYYYMMDD or YYYYMMDDHH
+    start_time: str
+    # End date of page view data in string format of YYYYMMDD or YYYYMMDDHH
+    end_time: str
+
+
 class TopViewedArticleRequest(NamedTuple):
     """
     Request for top viewed artical page view API
@@ -159,3 +182,16 @@ class TopViewedPerCountryRequest(NamedTuple):
     # The day of the date for which to retrieve top articles, can be all-days
     # to get the top articles of a whole month
     day: Union[int, str]
+
+
+class ApiResponse(NamedTuple):
+    """
+    Response of a conditional API call
+    """
+
+    # HTTP status code, 304 if the cached response is still valid
+    status_code: int
+    # Cache validators of the response, "ETag" and "Last-Modified" headers
+    validators: Dict[str, str]
+    # Decoded JSON body, None for a 304 response
+    data: Optional[dict]
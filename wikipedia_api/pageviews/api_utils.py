@@ -1,10 +1,27 @@
-from typing import Optional, Tuple
-from datetime import datetime
-from wikipedia_api.pageviews.api_constants import PageViewApiValidDateRange
-from wikipedia_api.pageviews.api_exceptions import InputException
-from wikipedia_api.pageviews.api_types import AccessMethod, AgentType, Granularity
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from wikipedia_api.pageviews.api_constants import (
+    PageViewApiEndPoints,
+    PageViewApiValidDateRange,
+)
+from wikipedia_api.pageviews.api_deadline import remaining_timeout
+from wikipedia_api.pageviews.api_exceptions import (
+    ApiException,
+    InputException,
+    NotFoundException,
+)
+from wikipedia_api.pageviews.api_types import (
+    AccessMethod,
+    AgentType,
+    ApiResponse,
+    Granularity,
+)
 import requests
 
+# Response header of each cache validator and the request header sending it
+# back in a conditional request
+VALIDATOR_HEADERS = {"ETag": "If-None-Match", "Last-Modified": "If-Modified-Since"}
+
 
 def translate_access_method_to_str(
     access: AccessMethod, is_legacy: bool = False
@@ -88,6 +105,33 @@ def parse_start_end_time(
     return start_time, end_time
 
 
+def parse_start_end_month_or_day(
+    start_time_str: str, end_time_str: str
+) -> Tuple[datetime, datetime]:
+    """
+    Parse an inclusive range of days where each bound is a day (YYYYMMDD)
+    or a month (YYYYMM), a start month begins on its first day and an end
+    month ends on its last day
+    """
+
+    def parse(time_str: str, is_end: bool) -> datetime:
+        if len(time_str) != 6:
+            return parse_time_parameter(time_str)
+        try:
+            month = datetime.strptime(time_str, "%Y%m")
+        except ValueError:
+            raise InputException(f"{time_str} is invalid datetime string")
+        if not is_end:
+            return month
+        return (month + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+
+    start_time = parse(start_time_str, False)
+    end_time = parse(end_time_str, True)
+    if start_time > end_time:
+        raise InputException("start time should not later than end time")
+    return start_time, end_time
+
+
 def split_time_range_for_legacy_api(
     start_time: datetime, end_time: datetime
 ) -> Tuple[
@@ -119,7 +163,145 @@ def split_time_range_for_legacy_api(
     )
 
 
+def rebase_endpoint(endpoint: str, base_url: Optional[str]) -> str:
+    """
+    Replace the scheme and host of an endpoint template with base_url, eg the
+    URL of a caching proxy, the endpoint is unchanged if base_url is None
+    """
+    if base_url is None or not endpoint.startswith(PageViewApiEndPoints.BASE_URL):
+        return endpoint
+    return base_url.rstrip("/") + endpoint[len(PageViewApiEndPoints.BASE_URL) :]
+
+
 def rest_api_call(endpoint: str, api_header: dict, parameters: dict):
-    call = requests.get(endpoint.format(**parameters), headers=api_header)
+    url = endpoint.format(**parameters)
+    call = requests.get(url, headers=api_header, timeout=remaining_timeout())
+    check_response_status(call.status_code, url)
     response = call.json()
     return response
+
+
+def conditional_api_call(
+    endpoint: str,
+    api_header: dict,
+    parameters: dict,
+    validators: Optional[Dict[str, str]] = None,
+) -> ApiResponse:
+    """
+    Call the API sending the validators of a cached response as
+    If-None-Match and If-Modified-Since headers, the API answers 304 Not
+    Modified without a body if the cached response is still valid
+
+    Args:
+        endpoint (str): endpoint template
+        api_header (dict): API header
+        parameters (dict): parameters of the endpoint template
+        validators (Optional[Dict[str, str]]): "ETag" and "Last-Modified"
+        values of the cached response, unconditional call if None
+
+    Raises:
+        NotFoundException: for 404 response
+        ApiException: for other error responses
+
+    Returns:
+        ApiResponse: status, validators and data of the response
+    """
+    url = endpoint.format(**parameters)
+    call = requests.get(
+        url,
+        headers=conditional_headers(api_header, validators),
+        timeout=remaining_timeout(),
+    )
+    return to_api_response(call.status_code, call.headers, call.json, url, validators)
+
+
+def conditional_headers(
+    api_header: dict, validators: Optional[Dict[str, str]] = None
+) -> dict:
+    """
+    Request headers of a conditional call: the API header plus the
+    validators of the cached response
+    """
+    headers = dict(api_header)
+    for name, value in (validators or {}).items():
+        headers[VALIDATOR_HEADERS[name]] = value
+    return headers
+
+
+def to_api_response(
+    status_code: int,
+    headers,
+    decode: Callable[[], dict],
+    url: str,
+    validators: Optional[Dict[str, str]] = None,
+) -> ApiResponse:
+    """
+    Build the ApiResponse of a conditional call, the body is decoded by
+    calling decode unless the response is a 304
+
+    Raises:
+        NotFoundException: for 404 response
+        ApiException: for other error responses
+    """
+    response_validators = {
+        name: headers[name] for name in VALIDATOR_HEADERS if name in headers
+    }
+    if status_code == 304:
+        return ApiResponse(304, {**(validators or {}), **response_validators}, None)
+    check_response_status(status_code, url)
+    return ApiResponse(status_code, response_validators, decode())
+
+
+def check_response_status(status_code: int, url: str) -> None:
+    """
+    Raise NotFoundException for 404 response and ApiException for other
+    error responses
+    """
+    if status_code == 404:
+        raise NotFoundException(f"No data found for {url}", status_code, url)
+    if status_code >= 400:
+        raise ApiException(
+            f"API call {url} failed with status {status_code}", status_code, url
+        )
+
+
+def split_time_range_by_year(
+    start_time: datetime, end_time: datetime
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Split an inclusive time range into consecutive ranges that each fall in
+    a single calendar year, the last range of a year ends at 12/31 23:00
+    """
+    ranges = []
+    current_start = start_time
+    while current_start.year < end_time.year:
+        year_end = datetime(current_start.year, 12, 31, 23)
+        ranges.append((current_start, year_end))
+        current_start = datetime(current_start.year + 1, 1, 1)
+    ranges.append((current_start, end_time))
+    return ranges
+
+
+def split_time_range_by_month(
+    start_time: datetime, end_time: datetime
+) -> Tuple[List[datetime], List[datetime]]:
+    """
+    Split an inclusive range of days into the whole months it covers and the
+    remaining days at both ends
+
+    Returns:
+        Tuple[List[datetime], List[datetime]]: first day of each whole
+        month, and each remaining day, in date order
+    """
+    months = []
+    days = []
+    current = start_time
+    while current <= end_time:
+        next_month = (current.replace(day=1) + timedelta(days=31)).replace(day=1)
+        if current.day == 1 and next_month - timedelta(days=1) <= end_time:
+            months.append(current)
+            current = next_month
+        else:
+            days.append(current)
+            current += timedelta(days=1)
+    return months, days
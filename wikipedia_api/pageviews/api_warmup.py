@@ -0,0 +1,349 @@
+"""
+Background cache warmup for the Wikipedia Page View API client
+
+A declarative list of WarmupTarget is expanded to concrete requests for
+relative dates such as "yesterday" and prefetched into the client's cache in
+a background thread at a bounded rate, so dashboards hitting the client find
+warm entries instead of all calling the API at the same moment.
+
+Enum:
+    WarmupKind
+
+Classes:
+    WarmupTarget
+    WarmupReport
+    CacheWarmupScheduler
+
+Functions:
+    resolve_date_offset
+    expand_target
+"""
+from datetime import datetime, timedelta
+from enum import Enum
+import logging
+import re
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from wikipedia_api.pageviews.api_cache import track_cache_urls
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_scheduler import Priority, request_priority
+from wikipedia_api.pageviews.api_types import (
+    AccessMethod,
+    AgentType,
+    AggregatePageViewRequest,
+    Granularity,
+    PerArticlePageViewRequest,
+    TopViewedArticleRequest,
+    TopViewedCountryRequest,
+    TopViewedPerCountryRequest,
+)
+
+logger = logging.getLogger(__name__)
+
+DateOffset = Union[int, str]
+
+_DAYS_AGO = re.compile(r"^(\d+)-days?-ago$")
+
+
+class WarmupKind(Enum):
+    """
+    Enum for the client method a warmup target prefetches
+    """
+
+    # get_aggregated_pageviews
+    AGGREGATED = 0
+    # get_per_article_pageviews
+    PER_ARTICLE = 1
+    # get_top_pageviews
+    TOP = 2
+    # get_top_viewed_country, monthly data of the month of the date
+    TOP_BY_COUNTRY = 3
+    # get_top_view_per_country
+    TOP_PER_COUNTRY = 4
+
+
+class WarmupTarget(NamedTuple):
+    """
+    Declarative description of requests to keep warm in the cache
+    """
+
+    # Client method to prefetch
+    kind: WarmupKind
+    # Wikipedia projects, default to the project of the client
+    projects: List[str] = []
+    # Country codes for TOP_PER_COUNTRY
+    countries: List[str] = []
+    # Article titles for PER_ARTICLE
+    articles: List[str] = []
+    # Dates to prefetch relative to now: number of days ago, "today",
+    # "yesterday" or "N-days-ago"
+    date_offsets: List[DateOffset] = ["yesterday"]
+    # Access Method to filter page view data
+    access: AccessMethod = AccessMethod.ALL
+    # Agent Type to filter page view data
+    agent: AgentType = AgentType.ALL
+    # Number of days ending at each date for AGGREGATED and PER_ARTICLE
+    window_days: int = 1
+
+
+class WarmupReport(NamedTuple):
+    """
+    Coverage and lag of the cache warmup
+    """
+
+    # Number of requests expanded from the targets
+    total: int
+    # Number of requests warmed within the cache ttl
+    warm: int
+    # Number of requests that failed on their last attempt
+    failed: int
+    # warm / total
+    coverage: float
+    # Seconds since the least recently warmed request was fetched, or since
+    # the scheduler started if a request was never warmed
+    lag_seconds: float
+    # Time of the end of the last complete warmup round
+    last_round_at: Optional[datetime]
+
+
+def resolve_date_offset(offset: DateOffset, now: datetime) -> datetime:
+    """
+    Resolve a relative date to the start of the day it designates
+    """
+    if isinstance(offset, int):
+        days = offset
+    elif offset == "today":
+        days = 0
+    elif offset == "yesterday":
+        days = 1
+    else:
+        match = _DAYS_AGO.match(str(offset))
+        if match is None:
+            raise InputException(
+                f"Date offset {offset} only accept int, today, yesterday or N-days-ago"
+            )
+        days = int(match.group(1))
+    day = now - timedelta(days=days)
+    return datetime(day.year, day.month, day.day)
+
+
+def expand_target(
+    target: WarmupTarget, default_project: str, now: datetime
+) -> List[Tuple[str, tuple]]:
+    """
+    Expand a target to the (project, request) pairs to prefetch, the request
+    is one of the request NamedTuples of the client
+    """
+    projects = target.projects or [default_project]
+    units = []
+    for offset in target.date_offsets:
+        date = resolve_date_offset(offset, now)
+        start = date - timedelta(days=max(target.window_days, 1) - 1)
+        if target.kind == WarmupKind.AGGREGATED:
+            request = AggregatePageViewRequest(
+                target.access,
+                target.agent,
+                Granularity.DAILY,
+                start.strftime("%Y%m%d"),
+                date.strftime("%Y%m%d"),
+            )
+            units.extend((project, request) for project in projects)
+        elif target.kind == WarmupKind.PER_ARTICLE:
+            for project in projects:
+                for article in target.articles:
+                    request = PerArticlePageViewRequest(
+                        target.access,
+                        target.agent,
+                        article,
+                        Granularity.DAILY,
+                        start.strftime("%Y%m%d"),
+                        date.strftime("%Y%m%d"),
+                    )
+                    units.append((project, request))
+        elif target.kind == WarmupKind.TOP:
+            request = TopViewedArticleRequest(
+                target.access, date.year, date.month, date.day
+            )
+            units.extend((project, request) for project in projects)
+        elif target.kind == WarmupKind.TOP_BY_COUNTRY:
+            request = TopViewedCountryRequest(target.access, date.year, date.month)
+            units.extend((project, request) for project in projects)
+        elif target.kind == WarmupKind.TOP_PER_COUNTRY:
+            # top per country is across all projects
+            for country in target.countries:
+                request = TopViewedPerCountryRequest(
+                    country, target.access, date.year, date.month, date.day
+                )
+                units.append((default_project, request))
+    # the same unit can come from several offsets or targets
+    return list(dict.fromkeys(units))
+
+
+class CacheWarmupScheduler:
+    """
+    Prefetch a declarative list of requests into the cache of a
+    WikipediaPageViewApiClient in a background thread. Each round expands the
+    targets for the current date, skips requests still warm in the cache and
+    fetches the others at no more than rate requests per second, with BULK
+    priority
+    """
+
+    def __init__(
+        self,
+        client,
+        targets: List[WarmupTarget],
+        rate: float = 1.0,
+        interval: float = 3600.0,
+        clock: Callable[[], datetime] = datetime.now,
+    ) -> None:
+        """
+        Init CacheWarmupScheduler
+
+        Args:
+            client (WikipediaPageViewApiClient): client with a cache, clients
+            of other projects share this cache
+            targets (List[WarmupTarget]): requests to keep warm
+            rate (float): maximum number of API requests per second
+            interval (float): seconds between two warmup rounds
+
+        Raises:
+            InputException: if the client has no cache or rate is not positive
+        """
+        if client.cache is None:
+            raise InputException("Cache warmup requires a client with a cache")
+        if rate <= 0:
+            raise InputException(f"Rate {rate} should be larger than 0")
+
+        self._client = client
+        self._clients = {client.project: client}
+        self._targets = list(targets)
+        self._rate = rate
+        self._interval = interval
+        self._clock = clock
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._started_at = clock()
+        self._last_call = 0.0
+        self._last_round_at: Optional[datetime] = None
+        self._units: List[Tuple[str, tuple]] = []
+        # unit -> time of the last successful fetch
+        self._warmed_at: Dict[Tuple[str, tuple], datetime] = {}
+        # unit -> URLs looked up in the cache by its last successful fetch
+        self._urls: Dict[Tuple[str, tuple], List[str]] = {}
+        self._failed = set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        Start warming the cache in a background daemon thread
+        """
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="cache-warmup", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the background thread, the request in flight is completed
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self) -> WarmupReport:
+        """
+        Run one warmup round in the calling thread and return the report
+        """
+        now = self._clock()
+        units = []
+        for target in self._targets:
+            units.extend(expand_target(target, self._client.project, now))
+        units = list(dict.fromkeys(units))
+        with self._lock:
+            self._units = units
+
+        for unit in units:
+            if self._stop_event.is_set():
+                break
+            if self._is_warm(unit, self._clock()):
+                continue
+            self._wait_for_rate()
+            project, request = unit
+            client = self._client_for(project)
+            try:
+                with request_priority(Priority.BULK), track_cache_urls() as urls:
+                    client.execute(request)
+            except Exception as e:
+                logger.warning("Cache warmup of %s %s failed: %r", project, request, e)
+                with self._lock:
+                    self._failed.add(unit)
+                continue
+            with self._lock:
+                self._failed.discard(unit)
+                self._warmed_at[unit] = self._clock()
+                self._urls[unit] = list(dict.fromkeys(urls))
+
+        if not self._stop_event.is_set():
+            self._last_round_at = self._clock()
+        return self.report()
+
+    def report(self) -> WarmupReport:
+        """
+        Return the coverage and lag of the requests of the last round
+        """
+        now = self._clock()
+        with self._lock:
+            units = list(self._units)
+            warm = sum(1 for unit in units if self._is_warm(unit, now))
+            failed = sum(1 for unit in units if unit in self._failed)
+            lag = 0.0
+            for unit in units:
+                warmed_at = self._warmed_at.get(unit, self._started_at)
+                lag = max(lag, (now - warmed_at).total_seconds())
+        return WarmupReport(
+            total=len(units),
+            warm=warm,
+            failed=failed,
+            coverage=warm / len(units) if units else 1.0,
+            lag_seconds=lag,
+            last_round_at=self._last_round_at,
+        )
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self.run_once()
+            self._stop_event.wait(self._interval)
+
+    def _is_warm(self, unit: Tuple[str, tuple], now: datetime) -> bool:
+        # the entries may have been evicted or cleared since the fetch, a
+        # unit is warm only while all of its URLs are still in the cache
+        warmed_at = self._warmed_at.get(unit)
+        if warmed_at is None:
+            return False
+        if (now - warmed_at).total_seconds() >= self._client.cache.ttl:
+            return False
+        cache = self._client.cache
+        return all(url in cache for url in self._urls.get(unit, ()))
+
+    def _wait_for_rate(self) -> None:
+        delay = self._last_call + 1.0 / self._rate - time.monotonic()
+        if delay > 0:
+            self._stop_event.wait(delay)
+        self._last_call = time.monotonic()
+
+    def _client_for(self, project: str):
+        client = self._clients.get(project)
+        if client is None:
+            client = self._client.with_project(project)
+            self._clients[project] = client
+        return client
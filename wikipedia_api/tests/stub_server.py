@@ -0,0 +1,111 @@
+"""
+Local stub of the page view API serving canned JSON payloads over HTTP
+
+Responses carry ETag and Last-Modified validators and conditional requests
+are answered with 304 Not Modified, unknown paths with 404.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class StubApiServer:
+    """
+    Page view API stub on a random local port, use as a context manager
+    """
+
+    def __init__(self) -> None:
+        # path -> (body, etag, last modified)
+        self._payloads: Dict[str, Tuple[bytes, str, datetime]] = {}
+        self._lock = threading.Lock()
+        # (path, request headers) of every request received
+        self.requests: List[Tuple[str, dict]] = []
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def set_payload(
+        self, path: str, data: dict, last_modified: Optional[datetime] = None
+    ) -> None:
+        """
+        Serve data as the JSON response of path
+        """
+        body = json.dumps(data).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        last_modified = last_modified or datetime.now(timezone.utc)
+        with self._lock:
+            self._payloads[path] = (body, etag, last_modified.replace(microsecond=0))
+
+    def request_count(self, path: str) -> int:
+        return sum(1 for request_path, _ in self.requests if request_path == path)
+
+    def start(self) -> "StubApiServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubApiServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append((self.path, dict(self.headers)))
+                with stub._lock:
+                    payload = stub._payloads.get(self.path)
+                if payload is None:
+                    self._send(404, json.dumps({"title": "Not found."}).encode())
+                    return
+                body, etag, last_modified = payload
+                headers = {
+                    "ETag": etag,
+                    "Last-Modified": format_datetime(last_modified, usegmt=True),
+                }
+                if self._not_modified(etag, last_modified):
+                    self._send(304, b"", headers)
+                else:
+                    self._send(200, body, headers)
+
+            def _not_modified(self, etag: str, last_modified: datetime) -> bool:
+                if_none_match = self.headers.get("If-None-Match")
+                if if_none_match is not None:
+                    return etag in [tag.strip() for tag in if_none_match.split(",")]
+                if_modified_since = self.headers.get("If-Modified-Since")
+                if if_modified_since is not None:
+                    return last_modified <= parsedate_to_datetime(if_modified_since)
+                return False
+
+            def _send(self, status: int, body: bytes, headers: dict = None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                if status != 304:
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body:
+                    self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from wikipedia_api.pageviews.api_analytics import (
+    iter_row_chunks,
+    rolling_mean,
+    rolling_std,
+    spike_scores,
+    trend_summary,
+    week_over_week,
+)
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_matrix import PageViewMatrix
+
+try:
+    import scipy.sparse  # noqa: F401
+
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+
+def sample_values(rows=6, days=60, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.poisson(1000, (rows, days)).astype(np.float64)
+    # a spike on the last day of the first article
+    values[0, -1] = 5000
+    return values
+
+
+class RollingTests(unittest.TestCase):
+    def test_matches_pandas(self):
+        values = sample_values()
+        values[1, 10] = np.nan
+        frame = pd.DataFrame(values.T)
+        for window in (3, 7):
+            np.testing.assert_allclose(
+                frame.rolling(window).mean().T.to_numpy(),
+                rolling_mean(values, window),
+            )
+            np.testing.assert_allclose(
+                frame.rolling(window, min_periods=2).std().T.to_numpy(),
+                rolling_std(values, window, min_periods=2, ddof=1),
+            )
+
+    def test_spike_scores(self):
+        values = sample_values()
+        scores = spike_scores(values, window=28)
+        self.assertTrue(np.isnan(scores[:, :28]).all())
+        self.assertGreater(scores[0, -1], 50)
+        self.assertTrue((np.abs(scores[1:, 28:]) < 6).all())
+        # flat series, the deviation floor keeps the score finite
+        flat = np.full((1, 40), 10.0)
+        flat[0, -1] = 12
+        self.assertEqual(2.0, spike_scores(flat, window=7, min_std=1.0)[0, -1])
+
+    def test_week_over_week(self):
+        values = np.concatenate([np.full((2, 7), 10.0), np.full((2, 7), 15.0)], axis=1)
+        values[1, :7] = 0
+        delta, ratio = week_over_week(values)
+        self.assertEqual(35, delta[0, -1])
+        self.assertEqual(0.5, ratio[0, -1])
+        self.assertEqual(105, delta[1, -1])
+        self.assertTrue(np.isnan(ratio[1, -1]))
+        self.assertTrue(np.isnan(delta[:, :13]).all())
+
+    def test_invalid_input(self):
+        with self.assertRaises(InputException):
+            rolling_mean(np.zeros(5), 2)
+        with self.assertRaises(InputException):
+            rolling_mean(np.zeros((2, 5)), 0)
+        with self.assertRaises(InputException):
+            list(iter_row_chunks(np.zeros((2, 5)), 0))
+
+
+class TrendSummaryTests(unittest.TestCase):
+    def test_chunked_matches_whole(self):
+        values = sample_values(rows=10)
+        index = pd.date_range("2021-01-01", periods=values.shape[1])
+        matrix = PageViewMatrix(values, [f"A{i}" for i in range(10)], index)
+        whole = trend_summary(matrix, chunk_rows=100)
+        chunked = trend_summary(matrix, chunk_rows=3)
+        pd.testing.assert_frame_equal(whole, chunked)
+        self.assertEqual("A0", whole["zscore"].idxmax())
+        self.assertEqual(index[-1], whole.loc["A0", "max_zscore_at"])
+        self.assertAlmostEqual(values[0, -28:].mean(), whole.loc["A0", "mean"])
+
+    def test_memory_mapped(self):
+        values = sample_values(rows=4)
+        expected = trend_summary(values)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "values.npy")
+            np.save(path, values)
+            mapped = np.load(path, mmap_mode="r")
+            pd.testing.assert_frame_equal(expected, trend_summary(mapped, chunk_rows=2))
+            del mapped
+
+    @unittest.skipUnless(HAS_SCIPY, "scipy is not installed")
+    def test_sparse(self):
+        values = sample_values(rows=4)
+        pd.testing.assert_frame_equal(
+            trend_summary(values),
+            trend_summary(scipy.sparse.csr_matrix(values), chunk_rows=2),
+        )
+
+    def test_short_series(self):
+        df = trend_summary(np.ones((2, 5)), window=28)
+        self.assertTrue(df["zscore"].isna().all())
+        self.assertTrue(df["max_zscore_at"].isna().all())
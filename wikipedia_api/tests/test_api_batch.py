@@ -0,0 +1,195 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from wikipedia_api.pageviews.api_batch import (
+    BatchJob,
+    deserialize_request,
+    serialize_request,
+    unit_id,
+)
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_types import (
+    AccessMethod,
+    AgentType,
+    Granularity,
+    PerArticlePageViewRequest,
+    TopViewedPerCountryRequest,
+)
+
+
+def article_request(article):
+    return PerArticlePageViewRequest(
+        AccessMethod.ALL, AgentType.USER, article, Granularity.DAILY, "20210101", "20210102"
+    )
+
+
+def fake_execute(request):
+    if request.article == "Broken":
+        raise KeyError("items")
+    if request.article == "Invalid":
+        raise InputException("Invalid article")
+    return pd.DataFrame(
+        {"article": [request.article] * 2, "timestamp": ["2021010100", "2021010200"],
+         "views": [1, 2]}
+    )
+
+
+def fake_client(project="en.wikipedia"):
+    client = MagicMock()
+    client.project = project
+    client.is_known_missing.return_value = False
+    client.execute.side_effect = fake_execute
+    return client
+
+
+class BatchJobTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._directory = os.path.join(self._tmp_dir.name, "job")
+        self._requests = [article_request(f"Article_{i}") for i in range(10)]
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_serialize_request(self):
+        request = TopViewedPerCountryRequest("US", AccessMethod.MOBILE_WEB, 2021, 1, "all-days")
+        data = serialize_request(request)
+        self.assertEqual(data["fields"]["access"], "MOBILE_WEB")
+        self.assertEqual(deserialize_request(data), request)
+        self.assertEqual(
+            unit_id(request, "en.wikipedia"), unit_id(request._replace(), "en.wikipedia")
+        )
+        self.assertNotEqual(
+            unit_id(request, "en.wikipedia"),
+            unit_id(request._replace(country="FR"), "en.wikipedia"),
+        )
+        self.assertNotEqual(
+            unit_id(request, "en.wikipedia"), unit_id(request, "de.wikipedia")
+        )
+
+    def test_run_and_resume(self):
+        job = BatchJob.create(
+            self._directory,
+            self._requests + [article_request("Broken"), self._requests[0]],
+            "en.wikipedia",
+        )
+        # duplicated request is stored once
+        self.assertEqual(len(job), 11)
+
+        client = fake_client()
+        with self.assertLogs("wikipedia_api.pageviews.api_batch", "WARNING") as logs:
+            report = job.run(client, max_workers=3)
+        self.assertEqual((report.total, report.completed, report.executed, report.failed),
+                         (11, 10, 10, 1))
+        broken = unit_id(article_request("Broken"), "en.wikipedia")
+        self.assertEqual({broken: "KeyError: 'items'"}, report.errors)
+        self.assertIn(broken, logs.output[0])
+        self.assertEqual(len(job.read_results()), 20)
+
+        # reopening the job only runs the failed unit
+        job = BatchJob(self._directory)
+        self.assertEqual(
+            job.pending_units(), [unit_id(article_request("Broken"), "en.wikipedia")]
+        )
+        client.execute.reset_mock()
+        client.execute.side_effect = lambda request: fake_execute(
+            request._replace(article="Fixed")
+        )
+        report = job.run(client)
+        self.assertEqual(client.execute.call_count, 1)
+        self.assertTrue(job.is_done())
+        self.assertEqual(len(job.read_results()), 22)
+
+        # creating the same job again keeps the checkpoint
+        job = BatchJob.create(
+            self._directory, self._requests + [article_request("Broken")], "en.wikipedia"
+        )
+        self.assertTrue(job.is_done())
+        with self.assertRaises(InputException):
+            BatchJob.create(self._directory, self._requests, "en.wikipedia")
+        with self.assertRaises(InputException):
+            BatchJob.create(
+                self._directory,
+                self._requests + [article_request("Broken")],
+                "de.wikipedia",
+            )
+
+    def test_crash_recovery_is_idempotent(self):
+        job = BatchJob.create(self._directory, self._requests, "en.wikipedia")
+        client = fake_client()
+        job.run(client, unit_ids=job.pending_units()[:4])
+
+        # simulate a crash after writing an output but before checkpointing
+        # it, with a torn checkpoint line
+        uid = job.pending_units()[0]
+        fake_execute_output = fake_execute(job.units[uid])
+        fake_execute_output.to_csv(job.output_path(uid), index=False)
+        with open(os.path.join(self._directory, BatchJob.CHECKPOINT_FILE), "a") as f:
+            f.write(uid[:5])
+
+        job = BatchJob(self._directory)
+        self.assertEqual(len(job.completed_units()), 4)
+        job.run(client)
+        self.assertTrue(job.is_done())
+        df = job.read_results()
+        self.assertEqual(len(df), 20)
+        self.assertEqual(df["article"].nunique(), 10)
+
+    def test_partial_result_stays_pending(self):
+        job = BatchJob.create(self._directory, self._requests[:2], "en.wikipedia")
+
+        def partial_execute(request):
+            df = fake_execute(request)
+            if request.article == "Article_1":
+                df.attrs["missing"] = ["20210102"]
+            return df
+
+        client = fake_client()
+        client.execute.side_effect = partial_execute
+        report = job.run(client)
+        self.assertEqual((report.executed, report.failed), (1, 1))
+        self.assertEqual(
+            job.pending_units(), [unit_id(self._requests[1], "en.wikipedia")]
+        )
+        self.assertFalse(os.path.exists(job.output_path(job.pending_units()[0])))
+
+    def test_invalid_unit_rejected(self):
+        job = BatchJob.create(
+            self._directory, [self._requests[0], article_request("Invalid")], "en.wikipedia"
+        )
+        invalid = unit_id(article_request("Invalid"), "en.wikipedia")
+        client = fake_client()
+        with self.assertLogs("wikipedia_api.pageviews.api_batch", "WARNING"):
+            report = job.run(client)
+        self.assertEqual((report.executed, report.failed, report.rejected), (1, 0, 1))
+        self.assertEqual({invalid: "InputException: Invalid article"}, report.errors)
+        self.assertTrue(job.is_done())
+
+        # rejected units are not retried by the next run
+        job = BatchJob(self._directory)
+        self.assertEqual({invalid: "InputException: Invalid article"}, job.rejected_units())
+        self.assertEqual([], job.pending_units())
+        client.execute.reset_mock()
+        report = job.run(client)
+        client.execute.assert_not_called()
+        self.assertEqual(1, len(job.completed_units()))
+
+    def test_project_client(self):
+        job = BatchJob.create(self._directory, self._requests[:2], "de.wikipedia")
+        self.assertEqual(job.project_of(job.pending_units()[0]), "de.wikipedia")
+        client = fake_client()
+        project_client = fake_client("de.wikipedia")
+        client.with_project.return_value = project_client
+        report = job.run(client)
+        self.assertEqual(report.executed, 2)
+        client.with_project.assert_called_once_with("de.wikipedia")
+        client.execute.assert_not_called()
+        self.assertEqual(project_client.execute.call_count, 2)
+
+    def test_open_missing_job(self):
+        with self.assertRaises(InputException):
+            BatchJob(self._directory)
@@ -0,0 +1,154 @@
+import json
+import unittest
+
+import requests
+
+from wikipedia_api.pageviews.api_breaker import (
+    BreakerState,
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    endpoint_name,
+    is_backend_failure,
+)
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_constants import PageViewApiEndPoints
+from wikipedia_api.pageviews.api_exceptions import (
+    ApiException,
+    CircuitOpenException,
+    DeadlineExceededException,
+    NotFoundException,
+)
+from wikipedia_api.pageviews.api_transport import TransportResponse
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    AgentType,
+    AggregatePageViewRequest,
+    Granularity,
+    TopViewedArticleRequest,
+)
+from wikipedia_api.pageviews.api_utils import rebase_endpoint
+
+TOP_RESPONSE = {
+    "items": [{"articles": [{"article": "Main_Page", "views": 10, "rank": 1}]}]
+}
+
+
+class LegacyDownTransport:
+    """
+    Transport answering 503 for the legacy API and TOP_RESPONSE otherwise
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, headers):
+        self.calls.append(url)
+        if "/legacy/" in url:
+            return TransportResponse(503, {}, b'{"title": "Unavailable"}')
+        return TransportResponse(200, {}, json.dumps(TOP_RESPONSE).encode("utf-8"))
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def setUp(self):
+        self._now = 0.0
+        self._breaker = CircuitBreaker(
+            "TOP_PAGEVIEWS",
+            failure_threshold=3,
+            reset_timeout=10.0,
+            clock=lambda: self._now,
+        )
+
+    def _call(self, error=None):
+        with self._breaker.guard():
+            if error is not None:
+                raise error
+
+    def _fail(self, times=1):
+        for _ in range(times):
+            with self.assertRaises(ApiException):
+                self._call(ApiException("unavailable", 503))
+
+    def test_opens_after_threshold(self):
+        self._fail(2)
+        self._call()
+        self._fail(2)
+        self.assertEqual(BreakerState.CLOSED, self._breaker.state)
+        self._fail()
+        self.assertEqual(BreakerState.OPEN, self._breaker.state)
+
+        with self.assertRaises(CircuitOpenException):
+            self._call()
+        status = self._breaker.status()
+        self.assertEqual(1, status.trips)
+        self.assertEqual(1, status.rejected)
+        self.assertEqual(10.0, status.retry_in)
+
+    def test_half_open_probe(self):
+        self._fail(3)
+        self._now = 10.0
+        self.assertEqual(BreakerState.HALF_OPEN, self._breaker.state)
+        # a failed probe opens the breaker again
+        self._fail()
+        self.assertEqual(BreakerState.OPEN, self._breaker.state)
+        self.assertEqual(2, self._breaker.status().trips)
+
+        self._now = 20.0
+        with self._breaker.guard():
+            # only one probe at a time
+            with self.assertRaises(CircuitOpenException):
+                self._call()
+        self.assertEqual(BreakerState.CLOSED, self._breaker.state)
+        self.assertEqual(0, self._breaker.status().failures)
+
+    def test_client_errors_do_not_count(self):
+        for _ in range(5):
+            with self.assertRaises(NotFoundException):
+                self._call(NotFoundException("not found", 404))
+        self.assertEqual(BreakerState.CLOSED, self._breaker.state)
+
+    def test_is_backend_failure(self):
+        self.assertTrue(is_backend_failure(ApiException("error", 500)))
+        self.assertTrue(is_backend_failure(ApiException("throttled", 429)))
+        self.assertTrue(is_backend_failure(requests.exceptions.ReadTimeout()))
+        self.assertTrue(is_backend_failure(requests.exceptions.ConnectionError()))
+        self.assertFalse(is_backend_failure(ApiException("bad request", 400)))
+        self.assertFalse(is_backend_failure(DeadlineExceededException("expired")))
+        self.assertFalse(is_backend_failure(ValueError()))
+
+
+class CircuitBreakerRegistryTests(unittest.TestCase):
+    def test_endpoint_name(self):
+        legacy = PageViewApiEndPoints.AGGRGATED_PAGEVIEWS_LEGACY
+        self.assertEqual("AGGRGATED_PAGEVIEWS_LEGACY", endpoint_name(legacy))
+        rebased = rebase_endpoint(legacy, "http://127.0.0.1:8787")
+        self.assertEqual("AGGRGATED_PAGEVIEWS_LEGACY", endpoint_name(rebased))
+        self.assertEqual("/other/{x}", endpoint_name("https://example.org/other/{x}"))
+
+    def test_client_breaker_per_endpoint(self):
+        transport = LegacyDownTransport()
+        registry = CircuitBreakerRegistry(failure_threshold=2)
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            transport=transport,
+            breakers=registry,
+        )
+        self.assertIs(registry, client.with_project("de.wikipedia").breakers)
+        legacy_request = AggregatePageViewRequest(
+            AccessMethod.ALL, AgentType.ALL, Granularity.DAILY, "20100101", "20100105"
+        )
+        for _ in range(2):
+            with self.assertRaises(ApiException):
+                client.get_aggregated_pageviews(legacy_request)
+        with self.assertRaises(CircuitOpenException):
+            client.get_aggregated_pageviews(legacy_request)
+        self.assertEqual(2, len(transport.calls))
+
+        # other endpoints are not affected
+        df = client.get_top_pageviews(TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1))
+        self.assertEqual("Main_Page", df["article"][0])
+
+        states = registry.states()
+        self.assertEqual(BreakerState.OPEN, states["AGGRGATED_PAGEVIEWS_LEGACY"].state)
+        self.assertEqual(BreakerState.CLOSED, states["TOP_PAGEVIEWS"].state)
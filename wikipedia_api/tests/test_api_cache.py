@@ -0,0 +1,135 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from wikipedia_api.pageviews.api_cache import ResponseCache
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    TopViewedArticleRequest,
+)
+from wikipedia_api.pageviews.api_utils import conditional_api_call
+from wikipedia_api.tests.stub_server import StubApiServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = ResponseCache(ttl=10, clock=clock)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", {"items": []})
+        clock.now += 5
+        self.assertEqual(cache.get("a"), {"items": []})
+        self.assertIn("a", cache)
+        self.assertEqual(cache.age("a"), 5)
+        clock.now += 5
+        self.assertIsNone(cache.get("a"))
+        self.assertNotIn("a", cache)
+        stats = cache.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.entries), (1, 2, 1))
+
+    def test_max_entries(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", {"items": 1})
+        cache.put("b", {"items": 2})
+        cache.get("a")
+        cache.put("c", {"items": 3})
+        # b is the least recently used entry
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"items": 1})
+        self.assertEqual(len(cache), 2)
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_client_cache(self, rest_api_call_mock: MagicMock):
+        rest_api_call_mock.return_value = {
+            "items": [{"articles": [{"article": "Main_Page", "views": 1, "rank": 1}]}]
+        }
+        cache = ResponseCache()
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia", APIHeader("test agent", "test@test.com"), cache=cache
+        )
+        request = TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1)
+        client.get_top_pageviews(request)
+        df = client.get_top_pageviews(request)
+        self.assertEqual(rest_api_call_mock.call_count, 1)
+        self.assertEqual(df["article"][0], "Main_Page")
+
+        # clients of other projects share the cache but not the entries
+        other_client = client.with_project("de.wikipedia")
+        self.assertIs(other_client.cache, cache)
+        other_client.get_top_pageviews(request)
+        self.assertEqual(rest_api_call_mock.call_count, 2)
+        self.assertEqual(len(cache), 2)
+
+        # error responses are not cached
+        rest_api_call_mock.return_value = {"type": "not found"}
+        with self.assertRaises(KeyError):
+            client.get_top_pageviews(request._replace(day=2))
+        self.assertEqual(len(cache), 2)
+
+
+class RevalidationTests(unittest.TestCase):
+    def setUp(self):
+        self._server = StubApiServer().start()
+        self._endpoint = self._server.base_url + "/top/{project}/{day}"
+        self._path = "/top/en.wikipedia/01"
+        self._params = {"project": "en.wikipedia", "day": "01"}
+        self._server.set_payload(self._path, {"items": [{"views": 1}]})
+
+    def tearDown(self):
+        self._server.stop()
+
+    def test_conditional_api_call(self):
+        header = {"User-Agent": "test agent"}
+        response = conditional_api_call(self._endpoint, header, self._params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"items": [{"views": 1}]})
+        self.assertIn("ETag", response.validators)
+
+        response = conditional_api_call(
+            self._endpoint, header, self._params, response.validators
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertIsNone(response.data)
+
+        # Last-Modified alone is enough
+        validators = {"Last-Modified": response.validators["Last-Modified"]}
+        response = conditional_api_call(self._endpoint, header, self._params, validators)
+        self.assertEqual(response.status_code, 304)
+
+    def test_client_revalidation(self):
+        clock = FakeClock()
+        cache = ResponseCache(ttl=10, clock=clock, revalidate=True)
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia", APIHeader("test agent", "test@test.com"), cache=cache
+        )
+
+        def views():
+            return client._rest_api_call(self._endpoint, self._params)["items"][0]["views"]
+
+        self.assertEqual(views(), 1)
+        views()
+        self.assertEqual(self._server.request_count(self._path), 1)
+
+        # expired entry is revalidated with a 304 response
+        clock.now += 10
+        self.assertEqual(views(), 1)
+        self.assertEqual(self._server.request_count(self._path), 2)
+        self.assertIn("If-None-Match", self._server.requests[-1][1])
+        self.assertEqual(cache.stats().revalidated, 1)
+        views()
+        self.assertEqual(self._server.request_count(self._path), 2)
+
+        # changed data is downloaded again
+        self._server.set_payload(self._path, {"items": [{"views": 2}]})
+        clock.now += 10
+        self.assertEqual(views(), 2)
+        self.assertEqual(cache.stats().revalidated, 1)
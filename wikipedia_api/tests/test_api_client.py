@@ -1,11 +1,13 @@
 import unittest
 import json
+import time
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
 
 from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
 from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_transport import FakeTransport
 from wikipedia_api.pageviews.api_types import (
     APIHeader,
     AccessMethod,
@@ -187,6 +189,75 @@ class WikipediaPageViewApiClientTest(unittest.TestCase):
         legacy_api_mock.assert_called_once()
         page_view_api_mock.assert_called_once()
 
+    @patch(
+        "wikipedia_api.pageviews.api_client.WikipediaPageViewApiClient._call_page_view_api"
+    )
+    def test_get_aggregated_pageviews_sum_mobile(self, page_view_api_mock: MagicMock):
+        def call_page_view_api(access, agent, granularity, start_time, end_time):
+            names = {AccessMethod.MOBILE_APP: "mobile-app", AccessMethod.MOBILE_WEB: "mobile-web"}
+            views = {AccessMethod.MOBILE_APP: [1, 2], AccessMethod.MOBILE_WEB: [10, 20]}
+            return pd.DataFrame(
+                {
+                    "project": "en.wikipedia",
+                    "access": names[access],
+                    "agent": "user",
+                    "granularity": "daily",
+                    "timestamp": ["2020110100", "2020110200"],
+                    "views": views[access],
+                }
+            )
+
+        page_view_api_mock.side_effect = call_page_view_api
+        client = WikipediaPageViewApiClient(self._project, self._api_header)
+        request = AggregatePageViewRequest(
+            access=AccessMethod.MOBILE,
+            agent=AgentType.USER,
+            granularity=Granularity.DAILY,
+            start_time="20201101",
+            end_time="20201102",
+        )
+        df = client.get_aggregated_pageviews(request)
+        self.assertEqual(list(df["access"]), ["mobile-app"] * 2 + ["mobile-web"] * 2)
+
+        df = client.get_aggregated_pageviews(request, sum_mobile=True)
+        self.assertEqual(len(df), 6)
+        mobile_df = df[df["access"] == "mobile"]
+        self.assertEqual(list(mobile_df["timestamp"]), ["2020110100", "2020110200"])
+        self.assertEqual(list(mobile_df["views"]), [11, 22])
+        self.assertEqual(list(mobile_df.columns), list(df.columns))
+
+    def test_get_aggregated_pageviews_concurrent_calls(self):
+        def handler(url):
+            if "/legacy/" in url:
+                item = {"access-site": "mobile-site", "count": 1}
+            else:
+                item = {"access": url.split("/")[-5], "agent": "user", "views": 1}
+            item.update(
+                {"project": "en.wikipedia", "granularity": "daily", "timestamp": "2015063000"}
+            )
+            return {"items": [item]}
+
+        latency = 0.3
+        transport = FakeTransport(handler=handler, latency=latency)
+        client = WikipediaPageViewApiClient(
+            self._project, self._api_header, transport=transport
+        )
+        request = AggregatePageViewRequest(
+            access=AccessMethod.MOBILE,
+            agent=AgentType.USER,
+            granularity=Granularity.DAILY,
+            start_time="20150601",
+            end_time="20150710",
+        )
+        start = time.perf_counter()
+        df = client.get_aggregated_pageviews(request)
+        elapsed = time.perf_counter() - start
+        # legacy, mobile-app and mobile-web calls
+        self.assertEqual(len(transport.calls), 3)
+        self.assertEqual(list(df["access"]), ["mobile-site", "mobile-app", "mobile-web"])
+        # the three calls overlap, the wall time is about one call
+        self.assertLess(elapsed, 2 * latency)
+
     def test_get_aggregated_pageview(self):
         client = WikipediaPageViewApiClient(self._project, self._api_header)
         request = AggregatePageViewRequest(
@@ -474,3 +545,86 @@ class WikipediaPageViewApiClientTest(unittest.TestCase):
         self.assertEqual(df["views_ceil"][0], 1900)
         self.assertEqual(df["article"][1], "Deaths_in_2021")
         self.assertEqual(df["views_ceil"][1], 1500)
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_iter_top_view_per_country(self, rest_api_call_mock: MagicMock):
+        def top_per_country(endpoint, api_header, params):
+            return {
+                "items": [
+                    {
+                        "articles": [
+                            {
+                                "article": "Main_Page",
+                                "project": "en.wikipedia",
+                                "views_ceil": int(params["day"]),
+                                "rank": 1,
+                            }
+                        ]
+                    }
+                ]
+            }
+
+        rest_api_call_mock.side_effect = top_per_country
+        client = WikipediaPageViewApiClient(self._project, self._api_header)
+        request = TopViewedPerCountryRequest(
+            country="US", access=AccessMethod.ALL, year=2021, month=12, day="all-days",
+        )
+        dfs = list(client.iter_top_view_per_country(request, max_workers=4))
+        self.assertEqual(len(dfs), 31)
+        self.assertEqual([df["day"][0] for df in dfs], [f"{d:02d}" for d in range(1, 32)])
+        self.assertEqual(dfs[30]["views_ceil"][0], 31)
+
+        dfs = list(
+            client.iter_top_view_per_country(request, max_workers=4, ordered=False)
+        )
+        self.assertEqual(sorted(df["day"][0] for df in dfs), [f"{d:02d}" for d in range(1, 32)])
+
+        request = TopViewedPerCountryRequest(
+            country="US", access=AccessMethod.ALL, year=2021, month=12, day=5,
+        )
+        dfs = list(client.iter_top_view_per_country(request))
+        self.assertEqual(len(dfs), 1)
+        self.assertEqual(dfs[0]["day"][0], "05")
+
+        request = TopViewedPerCountryRequest(
+            country="US", access=AccessMethod.MOBILE, year=2021, month=12, day=5,
+        )
+        with self.assertRaises(InputException):
+            client.iter_top_view_per_country(request)
+
+    @patch(
+        "wikipedia_api.pageviews.api_client.WikipediaPageViewApiClient._call_legacy_api"
+    )
+    @patch(
+        "wikipedia_api.pageviews.api_client.WikipediaPageViewApiClient._call_page_view_api"
+    )
+    def test_iter_aggregated_pageviews(
+        self, page_view_api_mock: MagicMock, legacy_api_mock: MagicMock
+    ):
+        page_view_api_mock.side_effect = lambda access, agent, granularity, start, end: (
+            pd.DataFrame({"access": [access.name], "timestamp": [start.strftime("%Y")]})
+        )
+        legacy_api_mock.side_effect = lambda access, granularity, start, end: (
+            pd.DataFrame({"access": ["legacy"], "timestamp": [start.strftime("%Y")]})
+        )
+        client = WikipediaPageViewApiClient(self._project, self._api_header)
+        request = AggregatePageViewRequest(
+            access=AccessMethod.MOBILE,
+            agent=AgentType.USER,
+            granularity=Granularity.DAILY,
+            start_time="20140101",
+            end_time="20161231",
+        )
+        dfs = list(client.iter_aggregated_pageviews(request, max_workers=3))
+        periods = [(df["access"][0], df["timestamp"][0]) for df in dfs]
+        self.assertEqual(
+            periods,
+            [
+                ("legacy", "2014"),
+                ("legacy", "2015"),
+                ("MOBILE_APP", "2015"),
+                ("MOBILE_APP", "2016"),
+                ("MOBILE_WEB", "2015"),
+                ("MOBILE_WEB", "2016"),
+            ],
+        )
@@ -0,0 +1,60 @@
+import threading
+import time
+import unittest
+
+from wikipedia_api.pageviews.api_concurrent import bounded_map
+
+
+class BoundedMapTests(unittest.TestCase):
+    def test_ordered(self):
+        def slow_square(value):
+            # earlier items finish last
+            time.sleep((5 - value) * 0.01)
+            return value * value
+
+        results = list(bounded_map(slow_square, range(5), max_workers=5))
+        self.assertEqual(results, [0, 1, 4, 9, 16])
+
+    def test_completion_order(self):
+        def slow_identity(value):
+            time.sleep((5 - value) * 0.02)
+            return value
+
+        results = list(
+            bounded_map(slow_identity, range(5), max_workers=5, ordered=False)
+        )
+        self.assertEqual(sorted(results), [0, 1, 2, 3, 4])
+        self.assertEqual(results[0], 4)
+
+    def test_backpressure(self):
+        started = []
+        lock = threading.Lock()
+
+        def record(value):
+            with lock:
+                started.append(value)
+            return value
+
+        results = bounded_map(record, range(100), max_workers=2, max_pending=3)
+        self.assertEqual(next(results), 0)
+        time.sleep(0.05)
+        # 3 pending items plus the one submitted after the first result
+        self.assertLessEqual(len(started), 4)
+        results.close()
+        self.assertLessEqual(len(started), 4)
+
+    def test_exception_propagated(self):
+        def fail_on_two(value):
+            if value == 2:
+                raise KeyError(value)
+            return value
+
+        results = bounded_map(fail_on_two, range(5), max_workers=2)
+        self.assertEqual(next(results), 0)
+        self.assertEqual(next(results), 1)
+        with self.assertRaises(KeyError):
+            next(results)
+
+    def test_invalid_workers(self):
+        with self.assertRaises(ValueError):
+            list(bounded_map(lambda value: value, range(3), max_workers=0))
@@ -0,0 +1,140 @@
+import time
+import unittest
+
+import requests
+
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_concurrent import bounded_map
+from wikipedia_api.pageviews.api_deadline import (
+    DEFAULT_TIMEOUT,
+    remaining_timeout,
+    request_deadline,
+    request_timeout,
+    time_left,
+)
+from wikipedia_api.pageviews.api_exceptions import DeadlineExceededException
+from wikipedia_api.pageviews.api_transport import FakeTransport
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    AgentType,
+    ArticleMatrixRequest,
+    Granularity,
+    TopViewedArticleRequest,
+    TopViewedPerCountryRequest,
+)
+
+
+def any_response(url):
+    # one article for any per country day, per article or top request
+    return {
+        "items": [
+            {
+                "articles": [
+                    {
+                        "article": "Main_Page",
+                        "project": "en.wikipedia",
+                        "views_ceil": 1,
+                        "views": 1,
+                        "rank": 1,
+                    }
+                ],
+                "timestamp": "2021010100",
+                "views": 1,
+            }
+        ]
+    }
+
+
+class DeadlineTests(unittest.TestCase):
+    def test_default_timeout(self):
+        self.assertIsNone(time_left())
+        self.assertEqual(DEFAULT_TIMEOUT, remaining_timeout())
+        with request_timeout(2.0):
+            self.assertEqual(2.0, remaining_timeout())
+
+    def test_deadline_caps_timeout(self):
+        with request_deadline(1.0):
+            self.assertLessEqual(remaining_timeout(), 1.0)
+            # an enclosing earlier deadline is kept
+            with request_deadline(10.0):
+                self.assertLessEqual(time_left(), 1.0)
+            self.assertEqual(
+                [True, True], list(bounded_map(lambda _: time_left() <= 1.0, range(2)))
+            )
+
+    def test_expired_deadline(self):
+        with request_deadline(0.0):
+            with self.assertRaises(DeadlineExceededException):
+                remaining_timeout()
+
+
+class ClientDeadlineTests(unittest.TestCase):
+    def _client(self, latency, **kwargs):
+        self._transport = FakeTransport(handler=any_response, latency=latency)
+        return WikipediaPageViewApiClient(
+            "en.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            transport=self._transport,
+            **kwargs,
+        )
+
+    def test_call_timeout(self):
+        client = self._client(0.2, timeout=0.05)
+        with self.assertRaises(requests.exceptions.Timeout):
+            client.get_top_pageviews(TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1))
+
+    def test_single_call_deadline(self):
+        client = self._client(0.2, deadline=0.05)
+        self.assertEqual(0.05, client.with_project("de.wikipedia").deadline)
+        with self.assertRaises(DeadlineExceededException):
+            client.get_top_pageviews(TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1))
+
+    def test_all_days_partial_result(self):
+        client = self._client(0.2, deadline=0.5)
+        request = TopViewedPerCountryRequest("FR", AccessMethod.ALL, 2021, 1, "all-days")
+        start = time.monotonic()
+        df = client.get_top_view_per_country(request)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(2, df["views_ceil"][0])
+        self.assertEqual([f"202101{day:02d}" for day in range(3, 32)], df.attrs["missing"])
+
+    def test_matrix_partial_result(self):
+        client = self._client(0.2, deadline=0.5)
+        request = ArticleMatrixRequest(
+            AccessMethod.ALL,
+            AgentType.ALL,
+            ["A", "B", "C"],
+            Granularity.DAILY,
+            "20210101",
+            "20210101",
+        )
+        matrix = client.get_per_article_pageviews_matrix(request, max_workers=1)
+        self.assertEqual(["C"], matrix.missing)
+        self.assertEqual([1, 1, 0], list(matrix.values[:, 0]))
+
+    def test_run_batch_partial_result(self):
+        client = self._client(0.2, deadline=0.3)
+        requests_ = [
+            TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1),
+            TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 2),
+        ]
+        report = client.run_batch(requests_, max_workers=1)
+        self.assertEqual([1], report.missing)
+        self.assertEqual(["Main_Page"], list(report.results[0]["article"]))
+        self.assertTrue(report.results[1].empty)
+
+    def test_run_batch_partial_frame(self):
+        client = self._client(0.2, deadline=0.5)
+        request = TopViewedPerCountryRequest("FR", AccessMethod.ALL, 2021, 1, "all-days")
+        report = client.run_batch([request, request])
+        self.assertEqual([], report.missing)
+        missing = [f"202101{day:02d}" for day in range(3, 32)]
+        self.assertEqual({0: missing, 1: missing}, report.partial)
+        self.assertEqual(missing, report.results[1].attrs["missing"])
+
+    def test_no_deadline(self):
+        client = self._client(0.0)
+        request = TopViewedPerCountryRequest("FR", AccessMethod.ALL, 2021, 1, "all-days")
+        df = client.get_top_view_per_country(request)
+        self.assertNotIn("missing", df.attrs)
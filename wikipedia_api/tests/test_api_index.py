@@ -0,0 +1,102 @@
+from datetime import datetime
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_index import TopViewIndex
+
+
+def top_frame(country, day, articles, access="all-access", project="en.wikipedia"):
+    return pd.DataFrame(
+        {
+            "country": country,
+            "access": access,
+            "year": "2021",
+            "month": "01",
+            "day": f"{day:02d}",
+            "rank": range(1, len(articles) + 1),
+            "article": list(articles),
+            "project": project,
+            "views_ceil": [1000 * (len(articles) - i) for i in range(len(articles))],
+        }
+    )
+
+
+class TopViewIndexTests(unittest.TestCase):
+    def setUp(self):
+        self._index = TopViewIndex(capacity=2)
+        self._index.add(top_frame("FR", 2, ["Paris", "Main_Page"]))
+        self._index.add(
+            pd.concat(
+                [
+                    top_frame("FR", 1, ["Main_Page", "Paris", "Lyon"]),
+                    top_frame("DE", 1, ["Berlin", "Paris"]),
+                ]
+            )
+        )
+
+    def test_postings(self):
+        rows = self._index.postings("Paris")
+        self.assertEqual(["FR", "DE", "FR"], list(rows.country))
+        self.assertEqual(
+            list(np.array(["2021-01-01", "2021-01-01", "2021-01-02"], "datetime64[D]")),
+            list(rows.date),
+        )
+        self.assertEqual([2, 2, 1], list(rows.rank))
+        self.assertEqual([2000, 1000, 2000], list(rows.views_ceil))
+
+        rows = self._index.postings("Paris", start_date="20210102")
+        self.assertEqual([1], list(rows.rank))
+        rows = self._index.postings("Paris", end_date=datetime(2021, 1, 1), country="DE")
+        self.assertEqual(["DE"], list(rows.country))
+        self.assertEqual(0, len(self._index.postings("Unknown")))
+        self.assertEqual(0, len(self._index.postings("Paris", country="US")))
+
+    def test_postings_per_project(self):
+        self._index.add(top_frame("DE", 2, ["Main_Page", "Paris"], project="de.wikipedia"))
+        self.assertEqual(6, self._index.article_count)
+        rows = self._index.postings("Main_Page", project="de.wikipedia")
+        self.assertEqual(["DE"], list(rows.country))
+        self.assertEqual(["de.wikipedia"], list(rows.project))
+        rows = self._index.postings("Main_Page", project="en.wikipedia")
+        self.assertEqual(["FR", "FR"], list(rows.country))
+        # every project by default, sorted by day then in ingestion order
+        rows = self._index.postings("Paris")
+        self.assertEqual(["FR", "DE", "FR", "DE"], list(rows.country))
+        self.assertEqual(
+            ["en.wikipedia", "en.wikipedia", "en.wikipedia", "de.wikipedia"],
+            list(rows.project),
+        )
+        self.assertEqual(0, len(self._index.postings("Paris", project="fr.wikipedia")))
+
+    def test_ranking(self):
+        df = self._index.ranking("FR", "20210101").to_frame()
+        self.assertEqual(["Main_Page", "Paris", "Lyon"], list(df["article"]))
+        self.assertEqual([1, 2, 3], list(df["rank"]))
+        self.assertEqual(["en.wikipedia"] * 3, list(df["project"]))
+        self.assertEqual(0, len(self._index.ranking("FR", "20210103")))
+
+    def test_incremental_add(self):
+        self.assertEqual(7, len(self._index))
+        self.assertEqual(4, self._index.article_count)
+        # days already in the index are skipped
+        self.assertEqual(0, self._index.add(top_frame("FR", 1, ["Other"])))
+        added = self._index.add_frames(
+            iter([top_frame("FR", 3, ["Paris"]), pd.DataFrame()])
+        )
+        self.assertEqual(1, added)
+        self.assertEqual(3, len(self._index.postings("Paris", country="FR")))
+        self.assertEqual(4, len(self._index.days()))
+        self.assertEqual("all-access", self._index.access)
+
+    def test_invalid_frames(self):
+        with self.assertRaises(InputException):
+            self._index.add(top_frame("FR", 4, ["Paris"]).drop(columns="rank"))
+        with self.assertRaises(InputException):
+            self._index.add(top_frame("FR", 4, ["Paris"], access="desktop"))
+        all_days = top_frame("FR", 4, ["Paris"])
+        all_days["day"] = "all-days"
+        with self.assertRaises(InputException):
+            self._index.add(all_days)
@@ -0,0 +1,126 @@
+from datetime import datetime
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_matrix import build_time_index, timestamp_to_offset
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    AgentType,
+    ArticleMatrixRequest,
+    Granularity,
+)
+
+try:
+    import scipy.sparse  # noqa: F401
+
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+
+def per_article_response(endpoint, api_header, params):
+    # "Main" has views every other day, "Missing" doesn't exist
+    if params["article"] == "Missing":
+        return {"type": "not found", "title": "Not found."}
+    items = []
+    for day in range(1, 11, 2):
+        items.append(
+            {
+                "project": params["project"],
+                "article": params["article"],
+                "granularity": "daily",
+                "timestamp": f"202011{day:02d}00",
+                "access": params["access"],
+                "agent": params["agent"],
+                "views": day * 10,
+            }
+        )
+    return {"items": items}
+
+
+class PageViewMatrixTests(unittest.TestCase):
+    def setUp(self):
+        self._client = WikipediaPageViewApiClient(
+            "en.wikipedia", APIHeader("test agent", "test@test.com")
+        )
+        self._request = ArticleMatrixRequest(
+            access=AccessMethod.ALL,
+            agent=AgentType.USER,
+            articles=["Main", "Missing", "Other"],
+            granularity=Granularity.DAILY,
+            start_time="20201101",
+            end_time="20201110",
+        )
+
+    def test_timestamp_to_offset(self):
+        start = datetime(2020, 11, 1)
+        self.assertEqual(timestamp_to_offset("2020110100", start, Granularity.DAILY), 0)
+        self.assertEqual(timestamp_to_offset("2021010100", start, Granularity.DAILY), 61)
+        self.assertEqual(
+            timestamp_to_offset("2021020100", start, Granularity.MONTHLY), 3
+        )
+
+    def test_build_time_index(self):
+        index = build_time_index(
+            datetime(2020, 11, 15), datetime(2021, 2, 1), Granularity.MONTHLY
+        )
+        self.assertEqual(len(index), 4)
+        index = build_time_index(
+            datetime(2020, 11, 1), datetime(2020, 11, 10, 5), Granularity.DAILY
+        )
+        self.assertEqual(len(index), 10)
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_dense_matrix(self, rest_api_call_mock: MagicMock):
+        rest_api_call_mock.side_effect = per_article_response
+        matrix = self._client.get_per_article_pageviews_matrix(self._request)
+        self.assertEqual(matrix.shape, (3, 10))
+        self.assertEqual(matrix.values.dtype, np.int64)
+        self.assertEqual(list(matrix.articles), ["Main", "Missing", "Other"])
+        np.testing.assert_array_equal(
+            matrix.row("Main"), [10, 0, 30, 0, 50, 0, 70, 0, 90, 0]
+        )
+        np.testing.assert_array_equal(matrix.row("Missing"), np.zeros(10))
+        df = matrix.to_frame()
+        self.assertEqual(df.loc["Other", datetime(2020, 11, 9)], 90)
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_nan_fill(self, rest_api_call_mock: MagicMock):
+        rest_api_call_mock.side_effect = per_article_response
+        matrix = self._client.get_per_article_pageviews_matrix(
+            self._request, dtype=np.float32, fill_nan=True
+        )
+        self.assertEqual(matrix.values.dtype, np.float32)
+        self.assertTrue(np.isnan(matrix.row("Main")[1]))
+        self.assertEqual(matrix.row("Main")[2], 30)
+        self.assertTrue(np.isnan(matrix.row("Missing")).all())
+
+    @unittest.skipUnless(HAS_SCIPY, "scipy is not installed")
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_sparse_matrix(self, rest_api_call_mock: MagicMock):
+        rest_api_call_mock.side_effect = per_article_response
+        matrix = self._client.get_per_article_pageviews_matrix(
+            self._request, sparse=True
+        )
+        self.assertEqual(matrix.shape, (3, 10))
+        self.assertEqual(matrix.values.nnz, 10)
+        np.testing.assert_array_equal(
+            matrix.row("Other"), [10, 0, 30, 0, 50, 0, 70, 0, 90, 0]
+        )
+
+    def test_validation(self):
+        with self.assertRaises(InputException):
+            self._client.get_per_article_pageviews_matrix(self._request, fill_nan=True)
+        with self.assertRaises(InputException):
+            self._client.get_per_article_pageviews_matrix(
+                self._request, dtype=np.float64, fill_nan=True, sparse=True
+            )
+        with self.assertRaises(InputException):
+            self._client.get_per_article_pageviews_matrix(
+                self._request._replace(granularity=Granularity.HOURLY)
+            )
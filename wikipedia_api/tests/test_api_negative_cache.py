@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from wikipedia_api.pageviews.api_batch import BatchJob
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_exceptions import NotFoundException
+from wikipedia_api.pageviews.api_negative_cache import (
+    BloomFilter,
+    NegativeCache,
+    article_key,
+)
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    AgentType,
+    Granularity,
+    PerArticlePageViewRequest,
+    TopViewedPerCountryRequest,
+)
+from wikipedia_api.pageviews.api_utils import check_response_status
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def not_found(endpoint, api_header, params):
+    raise NotFoundException("not found", 404)
+
+
+class BloomFilterTests(unittest.TestCase):
+    def test_membership(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"title-{i}")
+        self.assertTrue(all(f"title-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+        self.assertEqual(len(bloom), 1000)
+
+
+class NegativeCacheTests(unittest.TestCase):
+    def test_ttl(self):
+        clock = FakeClock()
+        cache = NegativeCache(ttl=10, clock=clock)
+        cache.add("a")
+        clock.now += 5
+        self.assertIn("a", cache)
+        clock.now += 5
+        self.assertNotIn("a", cache)
+        self.assertEqual(len(cache), 0)
+
+    def test_max_entries(self):
+        cache = NegativeCache(max_entries=2)
+        cache.update(["a", "b", "c"])
+        self.assertNotIn("a", cache)
+        self.assertIn("c", cache)
+
+    def test_bloom_filter_rotation(self):
+        clock = FakeClock()
+        cache = NegativeCache(ttl=10, max_entries=0, bloom_capacity=100, clock=clock)
+        cache.add("a")
+        self.assertEqual(len(cache), 0)
+        self.assertIn("a", cache)
+        clock.now += 15
+        # still known by the previous generation
+        self.assertIn("a", cache)
+        clock.now += 10
+        self.assertNotIn("a", cache)
+
+    def test_check_response_status(self):
+        check_response_status(200, "url")
+        with self.assertRaises(NotFoundException):
+            check_response_status(404, "url")
+
+
+class ClientNegativeCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.cache = NegativeCache()
+        self.client = WikipediaPageViewApiClient(
+            "en.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            negative_cache=self.cache,
+        )
+        self.request = PerArticlePageViewRequest(
+            AccessMethod.ALL,
+            AgentType.ALL,
+            "No_Such_Title",
+            Granularity.DAILY,
+            "20210101",
+            "20210131",
+        )
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_missing_article(self, rest_api_call_mock: MagicMock):
+        rest_api_call_mock.side_effect = not_found
+        with self.assertRaises(NotFoundException):
+            self.client.get_per_article_pageviews(self.request)
+        self.assertTrue(self.client.is_known_missing(self.request))
+        self.assertIn(
+            article_key(
+                "en.wikipedia",
+                "No_Such_Title",
+                "all-access",
+                "all-agents",
+                "daily",
+                "2021010100",
+                "2021013100",
+            ),
+            self.cache,
+        )
+        with self.assertRaises(NotFoundException):
+            self.client.get_per_article_pageviews(self.request)
+        self.assertEqual(rest_api_call_mock.call_count, 1)
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_missing_range_keeps_other_ranges(self, rest_api_call_mock: MagicMock):
+        def published_until_2021(endpoint, api_header, params):
+            if params["start"] >= "2030":
+                raise NotFoundException("not found", 404)
+            return {"items": [{"timestamp": params["start"], "views": 1}]}
+
+        rest_api_call_mock.side_effect = published_until_2021
+        unpublished = self.request._replace(start_time="20300101", end_time="20300131")
+        with self.assertRaises(NotFoundException):
+            self.client.get_per_article_pageviews(unpublished)
+        self.assertTrue(self.client.is_known_missing(unpublished))
+        self.assertFalse(self.client.is_known_missing(self.request))
+        self.assertFalse(
+            self.client.is_known_missing(self.request._replace(agent=AgentType.USER))
+        )
+        df = self.client.get_per_article_pageviews(self.request)
+        self.assertEqual(list(df["views"]), [1])
+        self.assertEqual(rest_api_call_mock.call_count, 2)
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_withheld_country(self, rest_api_call_mock: MagicMock):
+        rest_api_call_mock.side_effect = not_found
+        request = TopViewedPerCountryRequest("XX", AccessMethod.ALL, 2021, 2, 1)
+        df = self.client.get_top_view_per_country(request)
+        self.assertTrue(df.empty)
+        self.assertIn("views_ceil", df.columns)
+        self.assertTrue(self.client.is_known_missing(request))
+        self.client.get_top_view_per_country(request)
+        self.assertEqual(rest_api_call_mock.call_count, 1)
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_unpublished_day_not_remembered(self, rest_api_call_mock: MagicMock):
+        rest_api_call_mock.side_effect = not_found
+        yesterday = datetime.now() - timedelta(days=1)
+        request = TopViewedPerCountryRequest(
+            "FR", AccessMethod.ALL, yesterday.year, yesterday.month, yesterday.day
+        )
+        self.assertTrue(self.client.get_top_view_per_country(request).empty)
+        self.assertFalse(self.client.is_known_missing(request))
+        self.assertEqual(0, len(self.cache))
+        self.client.get_top_view_per_country(request)
+        self.assertEqual(rest_api_call_mock.call_count, 2)
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_batch_job_skips_known_missing(self, rest_api_call_mock: MagicMock):
+        rest_api_call_mock.side_effect = not_found
+        with tempfile.TemporaryDirectory() as directory:
+            job = BatchJob.create(directory, [self.request], "en.wikipedia")
+            report = job.run(self.client)
+            self.assertEqual((report.executed, report.skipped), (1, 0))
+            self.assertTrue(job.is_done())
+
+            job = BatchJob.create(
+                tempfile.mkdtemp(dir=directory), [self.request], "en.wikipedia"
+            )
+            report = job.run(self.client)
+            self.assertEqual((report.executed, report.skipped), (0, 1))
+            self.assertTrue(job.read_results().empty)
+        self.assertEqual(rest_api_call_mock.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_pipeline import TopArticleRows
+from wikipedia_api.pageviews.api_transport import FakeTransport
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    AggregatePageViewRequest,
+    AgentType,
+    Granularity,
+    TopViewedArticleRequest,
+    TopViewedPerCountryRequest,
+)
+
+TOP_PER_COUNTRY = {
+    "FR": [("Paris", "fr.wikipedia"), ("Paris", "en.wikipedia")],
+    "DE": [("Berlin", "de.wikipedia"), ("Paris", "en.wikipedia")],
+}
+
+
+def handler(url):
+    parts = url.rstrip("/").split("/")
+    if "/top-per-country/" in url:
+        country = parts[-5]
+        articles = [
+            {"article": article, "project": project, "views_ceil": 100, "rank": rank}
+            for rank, (article, project) in enumerate(TOP_PER_COUNTRY[country], 1)
+        ]
+        return {"items": [{"articles": articles}]}
+    if "/top/" in url:
+        articles = [
+            {"article": "Paris", "views": 50, "rank": 1},
+            {"article": "Missing", "views": 10, "rank": 2},
+        ]
+        return {"items": [{"articles": articles}]}
+    if "/per-article/" in url:
+        project, article = parts[-7], parts[-4]
+        if article == "Missing":
+            return None
+        views = 1 if project == "en.wikipedia" else 2
+        items = [
+            {"timestamp": f"2021010{day}00", "views": views * day} for day in (1, 3)
+        ]
+        return {"items": items}
+    return None
+
+
+class TopArticleRowsTests(unittest.TestCase):
+    def test_assign(self):
+        rows = TopArticleRows()
+        self.assertEqual(
+            ([0, 1, 0], [0, 1]),
+            rows.assign(["en.wikipedia"] * 3, ["Paris", "Lyon", "Paris"]),
+        )
+        # same article once normalized, other project is another article
+        self.assertEqual(
+            ([0, 2], [2]), rows.assign(["en.wikipedia", "fr.wikipedia"], ["paris"] * 2)
+        )
+        self.assertEqual(
+            ["en.wikipedia", "en.wikipedia", "fr.wikipedia"], rows.projects
+        )
+        self.assertEqual(3, len(rows))
+
+
+class TopPageviewsHistoryTests(unittest.TestCase):
+    def setUp(self):
+        self._transport = FakeTransport(handler=handler)
+        self._client = WikipediaPageViewApiClient(
+            "en.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            transport=self._transport,
+        )
+
+    def test_top_history(self):
+        result = self._client.get_top_pageviews_history(
+            [
+                TopViewedPerCountryRequest("FR", AccessMethod.ALL, 2021, 2, 1),
+                TopViewedPerCountryRequest("DE", AccessMethod.ALL, 2021, 2, 1),
+                TopViewedArticleRequest(AccessMethod.ALL, 2021, 2, 1),
+            ],
+            "20210101",
+            "20210103",
+        )
+        self.assertEqual([0, 1, 2, 1, 1, 3], list(result.ranks["row"]))
+        self.assertEqual(
+            ["Paris", "Paris", "Berlin", "Missing"], list(result.history.articles)
+        )
+        self.assertEqual(
+            ["fr.wikipedia", "en.wikipedia", "de.wikipedia", "en.wikipedia"],
+            result.projects,
+        )
+        self.assertEqual([2, 0, 6], list(result.history.row("Berlin")))
+        self.assertEqual(
+            [[2, 0, 6], [1, 0, 3], [2, 0, 6], [0, 0, 0]],
+            result.history.values.tolist(),
+        )
+        history_calls = [url for url in self._transport.calls if "/per-article/" in url]
+        self.assertEqual(4, len(history_calls))
+        self.assertEqual([], result.missing_tops)
+
+        df = result.to_frame()
+        self.assertEqual(6, len(df))
+        self.assertEqual([6, 3], list(df[df["country"] == "DE"].iloc[:, -1]))
+
+    def test_invalid_requests(self):
+        aggregate = AggregatePageViewRequest(
+            AccessMethod.ALL, AgentType.ALL, Granularity.DAILY, "20210101", "20210102"
+        )
+        with self.assertRaises(InputException):
+            self._client.get_top_pageviews_history([aggregate], "20210101", "20210102")
+        with self.assertRaises(InputException):
+            self._client.get_top_pageviews_history(
+                [], "20210101", "20210102", granularity=Granularity.HOURLY
+            )
@@ -0,0 +1,223 @@
+from datetime import datetime, timedelta
+import unittest
+
+import pandas as pd
+
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_exceptions import InputException, NotFoundException
+from wikipedia_api.pageviews.api_plan import (
+    plan_requests,
+    split_result,
+    upstream_call_count,
+)
+from wikipedia_api.pageviews.api_transport import FakeTransport
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    AgentType,
+    AggregatePageViewRequest,
+    ArticleMatrixRequest,
+    Granularity,
+    PerArticlePageViewRequest,
+    TopViewedArticleRequest,
+    TopViewedPerCountryRequest,
+)
+
+AGGREGATE_PATH = "/api/rest_v1/metrics/pageviews/aggregate/en.wikipedia/all-access/user/daily"
+
+
+def aggregate(start_time, end_time, granularity=Granularity.DAILY):
+    return AggregatePageViewRequest(
+        AccessMethod.ALL, AgentType.USER, granularity, start_time, end_time
+    )
+
+
+def per_article(article, start_time, end_time):
+    return PerArticlePageViewRequest(
+        AccessMethod.ALL, AgentType.USER, article, Granularity.DAILY, start_time, end_time
+    )
+
+
+def daily_items(days):
+    return {
+        "items": [
+            {
+                "project": "en.wikipedia",
+                "access": "all-access",
+                "agent": "user",
+                "granularity": "daily",
+                "timestamp": f"202011{day:02d}00",
+                "views": day,
+            }
+            for day in days
+        ]
+    }
+
+
+def range_items(url):
+    # one daily item per day of the range of an aggregate URL
+    *_, start, end = url.split("/")
+    day = datetime.strptime(start, "%Y%m%d%H")
+    items = []
+    while day <= datetime.strptime(end, "%Y%m%d%H"):
+        if "/legacy/" in url:
+            item = {"access-site": "all-sites", "count": day.day}
+        else:
+            item = {"access": "all-access", "agent": "user", "views": day.day}
+        item.update(
+            {
+                "project": "en.wikipedia",
+                "granularity": "daily",
+                "timestamp": day.strftime("%Y%m%d00"),
+            }
+        )
+        items.append(item)
+        day += timedelta(days=1)
+    return {"items": items}
+
+
+class PlanRequestsTests(unittest.TestCase):
+    def test_identical_requests_are_executed_once(self):
+        top = TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1)
+        other = TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 2)
+        plan = plan_requests([top, other, top])
+        self.assertEqual([top, other], plan.requests)
+        self.assertEqual([0, 1, 0], plan.assignments)
+
+    def test_overlapping_and_adjacent_ranges_are_merged(self):
+        requests = [
+            aggregate("20201103", "20201105"),
+            aggregate("20201101", "20201103"),
+            aggregate("20201106", "20201107"),
+            aggregate("20201110", "20201111"),
+        ]
+        plan = plan_requests(requests)
+        self.assertEqual(
+            [aggregate("2020110100", "2020110700"), aggregate("20201110", "20201111")],
+            plan.requests,
+        )
+        self.assertEqual([0, 0, 0, 1], plan.assignments)
+
+    def test_legacy_split_is_kept(self):
+        requests = [
+            aggregate("20150625", "20150630"),
+            aggregate("20150701", "20150703"),
+            aggregate("20150620", "20150702"),
+            aggregate("20150615", "20150705"),
+        ]
+        plan = plan_requests(requests)
+        # legacy only, page view only and requests split between both APIs
+        self.assertEqual([0, 1, 2, 2], plan.assignments)
+        self.assertEqual(aggregate("2015061500", "2015070500"), plan.requests[2])
+
+    def test_series_are_not_mixed(self):
+        requests = [
+            per_article("Foo", "20201101", "20201105"),
+            per_article("Bar", "20201101", "20201105"),
+            aggregate("20201101", "20201105", Granularity.MONTHLY),
+            aggregate("20201101", "20201105", Granularity.MONTHLY),
+        ]
+        plan = plan_requests(requests)
+        self.assertEqual(3, len(plan.requests))
+        self.assertEqual([1, 2, 0, 0], plan.assignments)
+
+    def test_invalid_time_range(self):
+        with self.assertRaises(InputException):
+            plan_requests([aggregate("20201105", "20201101")])
+
+    def test_split_result(self):
+        df = pd.DataFrame(daily_items(range(1, 8))["items"])
+        request = aggregate("20201103", "20201105")
+        merged = aggregate("2020110100", "2020110700")
+        self.assertEqual([3, 4, 5], list(split_result(request, merged, df)["views"]))
+        self.assertEqual(7, len(split_result(merged, merged, df)))
+
+    def test_upstream_call_count(self):
+        self.assertEqual(1, upstream_call_count(aggregate("20201101", "20201105")))
+        legacy_and_mobile = AggregatePageViewRequest(
+            AccessMethod.MOBILE, AgentType.USER, Granularity.DAILY, "20150101", "20150801"
+        )
+        self.assertEqual(3, upstream_call_count(legacy_and_mobile))
+        all_days = TopViewedPerCountryRequest("FR", AccessMethod.ALL, 2021, 2, "all-days")
+        self.assertEqual(28, upstream_call_count(all_days))
+
+
+class RunBatchTests(unittest.TestCase):
+    def setUp(self):
+        self._transport = FakeTransport()
+        self._client = WikipediaPageViewApiClient(
+            "en.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            transport=self._transport,
+        )
+
+    def test_run_batch(self):
+        self._transport.add(
+            f"{AGGREGATE_PATH}/2020110100/2020110700", daily_items(range(1, 8))
+        )
+        top = TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1)
+        self._transport.add(
+            "/api/rest_v1/metrics/pageviews/top/en.wikipedia/all-access/2021/01/01",
+            {"items": [{"articles": [{"article": "Main_Page", "views": 1, "rank": 1}]}]},
+        )
+        requests = [
+            aggregate("20201101", "20201104"),
+            top,
+            aggregate("20201103", "20201107"),
+            top,
+        ]
+        report = self._client.run_batch(requests)
+
+        self.assertEqual(2, len(self._transport.calls))
+        self.assertEqual(4, report.requests)
+        self.assertEqual(2, report.executed)
+        self.assertEqual(2, report.upstream_calls)
+        self.assertEqual(2, report.calls_saved)
+        self.assertEqual([1, 2, 3, 4], list(report.results[0]["views"]))
+        self.assertEqual([3, 4, 5, 6, 7], list(report.results[2]["views"]))
+        self.assertEqual(["Main_Page"], list(report.results[1]["article"]))
+        self.assertIsNot(report.results[1], report.results[3])
+
+    def test_run_batch_matches_execute(self):
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            transport=FakeTransport(handler=range_items),
+        )
+        requests = [
+            aggregate("20150625", "20150630"),
+            aggregate("20150701", "20150703"),
+            aggregate("20150620", "20150702"),
+            aggregate("20150615", "20150705"),
+            aggregate("20201101", "20201104"),
+            aggregate("20201103", "20201107"),
+        ]
+        report = client.run_batch(requests)
+        self.assertEqual(3, report.calls_saved)
+        for request, result in zip(requests, report.results):
+            pd.testing.assert_frame_equal(client.execute(request), result)
+
+    def test_failed_request_keeps_other_results(self):
+        self._transport.add(
+            "/api/rest_v1/metrics/pageviews/top/en.wikipedia/all-access/2021/01/01",
+            {"items": [{"articles": [{"article": "Main_Page", "views": 1, "rank": 1}]}]},
+        )
+        requests = [
+            TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1),
+            per_article("Missing_Title", "20201101", "20201104"),
+        ]
+        report = self._client.run_batch(requests)
+        self.assertEqual(["Main_Page"], list(report.results[0]["article"]))
+        self.assertTrue(report.results[1].empty)
+        self.assertEqual([1], report.missing)
+        self.assertEqual([1], list(report.errors))
+        self.assertIsInstance(report.errors[1], NotFoundException)
+        self.assertEqual({}, report.partial)
+
+    def test_unsupported_request(self):
+        request = ArticleMatrixRequest(
+            AccessMethod.ALL, AgentType.USER, ["Foo"], Granularity.DAILY, "20201101", "20201102"
+        )
+        with self.assertRaises(InputException):
+            self._client.run_batch([request])
+        self.assertEqual([], self._transport.calls)
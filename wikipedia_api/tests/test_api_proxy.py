@@ -0,0 +1,133 @@
+import tempfile
+import threading
+import unittest
+
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_concurrent import TokenBucket
+from wikipedia_api.pageviews.api_constants import PageViewApiEndPoints
+from wikipedia_api.pageviews.api_exceptions import NotFoundException
+from wikipedia_api.pageviews.api_proxy import CachingProxyServer
+from wikipedia_api.pageviews.api_transport import FakeTransport, Urllib3Transport
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    AgentType,
+    Granularity,
+    PerArticlePageViewRequest,
+    TopViewedArticleRequest,
+)
+from wikipedia_api.pageviews.api_utils import rebase_endpoint
+
+HEADER = APIHeader("test agent", "test@test.com")
+
+
+def top_response(url):
+    if not url.startswith(PageViewApiEndPoints.BASE_URL + "/api/rest_v1/metrics/pageviews/top/"):
+        return None
+    return {"items": [{"articles": [{"article": "Main_Page", "views": 7, "rank": 1}]}]}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=2, clock=clock, sleep=clock.sleep)
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertFalse(bucket.try_acquire())
+        self.assertAlmostEqual(bucket.acquire(), 0.5)
+        clock.now += 10
+        # tokens are capped by the burst
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+
+class CachingProxyTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._upstream = FakeTransport(handler=top_response, latency=0.1)
+        self._proxy = CachingProxyServer(
+            self._tmp_dir.name, port=0, rate=1000, transport=self._upstream
+        ).start()
+        self._request = TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1)
+
+    def tearDown(self):
+        self._proxy.stop()
+        self._tmp_dir.cleanup()
+
+    def _client(self, **kwargs):
+        return WikipediaPageViewApiClient(
+            "en.wikipedia", HEADER, base_url=self._proxy.base_url, **kwargs
+        )
+
+    def test_rebase_endpoint(self):
+        endpoint = rebase_endpoint(PageViewApiEndPoints.TOP_PAGEVIEWS, "http://proxy:1/")
+        self.assertTrue(endpoint.startswith("http://proxy:1/api/rest_v1/metrics/"))
+        self.assertEqual(
+            rebase_endpoint(PageViewApiEndPoints.TOP_PAGEVIEWS, None),
+            PageViewApiEndPoints.TOP_PAGEVIEWS,
+        )
+
+    def test_single_flight_and_shared_cache(self):
+        clients = [self._client(transport=Urllib3Transport()) for _ in range(8)]
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda c=client: results.append(c.get_top_pageviews(self._request))
+            )
+            for client in clients
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(df["views"][0] == 7 for df in results))
+        self.assertEqual(len(self._upstream.calls), 1)
+        stats = self._proxy.stats()
+        self.assertEqual(stats.misses, 1)
+        self.assertEqual(stats.hits + stats.coalesced, 7)
+
+        # a new proxy process on the same cache directory doesn't call upstream
+        proxy = CachingProxyServer(
+            self._tmp_dir.name, port=0, transport=self._upstream
+        ).start()
+        try:
+            client = WikipediaPageViewApiClient("en.wikipedia", HEADER, base_url=proxy.base_url)
+            self.assertEqual(client.get_top_pageviews(self._request)["views"][0], 7)
+            self.assertEqual(client.with_project("en.wikipedia").base_url, proxy.base_url)
+        finally:
+            proxy.stop()
+        self.assertEqual(len(self._upstream.calls), 1)
+
+    def test_not_found_is_passed_through(self):
+        request = PerArticlePageViewRequest(
+            AccessMethod.ALL, AgentType.USER, "Missing", Granularity.DAILY,
+            "20210101", "20210102",
+        )
+        with self.assertRaises(NotFoundException):
+            self._client().get_per_article_pageviews(request)
+
+    def test_expired_entries_are_revalidated(self):
+        proxy = CachingProxyServer(
+            self._tmp_dir.name, port=0, ttl=0, transport=self._upstream
+        ).start()
+        try:
+            client = WikipediaPageViewApiClient("en.wikipedia", HEADER, base_url=proxy.base_url)
+            client.get_top_pageviews(self._request)
+            client.get_top_pageviews(self._request)
+            stats = proxy.stats()
+        finally:
+            proxy.stop()
+        self.assertEqual((stats.misses, stats.revalidated), (1, 1))
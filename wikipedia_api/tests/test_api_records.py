@@ -0,0 +1,101 @@
+import os
+import subprocess
+import sys
+import textwrap
+import unittest
+
+import pandas as pd
+
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_lazy import LazyModule
+from wikipedia_api.pageviews.api_records import TopArticleRecord
+from wikipedia_api.pageviews.api_transport import FakeTransport
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    TopViewedArticleRequest,
+)
+
+TOP_RESPONSE = {
+    "items": [
+        {
+            "articles": [
+                {"article": "Main_Page", "views": 5000000, "rank": 1},
+                {"article": "Special:Search", "views": 800000, "rank": 2},
+            ]
+        }
+    ]
+}
+
+
+class TopArticleRecordsTests(unittest.TestCase):
+    def setUp(self):
+        self._client = WikipediaPageViewApiClient(
+            "en.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            transport=FakeTransport(handler=lambda url: TOP_RESPONSE),
+        )
+        self._request = TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1)
+
+    def test_records(self):
+        records = self._client.get_top_pageviews_records(self._request)
+        self.assertEqual(2, len(records))
+        self.assertEqual(TopArticleRecord("Main_Page", 5000000, 1), records[0])
+        self.assertEqual(
+            ["Main_Page", "Special:Search"], [record.article for record in records]
+        )
+        self.assertEqual([5000000, 800000], list(records.views))
+        self.assertEqual(
+            ("2021", "01", "01"), (records.year, records.month, records.day)
+        )
+        with self.assertRaises(AttributeError):
+            records[0].other = 1
+
+    def test_to_pandas(self):
+        records = self._client.get_top_pageviews_records(self._request)
+        pd.testing.assert_frame_equal(
+            self._client.get_top_pageviews(self._request), records.to_pandas()
+        )
+
+    def test_validation(self):
+        with self.assertRaises(InputException):
+            self._client.get_top_pageviews_records(
+                TopViewedArticleRequest(AccessMethod.MOBILE, 2021, 1, 1)
+            )
+
+    def test_lazy_module(self):
+        module = LazyModule("json")
+        self.assertEqual("[1]", module.dumps([1]))
+
+    def test_pandas_not_imported(self):
+        code = textwrap.dedent(
+            """
+            import sys
+            from wikipedia_api import (
+                APIHeader,
+                AccessMethod,
+                FakeTransport,
+                TopViewedArticleRequest,
+                WikipediaPageViewApiClient,
+            )
+
+            response = {"items": [{"articles": [
+                {"article": "Main_Page", "views": 10, "rank": 1}
+            ]}]}
+            client = WikipediaPageViewApiClient(
+                "en.wikipedia",
+                APIHeader("test agent", "test@test.com"),
+                transport=FakeTransport(handler=lambda url: response),
+            )
+            request = TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1)
+            records = client.get_top_pageviews_records(request)
+            assert [r.article for r in records] == ["Main_Page"]
+            assert "pandas" not in sys.modules, "pandas was imported"
+            """
+        )
+        root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, cwd=root
+        )
+        self.assertEqual(0, result.returncode, result.stderr)
@@ -0,0 +1,133 @@
+import os
+import tempfile
+import time
+import unittest
+
+import pandas as pd
+
+from wikipedia_api.cli import main
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_exceptions import NotFoundException
+from wikipedia_api.pageviews.api_replay import (
+    RecordingTransport,
+    ReplayTransport,
+    read_archive,
+)
+from wikipedia_api.pageviews.api_transport import FakeTransport
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    AgentType,
+    AggregatePageViewRequest,
+    Granularity,
+    TopViewedArticleRequest,
+)
+
+HEADER = APIHeader("test agent", "test@test.com")
+
+
+def top_response(url):
+    if url.endswith("/03"):
+        return None
+    day = int(url.rsplit("/", 1)[1])
+    return {"items": [{"articles": [{"article": "Main_Page", "views": day, "rank": 1}]}]}
+
+
+class RecordReplayTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._archive = os.path.join(self._tmp_dir.name, "traffic.jsonl.gz")
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def _record(self, latency=0.0):
+        upstream = FakeTransport(handler=top_response, latency=latency)
+        with RecordingTransport(upstream, self._archive) as transport:
+            client = WikipediaPageViewApiClient("en.wikipedia", HEADER, transport=transport)
+            frames = [
+                client.get_top_pageviews(TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, day))
+                for day in (1, 2)
+            ]
+            with self.assertRaises(NotFoundException):
+                client.get_top_pageviews(TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 3))
+            self.assertEqual(transport.count, 3)
+        return frames
+
+    def test_record_and_replay(self):
+        frames = self._record()
+        records = list(read_archive(self._archive))
+        self.assertEqual([record["status"] for record in records], [200, 200, 404])
+        self.assertIn("ETag", records[0]["headers"])
+
+        replay = ReplayTransport(self._archive)
+        self.assertEqual(len(replay), 3)
+        client = WikipediaPageViewApiClient("en.wikipedia", HEADER, transport=replay)
+        for day, expected in zip((1, 2), frames):
+            df = client.get_top_pageviews(TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, day))
+            pd.testing.assert_frame_equal(df, expected)
+        with self.assertRaises(NotFoundException):
+            client.get_top_pageviews(TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 3))
+        with self.assertRaises(KeyError):
+            client.get_top_pageviews(TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 4))
+
+    def test_replay_latency(self):
+        self._record(latency=0.05)
+        request = TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1)
+
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia", HEADER, transport=ReplayTransport(self._archive)
+        )
+        start = time.perf_counter()
+        client.get_top_pageviews(request)
+        self.assertLess(time.perf_counter() - start, 0.05)
+
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia",
+            HEADER,
+            transport=ReplayTransport(self._archive, latency_scale=1.0),
+        )
+        start = time.perf_counter()
+        client.get_top_pageviews(request)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
+
+    def test_record_and_replay_stream(self):
+        items = [{"timestamp": f"202101{d:02d}00", "views": d} for d in range(1, 6)]
+        upstream = FakeTransport(handler=lambda url: {"items": items})
+        request = AggregatePageViewRequest(
+            AccessMethod.ALL, AgentType.USER, Granularity.DAILY, "20210101", "20210105"
+        )
+        with RecordingTransport(upstream, self._archive) as transport:
+            client = WikipediaPageViewApiClient("en.wikipedia", HEADER, transport=transport)
+            recorded = pd.concat(client.stream_aggregated_pageviews(request))
+
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia", HEADER, transport=ReplayTransport(self._archive)
+        )
+        replayed = pd.concat(client.stream_aggregated_pageviews(request, batch_size=2))
+        self.assertEqual(list(replayed["views"]), list(recorded["views"]))
+
+    def test_record_stream_status(self):
+        upstream = FakeTransport(handler=top_response)
+        with RecordingTransport(upstream, self._archive) as transport:
+            list(transport.stream("https://host/top/01", {}, chunk_size=8))
+            with self.assertRaises(NotFoundException):
+                list(transport.stream("https://host/top/03", {}, chunk_size=8))
+        records = list(read_archive(self._archive))
+        self.assertEqual([record["status"] for record in records], [200, 404])
+        self.assertIn("ETag", records[0]["headers"])
+        self.assertEqual(records[1]["body"], '{"title": "Not found."}')
+
+        replay = ReplayTransport(self._archive)
+        self.assertEqual(replay.stream("https://host/top/03", {}, 8).status_code, 404)
+
+    def test_cli_replay(self):
+        self._record()
+        path = os.path.join(self._tmp_dir.name, "top.csv")
+        exit_code = main(
+            ["top", "--start", "20210101", "--end", "20210102", "-o", path,
+             "--replay", self._archive, "--quiet",
+             "--user-agent", "test agent", "--call-from", "test@test.com"]
+        )
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(list(pd.read_csv(path)["views"]), [1, 2])
@@ -0,0 +1,185 @@
+import threading
+import time
+import unittest
+
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_concurrent import bounded_map
+from wikipedia_api.pageviews.api_deadline import request_deadline
+from wikipedia_api.pageviews.api_exceptions import DeadlineExceededException
+from wikipedia_api.pageviews.api_scheduler import (
+    Priority,
+    RequestScheduler,
+    current_priority,
+    request_priority,
+)
+from wikipedia_api.pageviews.api_transport import FakeTransport
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    TopViewedArticleRequest,
+)
+
+
+class RequestSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self._now = [0.0]
+        self._order = []
+        self._threads = []
+
+    def _start_waiter(self, scheduler, priority, name):
+        def run():
+            with scheduler.slot(priority):
+                self._order.append(name)
+
+        # wait for the call to be queued before starting the next one
+        waiting = sum(s.waiting for s in scheduler.stats().values())
+        thread = threading.Thread(target=run)
+        thread.start()
+        self._threads.append(thread)
+        deadline = time.monotonic() + 5
+        while sum(s.waiting for s in scheduler.stats().values()) == waiting:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
+
+    def _join(self):
+        for thread in self._threads:
+            thread.join(timeout=5)
+            self.assertFalse(thread.is_alive())
+
+    def test_interactive_goes_before_queued_bulk(self):
+        scheduler = RequestScheduler(max_concurrency=1, reserved_interactive=0, aging=None)
+        with scheduler.slot(Priority.BULK):
+            self._start_waiter(scheduler, Priority.BULK, "bulk 1")
+            self._start_waiter(scheduler, Priority.BULK, "bulk 2")
+            self._start_waiter(scheduler, Priority.INTERACTIVE, "interactive")
+        self._join()
+        self.assertEqual(["interactive", "bulk 1", "bulk 2"], self._order)
+
+    def test_aging_lets_old_bulk_go_first(self):
+        scheduler = RequestScheduler(
+            max_concurrency=1, reserved_interactive=0, aging=10.0, clock=lambda: self._now[0]
+        )
+        with scheduler.slot(Priority.INTERACTIVE):
+            self._start_waiter(scheduler, Priority.BULK, "bulk")
+            self._now[0] = 20.0
+            self._start_waiter(scheduler, Priority.INTERACTIVE, "interactive")
+            self._now[0] = 21.0
+        self._join()
+        self.assertEqual(["bulk", "interactive"], self._order)
+
+    def test_reserved_slot_is_kept_for_interactive(self):
+        scheduler = RequestScheduler(max_concurrency=2, reserved_interactive=1)
+        with scheduler.slot(Priority.BULK):
+            self._start_waiter(scheduler, Priority.BULK, "bulk")
+            with scheduler.slot(Priority.INTERACTIVE):
+                self.assertEqual([], self._order)
+                stats = scheduler.stats()
+                self.assertEqual(1, stats[Priority.BULK].waiting)
+                self.assertEqual(1, stats[Priority.INTERACTIVE].running)
+        self._join()
+        self.assertEqual(["bulk"], self._order)
+
+    def test_stats(self):
+        scheduler = RequestScheduler(
+            max_concurrency=1, reserved_interactive=0, clock=lambda: self._now[0]
+        )
+        with scheduler.slot(Priority.BULK):
+            self._start_waiter(scheduler, Priority.BULK, "bulk")
+            self._now[0] = 4.0
+        self._join()
+
+        stats = scheduler.stats()[Priority.BULK]
+        self.assertEqual(0, stats.waiting)
+        self.assertEqual(0, stats.running)
+        self.assertEqual(2, stats.started)
+        self.assertEqual(2.0, stats.mean_wait)
+        self.assertEqual(4.0, stats.max_wait)
+        self.assertEqual(0, scheduler.stats()[Priority.INTERACTIVE].started)
+
+    def test_wait_stops_at_deadline(self):
+        scheduler = RequestScheduler(max_concurrency=1, reserved_interactive=0)
+        with scheduler.slot(Priority.BULK):
+            start = time.monotonic()
+            with request_deadline(0.1):
+                with self.assertRaises(DeadlineExceededException):
+                    with scheduler.slot(Priority.INTERACTIVE):
+                        self.fail("slot granted while the only one is held")
+            self.assertLess(time.monotonic() - start, 1.0)
+            self.assertEqual(0, scheduler.stats()[Priority.INTERACTIVE].waiting)
+        # the expired waiter doesn't hold or block the slot
+        with scheduler.slot(Priority.INTERACTIVE):
+            stats = scheduler.stats()[Priority.INTERACTIVE]
+            self.assertEqual((1, 1), (stats.running, stats.started))
+
+    def test_pause_and_resume(self):
+        scheduler = RequestScheduler(max_concurrency=1, reserved_interactive=0)
+        with scheduler.slot(Priority.BULK) as slot:
+            slot.pause()
+            self.assertFalse(slot.held)
+            # the paused slot is free for another call
+            with scheduler.slot(Priority.INTERACTIVE):
+                self._start_waiter(scheduler, Priority.BULK, "bulk")
+            self._join()
+            slot.resume()
+            self.assertTrue(slot.held)
+            self.assertEqual(1, scheduler.stats()[Priority.BULK].running)
+        stats = scheduler.stats()[Priority.BULK]
+        self.assertEqual(["bulk"], self._order)
+        # the resumed call is not counted again
+        self.assertEqual((0, 2), (stats.running, stats.started))
+
+    def test_invalid_reserved_slots(self):
+        with self.assertRaises(ValueError):
+            RequestScheduler(max_concurrency=2, reserved_interactive=2)
+
+
+class RequestPriorityTests(unittest.TestCase):
+    def test_default_priority(self):
+        self.assertEqual(Priority.INTERACTIVE, current_priority())
+
+    def test_priority_follows_bounded_map(self):
+        with request_priority(Priority.BULK):
+            priorities = list(bounded_map(lambda _: current_priority(), range(4)))
+        self.assertEqual([Priority.BULK] * 4, priorities)
+        self.assertEqual(Priority.INTERACTIVE, current_priority())
+
+    def test_client_calls_use_scheduler(self):
+        transport = FakeTransport()
+        transport.add(
+            "/api/rest_v1/metrics/pageviews/top/en.wikipedia/all-access/2021/01/01",
+            {"items": [{"articles": [{"article": "Main_Page", "views": 1, "rank": 1}]}]},
+        )
+        scheduler = RequestScheduler(max_concurrency=2)
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            transport=transport,
+            scheduler=scheduler,
+        )
+        self.assertIs(scheduler, client.with_project("de.wikipedia").scheduler)
+
+        request = TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1)
+        client.get_top_pageviews(request)
+        with request_priority(Priority.BULK):
+            client.get_top_pageviews(request)
+
+        stats = scheduler.stats()
+        self.assertEqual(1, stats[Priority.INTERACTIVE].started)
+        self.assertEqual(1, stats[Priority.BULK].started)
+        self.assertEqual(0, stats[Priority.BULK].running)
+
+    def test_client_deadline_covers_slot_wait(self):
+        scheduler = RequestScheduler(max_concurrency=2, reserved_interactive=0)
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            transport=FakeTransport(),
+            scheduler=scheduler,
+            deadline=0.2,
+        )
+        request = TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1)
+        with scheduler.slot(Priority.BULK), scheduler.slot(Priority.BULK):
+            start = time.monotonic()
+            with self.assertRaises(DeadlineExceededException):
+                client.get_top_pageviews(request)
+            self.assertLess(time.monotonic() - start, 1.0)
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from wikipedia_api.pageviews.api_batch import BatchJob
+from wikipedia_api.pageviews.api_shard import (
+    merge_outputs,
+    partition_units,
+    run_available_shards,
+    run_shard,
+    run_sharded,
+    shard_of,
+)
+from wikipedia_api.pageviews.api_types import (
+    AccessMethod,
+    AgentType,
+    Granularity,
+    PerArticlePageViewRequest,
+    TopViewedPerCountryRequest,
+)
+
+
+class FakeClient:
+    """
+    Picklable client returning synthetic page views with the process id
+    """
+
+    project = "en.wikipedia"
+
+    def execute(self, request):
+        return pd.DataFrame(
+            {
+                "article": [request.article] * 3,
+                "views": [1, 2, 3],
+                "pid": [os.getpid()] * 3,
+            }
+        )
+
+
+def create_fake_client():
+    return FakeClient()
+
+
+def article_request(article):
+    return PerArticlePageViewRequest(
+        AccessMethod.ALL, AgentType.USER, article, Granularity.DAILY, "20210101", "20210103"
+    )
+
+
+class ShardTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._directory = os.path.join(self._tmp_dir.name, "job")
+        self._requests = [article_request(f"Article_{i}") for i in range(40)]
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_partition_is_deterministic(self):
+        request = TopViewedPerCountryRequest("US", AccessMethod.ALL, 2021, 1, 1)
+        self.assertEqual(shard_of(request, 7), shard_of(request._replace(), 7))
+        job = BatchJob.create(self._directory, self._requests, "en.wikipedia")
+        shards = partition_units(job, 4)
+        self.assertEqual(sorted(sum(shards, [])), sorted(job.units))
+        self.assertEqual(shards, partition_units(BatchJob(self._directory), 4))
+        self.assertTrue(all(shards))
+
+    def test_run_sharded_multi_process(self):
+        BatchJob.create(self._directory, self._requests, "en.wikipedia")
+        report = run_sharded(self._directory, create_fake_client, shard_count=3, processes=3)
+        self.assertEqual((report.total, report.completed, report.executed), (40, 40, 40))
+
+        # each shard wrote its own checkpoint from its own process
+        checkpoints = [
+            name for name in os.listdir(self._directory) if name.startswith("checkpoint-")
+        ]
+        self.assertEqual(len(checkpoints), 3)
+        df = BatchJob(self._directory).read_results()
+        self.assertEqual(len(df), 120)
+        self.assertNotIn(os.getpid(), set(df["pid"]))
+
+        output_path = os.path.join(self._tmp_dir.name, "merged.csv")
+        self.assertEqual(merge_outputs(self._directory, output_path), 120)
+        merged = pd.read_csv(output_path)
+        self.assertEqual(merged["article"].nunique(), 40)
+
+        # nothing is left to run
+        report = run_sharded(self._directory, create_fake_client, shard_count=3)
+        self.assertEqual(report.executed, 0)
+
+    def test_nodes_sharing_directory(self):
+        BatchJob.create(self._directory, self._requests, "en.wikipedia")
+        # first node claims every shard but only completes shard 0
+        run_shard(self._directory, 0, 2, create_fake_client)
+        os.makedirs(os.path.join(self._directory, "claims"))
+        claim_dir = os.path.join(self._directory, "claims")
+        for index in range(2):
+            open(os.path.join(claim_dir, f"shard-{index}-of-2.0.lock"), "w").close()
+
+        # second node skips the claimed shard until the claim is stale
+        self.assertEqual(
+            run_available_shards(self._directory, create_fake_client, 2), []
+        )
+        os.utime(os.path.join(claim_dir, "shard-1-of-2.0.lock"), (0, 0))
+        # another node already took over the stale claim
+        open(os.path.join(claim_dir, "shard-1-of-2.1.lock"), "w").close()
+        self.assertEqual(
+            run_available_shards(self._directory, create_fake_client, 2, stale_after=60),
+            [],
+        )
+        os.remove(os.path.join(claim_dir, "shard-1-of-2.1.lock"))
+        reports = run_available_shards(
+            self._directory, create_fake_client, 2, stale_after=60
+        )
+        self.assertEqual([report.shard_index for report in reports], [1])
+        self.assertTrue(BatchJob(self._directory).is_done())
+        # the stale claim was replaced and the new claim released
+        self.assertEqual(os.listdir(claim_dir), ["shard-0-of-2.0.lock"])
+
+    def test_claims_released(self):
+        BatchJob.create(self._directory, self._requests, "en.wikipedia")
+        reports = run_available_shards(self._directory, create_fake_client, 2)
+        self.assertEqual([report.shard_index for report in reports], [0, 1])
+        self.assertEqual(os.listdir(os.path.join(self._directory, "claims")), [])
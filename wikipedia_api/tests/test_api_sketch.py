@@ -0,0 +1,169 @@
+from collections import Counter
+import random
+import unittest
+
+import pandas as pd
+
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_sketch import SpaceSaving, rank_frames
+from wikipedia_api.pageviews.api_transport import FakeTransport
+from wikipedia_api.pageviews.api_types import APIHeader, AccessMethod
+
+
+def daily_frame(day, views):
+    return pd.DataFrame(
+        {
+            "project": "fr.wikipedia",
+            "article": list(views),
+            "views_ceil": list(views.values()),
+            "day": f"{day:02d}",
+        }
+    )
+
+
+def skewed_frames(days=30, articles=500, seed=1):
+    # a few popular articles and a long tail, different every day
+    rng = random.Random(seed)
+    frames = []
+    for day in range(1, days + 1):
+        views = {}
+        for _ in range(200):
+            index = min(int(rng.paretovariate(1.2)), articles)
+            article = f"Article_{index}"
+            views[article] = views.get(article, 0) + rng.randint(100, 200)
+        frames.append(daily_frame(day, views))
+    return frames
+
+
+class SpaceSavingTests(unittest.TestCase):
+    def test_exact_below_capacity(self):
+        sketch = SpaceSaving(10)
+        sketch.update_many(["a", "b", "a", "c"], [3, 2, 1, 5])
+        self.assertEqual(
+            [("c", 5, 0), ("a", 4, 0), ("b", 2, 0)], [tuple(e) for e in sketch.top()]
+        )
+        self.assertEqual(11, sketch.total)
+
+    def test_error_bounds(self):
+        rng = random.Random(7)
+        stream = [min(int(rng.paretovariate(1.0)), 1000) for _ in range(20000)]
+        sketch = SpaceSaving(50)
+        for item in stream:
+            sketch.update(item)
+        truth = Counter(stream)
+
+        self.assertEqual(50, len(sketch))
+        for entry in sketch.top():
+            self.assertLessEqual(entry.count - entry.error, truth[entry.key])
+            self.assertGreaterEqual(entry.count, truth[entry.key])
+        threshold = sketch.guaranteed_threshold()
+        for item, count in truth.items():
+            if count > threshold:
+                self.assertIn(item, sketch)
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(InputException):
+            SpaceSaving(0)
+
+
+class RankFramesTests(unittest.TestCase):
+    def test_exact_ranking(self):
+        frames = [daily_frame(1, {"A": 5, "B": 7}), daily_frame(2, {"A": 4, "C": 1})]
+        df = rank_frames(iter(frames), top_n=2)
+        self.assertEqual(["A", "B"], list(df["article"]))
+        self.assertEqual([9, 7], list(df["views_ceil"]))
+        self.assertEqual([0, 0], list(df["error"]))
+        self.assertEqual([1, 2], list(df["rank"]))
+
+    def test_sketch_matches_exact_head(self):
+        frames = skewed_frames()
+        exact = rank_frames(frames, top_n=5)
+        approximate = rank_frames(frames, top_n=5, capacity=100)
+        self.assertEqual(list(exact["article"]), list(approximate["article"]))
+        totals = dict(zip(exact["article"], exact["views_ceil"]))
+        for _, row in approximate.iterrows():
+            self.assertLessEqual(row["views_ceil"] - row["error"], totals[row["article"]])
+            self.assertGreaterEqual(row["views_ceil"], totals[row["article"]])
+
+    def test_empty_and_invalid(self):
+        df = rank_frames([pd.DataFrame()], top_n=3, capacity=10)
+        self.assertTrue(df.empty)
+        self.assertIn("error", df.columns)
+        with self.assertRaises(InputException):
+            rank_frames([], top_n=10, capacity=5)
+
+
+class TopViewPerCountryRangeTests(unittest.TestCase):
+    def test_range_ranking(self):
+        def top_per_country(url):
+            day = int(url.rstrip("/").split("/")[-1])
+            articles = [
+                {"article": "Daily", "project": "fr.wikipedia", "views_ceil": 10},
+                {"article": f"Day_{day}", "project": "fr.wikipedia", "views_ceil": day},
+            ]
+            return {"items": [{"articles": articles}]}
+
+        client = WikipediaPageViewApiClient(
+            "fr.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            transport=FakeTransport(handler=top_per_country),
+        )
+        for capacity in (None, 4):
+            df = client.get_top_view_per_country_range(
+                "FR",
+                AccessMethod.ALL,
+                "20210101",
+                "20210131",
+                top_n=3,
+                sketch_capacity=capacity,
+            )
+            self.assertEqual(["Daily", "Day_31", "Day_30"], list(df["article"])[:3])
+            self.assertEqual(310, df["views_ceil"][0])
+
+        with self.assertRaises(InputException):
+            client.get_top_view_per_country_range(
+                "FR", AccessMethod.ALL, "20200101", "20200131"
+            )
+
+
+class TopPageviewsRangeTests(unittest.TestCase):
+    def test_months_and_ragged_days(self):
+        calls = []
+
+        def top(url):
+            year, month, day = url.rstrip("/").split("/")[-3:]
+            calls.append(f"{year}{month}" if day == "all-days" else year + month + day)
+            views = 100 if day == "all-days" else 1
+            articles = [
+                {"article": "Main_Page", "views": 2 * views, "rank": 1},
+                {"article": f"Period_{month}_{day}", "views": views, "rank": 2},
+            ]
+            return {"items": [{"articles": articles}]}
+
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            transport=FakeTransport(handler=top),
+        )
+        df = client.get_top_pageviews_range(AccessMethod.ALL, "20210130", "20210302", 3)
+        self.assertEqual(
+            ["20210130", "20210131", "202102", "20210301", "20210302"], sorted(calls)
+        )
+        self.assertEqual(
+            ["Main_Page", "Period_02_all-days", "Period_01_30"], list(df["article"])
+        )
+        self.assertEqual([208, 100, 1], list(df["views"]))
+        self.assertEqual(["en.wikipedia"] * 3, list(df["project"]))
+
+        calls.clear()
+        df = client.get_top_pageviews_range(
+            AccessMethod.ALL, "202101", "202103", 1, sketch_capacity=2
+        )
+        self.assertEqual(["202101", "202102", "202103"], sorted(calls))
+        self.assertEqual(600, df["views"][0])
+
+        with self.assertRaises(InputException):
+            client.get_top_pageviews_range(AccessMethod.MOBILE, "202101", "202102")
+        with self.assertRaises(InputException):
+            client.get_top_pageviews_range(AccessMethod.ALL, "201501", "201512")
@@ -0,0 +1,205 @@
+from datetime import datetime, timedelta
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_exceptions import (
+    DeadlineExceededException,
+    InputException,
+    NotFoundException,
+)
+from wikipedia_api.pageviews.api_store import DailySeriesStore
+from wikipedia_api.pageviews.api_types import APIHeader
+
+
+def per_article_response(endpoint, api_header, params):
+    # views of each day is the day of month
+    start = datetime.strptime(params["start"], "%Y%m%d%H")
+    end = datetime.strptime(params["end"], "%Y%m%d%H")
+    items = []
+    for ordinal in range(start.toordinal(), end.toordinal() + 1):
+        day = datetime.fromordinal(ordinal)
+        items.append(
+            {"timestamp": day.strftime("%Y%m%d00"), "views": day.day}
+        )
+    return {"items": items}
+
+
+class DailySeriesStoreTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._directory = self._tmp_dir.name
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_write_and_read(self):
+        store = DailySeriesStore(self._directory, initial_rows=1, initial_days=10)
+        store.write("Main", "20150703", np.array([1, 2, 3]))
+        store.write("Other", "20150701", np.arange(20))
+        self.assertEqual(store.articles, ["Main", "Other"])
+        np.testing.assert_array_equal(
+            store.read("Main", "20150702", "20150705"), [0, 1, 2, 3]
+        )
+        np.testing.assert_array_equal(
+            store.read_many(["Other", "Main"], "20150703", "20150704"),
+            [[2, 3], [1, 2]],
+        )
+        window = store.window("20150701", "20150720")
+        self.assertEqual(window.shape, (2, 20))
+        # reads are views on the memory-mapped file
+        self.assertTrue(np.shares_memory(window, store.read("Other", "20150701", "20150701")))
+        self.assertEqual(store.filled_through("Other"), datetime(2015, 7, 20))
+
+        with self.assertRaises(InputException):
+            store.read("Missing", "20150701", "20150702")
+        with self.assertRaises(InputException):
+            store.read("Main", "20150601", "20150702")
+
+    def test_reopen(self):
+        store = DailySeriesStore(self._directory, dtype=np.int32, initial_days=30)
+        store.write("Main", "20150701", np.array([5, 6]))
+        store.flush()
+        del store
+        store = DailySeriesStore(self._directory)
+        self.assertEqual(store.dtype, np.int32)
+        self.assertIn("Main", store)
+        np.testing.assert_array_equal(store.read("Main", "20150701", "20150702"), [5, 6])
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_update_from_client(self, rest_api_call_mock: MagicMock):
+        rest_api_call_mock.side_effect = per_article_response
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia", APIHeader("test agent", "test@test.com")
+        )
+        store = DailySeriesStore(self._directory, initial_days=40)
+        store.add_articles(["Main", "Other"])
+        updated = store.update_from_client(client, end_time="20150710")
+        self.assertEqual(updated, 2)
+        self.assertEqual(rest_api_call_mock.call_count, 2)
+        np.testing.assert_array_equal(
+            store.read("Other", "20150701", "20150710"), np.arange(1, 11)
+        )
+
+        # only the new days are fetched for existing articles, new article
+        # is backfilled
+        store.add_articles(["New"])
+        rest_api_call_mock.reset_mock()
+        store.update_from_client(client, end_time="20150712")
+        starts = sorted(call.args[2]["start"] for call in rest_api_call_mock.call_args_list)
+        self.assertEqual(starts, ["2015070100", "2015071100", "2015071100"])
+        np.testing.assert_array_equal(
+            store.read("Main", "20150709", "20150712"), [9, 10, 11, 12]
+        )
+        np.testing.assert_array_equal(store.read("New", "20150701", "20150702"), [1, 2])
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_update_only_fills_returned_days(self, rest_api_call_mock: MagicMock):
+        published = {"end": "2015070200"}
+
+        def partial_response(endpoint, api_header, params):
+            params = dict(params, end=min(params["end"], published["end"]))
+            return per_article_response(endpoint, api_header, params)
+
+        rest_api_call_mock.side_effect = partial_response
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia", APIHeader("test agent", "test@test.com")
+        )
+        store = DailySeriesStore(self._directory, initial_days=40)
+        store.add_articles(["Main"])
+        store.update_from_client(client, end_time="20150703")
+        self.assertEqual(store.filled_through("Main"), datetime(2015, 7, 2))
+
+        # the missing day is fetched again once it is published
+        published["end"] = "2015070300"
+        store.update_from_client(client, end_time="20150703")
+        self.assertEqual(store.filled_through("Main"), datetime(2015, 7, 3))
+        np.testing.assert_array_equal(
+            store.read("Main", "20150701", "20150703"), [1, 2, 3]
+        )
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_update_skips_missing_articles(self, rest_api_call_mock: MagicMock):
+        def response(endpoint, api_header, params):
+            if params["article"] == "Other":
+                raise DeadlineExceededException("deadline expired")
+            return per_article_response(endpoint, api_header, params)
+
+        rest_api_call_mock.side_effect = response
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia", APIHeader("test agent", "test@test.com")
+        )
+        store = DailySeriesStore(self._directory, initial_days=40)
+        store.write("Other", "20150701", np.array([7]))
+        store.add_articles(["Main"])
+        updated = store.update_from_client(client, end_time="20150703")
+        self.assertEqual(updated, 1)
+        self.assertEqual(store.filled_through("Main"), datetime(2015, 7, 3))
+        # the article not fetched keeps its values and is fetched next time
+        self.assertEqual(store.filled_through("Other"), datetime(2015, 7, 1))
+        np.testing.assert_array_equal(
+            store.read("Other", "20150701", "20150703"), [7, 0, 0]
+        )
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_update_advances_empty_articles(self, rest_api_call_mock: MagicMock):
+        def response(endpoint, api_header, params):
+            if params["article"] == "No_Such_Title":
+                raise NotFoundException("not found", 404)
+            return per_article_response(endpoint, api_header, params)
+
+        rest_api_call_mock.side_effect = response
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia", APIHeader("test agent", "test@test.com")
+        )
+        store = DailySeriesStore(self._directory, initial_days=40)
+        store.add_articles(["Main", "No_Such_Title"])
+        store.update_from_client(client, end_time="20150703")
+        self.assertEqual(store.filled_through("No_Such_Title"), datetime(2015, 7, 3))
+
+        # the next update only fetches the new days of the empty article
+        rest_api_call_mock.reset_mock()
+        store.update_from_client(client, end_time="20150705")
+        starts = [call.args[2]["start"] for call in rest_api_call_mock.call_args_list]
+        self.assertEqual(starts, ["2015070400", "2015070400"])
+
+        # recent days may not be published yet and are fetched again
+        yesterday = datetime.now() - timedelta(days=1)
+        store.update_from_client(client, end_time=yesterday)
+        self.assertLess(store.filled_through("No_Such_Title").date(), yesterday.date())
+        self.assertEqual(store.filled_through("Main").date(), yesterday.date())
+
+    def test_project(self):
+        store = DailySeriesStore(self._directory, initial_days=2)
+        self.assertIsNone(store.project)
+        client = MagicMock()
+        client.project = "en.wikipedia"
+        client.get_per_article_pageviews_matrix.side_effect = AssertionError
+        store.update_from_client(client, end_time="20150701")
+        self.assertEqual("en.wikipedia", store.project)
+
+        # the project is kept with the store and other projects are rejected
+        store = DailySeriesStore(self._directory)
+        self.assertEqual("en.wikipedia", store.project)
+        client.project = "de.wikipedia"
+        with self.assertRaises(InputException):
+            store.update_from_client(client, end_time="20150701")
+        with self.assertRaises(InputException):
+            DailySeriesStore(self._directory, project="de.wikipedia")
+        self.assertEqual(
+            "en.wikipedia", DailySeriesStore(self._directory, project="en.wikipedia").project
+        )
+
+    def test_resize_keeps_values(self):
+        store = DailySeriesStore(self._directory, initial_rows=1, initial_days=2)
+        store.write("Main", "20150701", np.array([1, 2]))
+        store.write("Other", "20150701", np.array([3, 4, 5]))
+        np.testing.assert_array_equal(
+            store.read_many(["Main", "Other"], "20150701", "20150703"),
+            [[1, 2, 0], [3, 4, 5]],
+        )
+        store = DailySeriesStore(self._directory)
+        self.assertEqual(store.filled_through("Other"), datetime(2015, 7, 3))
@@ -0,0 +1,120 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_scheduler import RequestScheduler
+from wikipedia_api.pageviews.api_stream import (
+    iter_json_array_items,
+    iter_record_batches,
+)
+from wikipedia_api.pageviews.api_transport import FakeTransport
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    AgentType,
+    AggregatePageViewRequest,
+    Granularity,
+)
+
+
+def split_chunks(data, size):
+    return [data[i: i + size] for i in range(0, len(data), size)]
+
+
+class APIStreamTests(unittest.TestCase):
+    def setUp(self):
+        self._items = [
+            {
+                "project": "en.wikipedia",
+                "access": "all-access",
+                "agent": "user",
+                "granularity": "hourly",
+                "timestamp": f"20200101{hour:02d}",
+                "views": hour * 1000,
+            }
+            for hour in range(24)
+        ]
+        self._document = json.dumps({"items": self._items, "note": "é ✓"})
+
+    def test_iter_json_array_items_any_chunk_size(self):
+        data = self._document.encode("utf-8")
+        for size in (1, 2, 7, 64, len(data)):
+            items = list(iter_json_array_items(split_chunks(data, size)))
+            self.assertEqual(items, self._items)
+
+    def test_iter_json_array_items_skip_other_keys(self):
+        document = json.dumps(
+            {
+                "meta": {"items": [1, 2], "text": 'a "items": [3]'},
+                "items": [{"a": "]"}, {"b": [1, {"c": 2}]}],
+            }
+        )
+        items = list(iter_json_array_items(split_chunks(document, 3)))
+        self.assertEqual(items, [{"a": "]"}, {"b": [1, {"c": 2}]}])
+
+    def test_iter_json_array_items_missing_key(self):
+        document = json.dumps({"type": "not found", "title": "Not found."})
+        self.assertEqual(list(iter_json_array_items([document])), [])
+
+    def test_iter_json_array_items_truncated(self):
+        data = self._document[: len(self._document) // 2]
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array_items(split_chunks(data, 5)))
+
+    def test_iter_record_batches(self):
+        batches = list(iter_record_batches(range(10), 4))
+        self.assertEqual(batches, [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]])
+        self.assertEqual(list(iter_record_batches([], 4)), [])
+
+    @patch("wikipedia_api.pageviews.api_client.stream_api_call")
+    def test_stream_aggregated_pageviews(self, stream_api_call_mock: MagicMock):
+        stream_api_call_mock.side_effect = lambda endpoint, header, params: iter(
+            self._items
+        )
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia", APIHeader("test agent", "test@test.com")
+        )
+        request = AggregatePageViewRequest(
+            access=AccessMethod.MOBILE,
+            agent=AgentType.USER,
+            granularity=Granularity.HOURLY,
+            start_time="2020010100",
+            end_time="2020010123",
+        )
+        batches = list(client.stream_aggregated_pageviews(request, batch_size=10))
+        # mobile access is split into mobile-app and mobile-web calls
+        self.assertEqual(stream_api_call_mock.call_count, 2)
+        self.assertEqual([len(df) for df in batches], [10, 10, 4, 10, 10, 4])
+        self.assertEqual(
+            set(batches[0].columns),
+            set(["project", "access", "agent", "granularity", "timestamp", "views"]),
+        )
+
+        with self.assertRaises(InputException):
+            client.stream_aggregated_pageviews(request, batch_size=0)
+
+    def test_stream_releases_slot_between_batches(self):
+        scheduler = RequestScheduler(max_concurrency=1, reserved_interactive=0)
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            scheduler=scheduler,
+            transport=FakeTransport(handler=lambda url: {"items": self._items}),
+        )
+        request = AggregatePageViewRequest(
+            access=AccessMethod.ALL,
+            agent=AgentType.USER,
+            granularity=Granularity.HOURLY,
+            start_time="2020010100",
+            end_time="2020010123",
+        )
+        batches = client.stream_aggregated_pageviews(request, batch_size=10)
+        self.assertEqual(len(next(batches)), 10)
+        # the consumer holds a batch, no slot is held
+        self.assertEqual(sum(s.running for s in scheduler.stats().values()), 0)
+        self.assertEqual([len(df) for df in batches], [10, 4])
+        # one streamed call is one scheduled call
+        self.assertEqual(sum(s.started for s in scheduler.stats().values()), 1)
+        self.assertEqual(sum(s.running for s in scheduler.stats().values()), 0)
@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_titles import (
+    encode_title,
+    normalize_title,
+    normalize_titles,
+    title_cache_info,
+)
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    AgentType,
+    ArticleMatrixRequest,
+    Granularity,
+)
+
+
+class TitleTests(unittest.TestCase):
+    def test_normalize_title(self):
+        self.assertEqual(normalize_title(" albert  Einstein "), "Albert_Einstein")
+        self.assertEqual(normalize_title("Albert_Einstein"), "Albert_Einstein")
+        self.assertEqual(normalize_title("Caf%C3%A9", encoded=True), "Café")
+        # titles are taken literally unless they are known to be encoded
+        self.assertEqual(normalize_title("Tax%20rate"), "Tax%20rate")
+        self.assertEqual(normalize_title("Tax%20rate", encoded=True), "Tax_rate")
+        self.assertEqual(normalize_title("iPhone", capitalize=False), "iPhone")
+
+    def test_encode_title(self):
+        self.assertEqual(encode_title("AC/DC"), "AC%2FDC")
+        self.assertEqual(encode_title("Café"), "Caf%C3%A9")
+        # already encoded titles are not encoded twice
+        self.assertEqual(
+            encode_title(encode_title("100% Pure"), encoded=True), "100%25_Pure"
+        )
+        self.assertEqual(encode_title("Tax%20rate"), "Tax%2520rate")
+
+    def test_normalize_titles(self):
+        titles = ["Main Page", "Main_Page", "main Page", "AC/DC", "Main Page"]
+        batch = normalize_titles(titles)
+        self.assertEqual(batch.encoded, ["Main_Page", "AC%2FDC"])
+        self.assertEqual(
+            batch.originals["Main_Page"], ["Main Page", "Main_Page", "main Page"]
+        )
+        self.assertEqual(batch.encoded_of()["main Page"], "Main_Page")
+
+    def test_memo_cache(self):
+        encode_title("Memo test title")
+        hits = title_cache_info().hits
+        encode_title("Memo test title")
+        self.assertEqual(title_cache_info().hits, hits + 1)
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_client_matrix_maps_original_titles(self, rest_api_call_mock: MagicMock):
+        rest_api_call_mock.side_effect = lambda endpoint, api_header, params: {
+            "items": [{"article": params["article"], "timestamp": "2021010100", "views": 3}]
+        }
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia", APIHeader("test agent", "test@test.com")
+        )
+        request = ArticleMatrixRequest(
+            AccessMethod.ALL,
+            AgentType.USER,
+            ["AC/DC", " AC/DC", "main Page"],
+            Granularity.DAILY,
+            "20210101",
+            "20210102",
+        )
+        matrix = client.get_per_article_pageviews_matrix(request)
+        self.assertEqual(rest_api_call_mock.call_count, 2)
+        called = {call.args[2]["article"] for call in rest_api_call_mock.call_args_list}
+        self.assertEqual(called, {"AC%2FDC", "Main_Page"})
+        self.assertEqual(list(matrix.articles), ["AC/DC", " AC/DC", "main Page"])
+        self.assertEqual(matrix.values[:, 0].tolist(), [3, 3, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
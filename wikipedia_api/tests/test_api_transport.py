@@ -0,0 +1,114 @@
+import unittest
+
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_constants import PageViewApiEndPoints
+from wikipedia_api.pageviews.api_exceptions import NotFoundException
+from wikipedia_api.pageviews.api_transport import (
+    FakeTransport,
+    RequestsTransport,
+    Urllib3Transport,
+    transport_api_call,
+)
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    AccessMethod,
+    AgentType,
+    AggregatePageViewRequest,
+    Granularity,
+    PerArticlePageViewRequest,
+    TopViewedArticleRequest,
+)
+from wikipedia_api.tests.stub_server import StubApiServer
+
+TOP_RESPONSE = {
+    "items": [{"articles": [{"article": "Main_Page", "views": 10, "rank": 1}]}]
+}
+
+
+class FakeTransportTests(unittest.TestCase):
+    def setUp(self):
+        self._transport = FakeTransport()
+        self._client = WikipediaPageViewApiClient(
+            "en.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            transport=self._transport,
+        )
+
+    def test_get_top_pageviews(self):
+        self._transport.add(
+            "/api/rest_v1/metrics/pageviews/top/en.wikipedia/all-access/2021/01/01",
+            TOP_RESPONSE,
+        )
+        df = self._client.get_top_pageviews(
+            TopViewedArticleRequest(AccessMethod.ALL, 2021, 1, 1)
+        )
+        self.assertEqual(df["article"][0], "Main_Page")
+        self.assertEqual(len(self._transport.calls), 1)
+        # clients of other projects share the transport
+        self.assertIs(self._client.with_project("de.wikipedia").transport, self._transport)
+
+    def test_not_found(self):
+        request = PerArticlePageViewRequest(
+            AccessMethod.ALL, AgentType.USER, "Missing", Granularity.DAILY,
+            "20210101", "20210102",
+        )
+        with self.assertRaises(NotFoundException):
+            self._client.get_per_article_pageviews(request)
+
+    def test_stream_and_handler(self):
+        items = [
+            {"project": "en.wikipedia", "timestamp": f"202101{d:02d}00", "views": d}
+            for d in range(1, 11)
+        ]
+        transport = FakeTransport(handler=lambda url: {"items": items})
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia", APIHeader("test agent", "test@test.com"), transport=transport
+        )
+        request = AggregatePageViewRequest(
+            AccessMethod.ALL, AgentType.USER, Granularity.DAILY, "20210101", "20210110"
+        )
+        batches = list(client.stream_aggregated_pageviews(request, batch_size=4))
+        self.assertEqual([len(batch) for batch in batches], [4, 4, 2])
+        self.assertEqual(client.get_aggregated_pageviews(request)["views"].sum(), 55)
+
+
+class HttpTransportTests(unittest.TestCase):
+    def setUp(self):
+        self._server = StubApiServer().start()
+        self._endpoint = self._server.base_url + "/top/{day}"
+        self._server.set_payload("/top/01", TOP_RESPONSE)
+
+    def tearDown(self):
+        self._server.stop()
+
+    def test_transports_agree(self):
+        header = {"User-Agent": "test agent"}
+        for transport in (RequestsTransport(), Urllib3Transport(), FakeTransport()):
+            if isinstance(transport, FakeTransport):
+                transport.add("/top/01", TOP_RESPONSE)
+            response = transport_api_call(transport, self._endpoint, header, {"day": "01"})
+            self.assertEqual(response.data, TOP_RESPONSE)
+            # conditional call with the returned validators
+            response = transport_api_call(
+                transport, self._endpoint, header, {"day": "01"}, response.validators
+            )
+            self.assertEqual(response.status_code, 304)
+            with self.assertRaises(NotFoundException):
+                transport_api_call(transport, self._endpoint, header, {"day": "02"})
+            with transport.stream(
+                self._server.base_url + "/top/01", header, chunk_size=8
+            ) as response:
+                self.assertEqual(response.status_code, 200)
+                self.assertIn("ETag", response.headers)
+                chunks = list(response)
+            self.assertGreater(len(chunks), 1)
+            with self.assertRaises(NotFoundException):
+                list(transport.stream(self._server.base_url + "/top/02", header, 8))
+
+    def test_served_by_full_url(self):
+        transport = FakeTransport()
+        url = PageViewApiEndPoints.TOP_PAGEVIEWS.format(
+            project="en.wikipedia", access="all-access", year="2021", month="01", day="01"
+        )
+        transport.add(url, TOP_RESPONSE)
+        self.assertEqual(transport.get(url, {}).json(), TOP_RESPONSE)
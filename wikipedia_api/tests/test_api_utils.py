@@ -9,8 +9,11 @@ from wikipedia_api.pageviews.api_types import (
 )
 
 from wikipedia_api.pageviews.api_utils import (
+    parse_start_end_month_or_day,
     parse_start_end_time,
     parse_time_parameter,
+    split_time_range_by_month,
+    split_time_range_by_year,
     split_time_range_for_legacy_api,
     translate_access_method_to_str,
     translate_agent_type_to_str,
@@ -146,3 +149,43 @@ class APIUtilsTests(unittest.TestCase):
             page_view_api_start_time, PageViewApiValidDateRange.PAGEVIEW_API_START_DATE
         )
         self.assertEqual(page_view_api_end_time, end_time)
+
+    def test_split_time_range_by_year(self):
+        start_time = datetime(2019, 6, 1)
+        end_time = datetime(2021, 2, 1)
+        self.assertEqual(
+            split_time_range_by_year(start_time, end_time),
+            [
+                (start_time, datetime(2019, 12, 31, 23)),
+                (datetime(2020, 1, 1), datetime(2020, 12, 31, 23)),
+                (datetime(2021, 1, 1), end_time),
+            ],
+        )
+        self.assertEqual(
+            split_time_range_by_year(start_time, start_time), [(start_time, start_time)]
+        )
+
+    def test_parse_start_end_month_or_day(self):
+        self.assertEqual(
+            parse_start_end_month_or_day("202002", "202012"),
+            (datetime(2020, 2, 1), datetime(2020, 12, 31)),
+        )
+        self.assertEqual(
+            parse_start_end_month_or_day("20200215", "202002"),
+            (datetime(2020, 2, 15), datetime(2020, 2, 29)),
+        )
+        with self.assertRaises(InputException):
+            parse_start_end_month_or_day("202013", "202101")
+        with self.assertRaises(InputException):
+            parse_start_end_month_or_day("202102", "20210131")
+
+    def test_split_time_range_by_month(self):
+        months, days = split_time_range_by_month(
+            datetime(2021, 1, 31), datetime(2021, 4, 1)
+        )
+        self.assertEqual([datetime(2021, 2, 1), datetime(2021, 3, 1)], months)
+        self.assertEqual([datetime(2021, 1, 31), datetime(2021, 4, 1)], days)
+        months, days = split_time_range_by_month(
+            datetime(2021, 1, 1), datetime(2021, 1, 31)
+        )
+        self.assertEqual(([datetime(2021, 1, 1)], []), (months, days))
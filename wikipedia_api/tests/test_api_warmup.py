@@ -0,0 +1,184 @@
+from datetime import datetime, timedelta
+import time
+import unittest
+from unittest.mock import MagicMock
+
+from wikipedia_api.pageviews.api_cache import ResponseCache
+from wikipedia_api.pageviews.api_client import WikipediaPageViewApiClient
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_transport import FakeTransport
+from wikipedia_api.pageviews.api_types import (
+    APIHeader,
+    PerArticlePageViewRequest,
+    TopViewedArticleRequest,
+    TopViewedPerCountryRequest,
+)
+from wikipedia_api.pageviews.api_warmup import (
+    CacheWarmupScheduler,
+    WarmupKind,
+    WarmupTarget,
+    expand_target,
+    resolve_date_offset,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2021, 3, 2, 8, 30)
+
+    def __call__(self):
+        return self.now
+
+
+class CacheWarmupTests(unittest.TestCase):
+    def setUp(self):
+        self._client = WikipediaPageViewApiClient(
+            "en.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            cache=ResponseCache(ttl=3600),
+        )
+
+    def test_resolve_date_offset(self):
+        now = datetime(2021, 3, 1, 8, 30)
+        self.assertEqual(resolve_date_offset("today", now), datetime(2021, 3, 1))
+        self.assertEqual(resolve_date_offset("yesterday", now), datetime(2021, 2, 28))
+        self.assertEqual(resolve_date_offset("3-days-ago", now), datetime(2021, 2, 26))
+        self.assertEqual(resolve_date_offset(2, now), datetime(2021, 2, 27))
+        with self.assertRaises(InputException):
+            resolve_date_offset("last-week", now)
+
+    def test_expand_target(self):
+        now = datetime(2021, 3, 2)
+        units = expand_target(
+            WarmupTarget(
+                WarmupKind.TOP,
+                projects=["en.wikipedia", "de.wikipedia"],
+                date_offsets=["yesterday", 1, 2],
+            ),
+            "en.wikipedia",
+            now,
+        )
+        # "yesterday" and 1 are the same day
+        self.assertEqual(len(units), 4)
+        self.assertIsInstance(units[0][1], TopViewedArticleRequest)
+
+        units = expand_target(
+            WarmupTarget(
+                WarmupKind.PER_ARTICLE, articles=["A", "B"], window_days=7
+            ),
+            "en.wikipedia",
+            now,
+        )
+        self.assertEqual(len(units), 2)
+        request = units[0][1]
+        self.assertIsInstance(request, PerArticlePageViewRequest)
+        self.assertEqual((request.start_time, request.end_time), ("20210223", "20210301"))
+
+        units = expand_target(
+            WarmupTarget(WarmupKind.TOP_PER_COUNTRY, countries=["US", "FR"]),
+            "en.wikipedia",
+            now,
+        )
+        self.assertEqual(
+            [unit[1] for unit in units],
+            [
+                TopViewedPerCountryRequest("US", request.access, 2021, 3, 1),
+                TopViewedPerCountryRequest("FR", request.access, 2021, 3, 1),
+            ],
+        )
+
+    def test_run_once(self):
+        clock = FakeClock()
+        calls = []
+        self._client.get_top_pageviews = MagicMock(
+            side_effect=lambda request: calls.append(request)
+        )
+        fail_client = MagicMock()
+        fail_client.execute.side_effect = KeyError("items")
+        self._client.with_project = MagicMock(return_value=fail_client)
+
+        scheduler = CacheWarmupScheduler(
+            self._client,
+            [
+                WarmupTarget(WarmupKind.TOP, date_offsets=["yesterday", "today"]),
+                WarmupTarget(WarmupKind.TOP, projects=["de.wikipedia"]),
+            ],
+            rate=1000,
+            clock=clock,
+        )
+        report = scheduler.run_once()
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(report.total, 3)
+        self.assertEqual(report.warm, 2)
+        self.assertEqual(report.failed, 1)
+        self.assertAlmostEqual(report.coverage, 2 / 3)
+        self.assertEqual(report.last_round_at, clock.now)
+
+        # warm entries are skipped until they expire
+        clock.now += timedelta(minutes=30)
+        scheduler.run_once()
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(scheduler.report().lag_seconds, 1800)
+        clock.now += timedelta(minutes=31)
+        report = scheduler.run_once()
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(report.warm, 2)
+
+    def test_run_once_checks_cache(self):
+        transport = FakeTransport(
+            handler=lambda url: {
+                "items": [{"articles": [{"article": "A", "views": 1, "rank": 1}]}]
+            }
+        )
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia",
+            APIHeader("test agent", "test@test.com"),
+            cache=ResponseCache(ttl=3600),
+            transport=transport,
+        )
+        scheduler = CacheWarmupScheduler(
+            client, [WarmupTarget(WarmupKind.TOP)], rate=1000, clock=FakeClock()
+        )
+        self.assertEqual(scheduler.run_once().warm, 1)
+        self.assertEqual(len(transport.calls), 1)
+        scheduler.run_once()
+        self.assertEqual(len(transport.calls), 1)
+
+        # cleared entries are no longer warm and are fetched again
+        client.cache.clear()
+        self.assertEqual(scheduler.report().coverage, 0.0)
+        self.assertEqual(scheduler.run_once().warm, 1)
+        self.assertEqual(len(transport.calls), 2)
+
+    def test_failure_logged(self):
+        self._client.get_top_pageviews = MagicMock(side_effect=KeyError("items"))
+        scheduler = CacheWarmupScheduler(
+            self._client, [WarmupTarget(WarmupKind.TOP)], rate=1000
+        )
+        with self.assertLogs("wikipedia_api.pageviews.api_warmup", "WARNING") as logs:
+            report = scheduler.run_once()
+        self.assertEqual(report.failed, 1)
+        self.assertIn("items", logs.output[0])
+
+    def test_background_thread(self):
+        self._client.get_top_pageviews = MagicMock()
+        scheduler = CacheWarmupScheduler(
+            self._client, [WarmupTarget(WarmupKind.TOP)], rate=1000, interval=60
+        )
+        scheduler.start()
+        self.assertTrue(scheduler.running)
+        for _ in range(100):
+            if scheduler.report().last_round_at is not None:
+                break
+            time.sleep(0.01)
+        scheduler.stop(timeout=5)
+        self.assertFalse(scheduler.running)
+        self.assertEqual(scheduler.report().coverage, 1.0)
+        self._client.get_top_pageviews.assert_called_once()
+
+    def test_requires_cache(self):
+        client = WikipediaPageViewApiClient(
+            "en.wikipedia", APIHeader("test agent", "test@test.com")
+        )
+        with self.assertRaises(InputException):
+            CacheWarmupScheduler(client, [])
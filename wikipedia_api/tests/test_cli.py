@@ -0,0 +1,138 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from wikipedia_api.cli import build_units, create_parser, main
+from wikipedia_api.pageviews.api_exceptions import InputException
+from wikipedia_api.pageviews.api_export import (
+    ChunkWriter,
+    CsvChunkWriter,
+    JsonlChunkWriter,
+    create_chunk_writer,
+    export_frames,
+)
+from wikipedia_api.pageviews.api_types import (
+    AccessMethod,
+    AggregatePageViewRequest,
+    TopViewedArticleRequest,
+    TopViewedPerCountryRequest,
+)
+
+HEADER_ARGS = ["--user-agent", "test agent", "--call-from", "test@test.com"]
+
+
+def top_response(endpoint, api_header, params):
+    if params["day"] == "03":
+        return {"type": "not found"}
+    return {
+        "items": [
+            {
+                "articles": [
+                    {"article": "Main_Page", "views": int(params["day"]), "rank": 1},
+                    {"article": "Other", "views": 1, "rank": 2},
+                ]
+            }
+        ]
+    }
+
+
+class ExportTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp_dir.cleanup()
+
+    def test_build_units(self):
+        parser = create_parser()
+        args = parser.parse_args(
+            ["aggregate", "--start", "2019060100", "--end", "2021010100"] + HEADER_ARGS
+        )
+        units = build_units(args)
+        self.assertEqual(len(units), 3)
+        self.assertIsInstance(units[0], AggregatePageViewRequest)
+        self.assertEqual(units[1].start_time, "2020010100")
+
+        args = parser.parse_args(
+            ["top", "--start", "20201130", "--end", "20210201", "--monthly",
+             "--access", "mobile-web"] + HEADER_ARGS
+        )
+        self.assertEqual(
+            build_units(args),
+            [
+                TopViewedArticleRequest(AccessMethod.MOBILE_WEB, 2020, 11, "all-days"),
+                TopViewedArticleRequest(AccessMethod.MOBILE_WEB, 2020, 12, "all-days"),
+                TopViewedArticleRequest(AccessMethod.MOBILE_WEB, 2021, 1, "all-days"),
+                TopViewedArticleRequest(AccessMethod.MOBILE_WEB, 2021, 2, "all-days"),
+            ],
+        )
+
+        args = parser.parse_args(
+            ["top-per-country", "--countries", "US,FR", "--start", "20210101",
+             "--end", "20210102"] + HEADER_ARGS
+        )
+        units = build_units(args)
+        self.assertEqual(len(units), 4)
+        self.assertEqual(units[1], TopViewedPerCountryRequest("US", AccessMethod.ALL, 2021, 1, 2))
+
+        args = parser.parse_args(
+            ["per-article", "--start", "20210101", "--end", "20210102"] + HEADER_ARGS
+        )
+        with self.assertRaises(InputException):
+            build_units(args)
+
+    def test_chunk_writers(self):
+        path = os.path.join(self._tmp_dir.name, "out.csv")
+        partial = pd.DataFrame({"a": [4], "b": ["w"]})
+        partial.attrs["missing"] = ["20210102"]
+        with CsvChunkWriter(path) as writer:
+            stats = export_frames(
+                [
+                    pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}),
+                    None,
+                    pd.DataFrame(),
+                    partial,
+                    pd.DataFrame({"b": ["z"], "a": [3]}),
+                ],
+                writer,
+            )
+        self.assertEqual((stats.units, stats.failed_units, stats.rows), (5, 2, 3))
+        self.assertEqual(stats.partial_units, 1)
+        self.assertIn("2 failed (1 partial)", str(stats))
+        df = pd.read_csv(path)
+        self.assertEqual(list(df.columns), ["a", "b"])
+        self.assertEqual(list(df["a"]), [1, 2, 3])
+
+        path = os.path.join(self._tmp_dir.name, "out.jsonl")
+        with JsonlChunkWriter(path) as writer:
+            writer.write(pd.DataFrame({"a": [1]}))
+            writer.write(pd.DataFrame({"a": [2, 3]}))
+        with open(path) as f:
+            self.assertEqual([json.loads(line)["a"] for line in f], [1, 2, 3])
+
+        with self.assertRaises(InputException):
+            create_chunk_writer(path, "xml")
+        # writers have to implement write
+        with self.assertRaises(TypeError):
+            ChunkWriter()
+
+    @patch("wikipedia_api.pageviews.api_client.rest_api_call")
+    def test_main(self, rest_api_call_mock: MagicMock):
+        rest_api_call_mock.side_effect = top_response
+        path = os.path.join(self._tmp_dir.name, "top.jsonl")
+        exit_code = main(
+            ["top", "--start", "20210101", "--end", "20210105", "--format", "jsonl",
+             "-o", path, "--workers", "2", "--quiet"] + HEADER_ARGS
+        )
+        # the unit of 2021-01-03 failed
+        self.assertEqual(exit_code, 1)
+        self.assertEqual(rest_api_call_mock.call_count, 5)
+        df = pd.read_json(path, lines=True)
+        self.assertEqual(len(df), 8)
+        self.assertEqual(
+            sorted(df[df["article"] == "Main_Page"]["views"]), [1, 2, 4, 5]
+        )